@@ -0,0 +1,46 @@
+"""tracker rank order indexes
+
+Per-user tracker lists are keyset paginated in rank order (rank_key, then
+pk). A composite (user_id, rank_key, pk) index lets each page start at its
+cursor and read only the rows it returns, instead of sorting the user's
+whole library per page.
+
+Revision ID: 3f8b1d6e0c92
+Revises: 9a6f3e2c7b14
+Create Date: 2026-10-17 15:02:41.530118
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8b1d6e0c92'
+down_revision: Union[str, Sequence[str], None] = '9a6f3e2c7b14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRACKER_TABLES = (
+    'user_movies',
+    'user_tv_shows',
+    'user_books',
+    'user_video_games',
+    'user_countries',
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table_name in TRACKER_TABLES:
+        op.create_index(
+            f'ix_{table_name}_user_id_rank_key',
+            table_name,
+            ['user_id', 'rank_key', 'pk'],
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name in TRACKER_TABLES:
+        op.drop_index(f'ix_{table_name}_user_id_rank_key', table_name=table_name)
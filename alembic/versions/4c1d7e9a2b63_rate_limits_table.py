@@ -0,0 +1,36 @@
+"""rate limits table
+
+Shared state for the SQL rate-limit backend: one GCRA theoretical arrival
+time per limited key, so limits hold across workers and instances.
+
+Revision ID: 4c1d7e9a2b63
+Revises: bdf47c1723a4
+Create Date: 2026-10-17 09:12:41.318204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '4c1d7e9a2b63'
+down_revision: Union[str, Sequence[str], None] = 'bdf47c1723a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'rate_limits',
+        sa.Column('key', sa.String(length=128), nullable=False),
+        sa.Column('tat', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('key'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rate_limits')
@@ -0,0 +1,50 @@
+"""tracker changes
+
+Change log behind tracker delta sync (/v1/users/me/<list>/changes): the
+latest write to each tracker with an increasing seq, deleted trackers
+staying behind as tombstones. Trackers written before this migration have
+no row; clients pick them up from their first full sync (since=0).
+
+Revision ID: 5d2e8a1f7b40
+Revises: 3f8b1d6e0c92
+Create Date: 2026-10-17 16:11:27.402913
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2e8a1f7b40'
+down_revision: Union[str, Sequence[str], None] = '3f8b1d6e0c92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'tracker_changes',
+        sa.Column('seq', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('domain', sa.String(length=16), nullable=False),
+        sa.Column('tracker_id', sa.String(length=36), nullable=False),
+        sa.Column('deleted', sa.Boolean(), nullable=False),
+        sa.Column('changed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('seq'),
+        sa.UniqueConstraint('tracker_id'),
+        sqlite_autoincrement=True,
+    )
+    op.create_index(
+        'ix_tracker_changes_user_id_domain_seq',
+        'tracker_changes',
+        ['user_id', 'domain', 'seq'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tracker_changes_user_id_domain_seq', table_name='tracker_changes')
+    op.drop_table('tracker_changes')
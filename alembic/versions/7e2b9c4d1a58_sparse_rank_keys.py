@@ -0,0 +1,72 @@
+"""sparse rank keys
+
+Ranks become sparse sort keys: ``rank`` is renamed ``rank_key`` on the five
+tracker tables and existing positions are spread ``GAP`` (1024) apart, so a
+single insert, move or removal rewrites one row instead of shifting the tail
+of the list. The API derives dense 1-based ranks from key order on read
+(see app.services.rankings).
+
+Revision ID: 7e2b9c4d1a58
+Revises: 4c1d7e9a2b63
+Create Date: 2026-10-17 11:04:27.551903
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '7e2b9c4d1a58'
+down_revision: Union[str, Sequence[str], None] = '4c1d7e9a2b63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRACKER_TABLES = (
+    'user_movies',
+    'user_tv_shows',
+    'user_books',
+    'user_video_games',
+    'user_countries',
+)
+
+GAP = 1024
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table_name in TRACKER_TABLES:
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.alter_column(
+                'rank', new_column_name='rank_key', existing_type=sa.Integer()
+            )
+        tracker = sa.table(table_name, sa.column('rank_key', sa.Integer))
+        op.execute(
+            tracker.update()
+            .where(tracker.c.rank_key.isnot(None))
+            .values(rank_key=tracker.c.rank_key * GAP)
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name in TRACKER_TABLES:
+        # Collapse keys back to dense 1-based positions per user before the
+        # column regains its old meaning.
+        op.execute(
+            sa.text(
+                f'UPDATE {table_name} SET rank_key = ('
+                f'SELECT COUNT(*) FROM {table_name} AS other '
+                f'WHERE other.user_id = {table_name}.user_id '
+                'AND other.on_rankings AND other.rank_key IS NOT NULL '
+                f'AND (other.rank_key < {table_name}.rank_key '
+                f'OR (other.rank_key = {table_name}.rank_key '
+                f'AND other.pk <= {table_name}.pk))) '
+                'WHERE rank_key IS NOT NULL'
+            )
+        )
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.alter_column(
+                'rank_key', new_column_name='rank', existing_type=sa.Integer()
+            )
@@ -0,0 +1,41 @@
+"""tv progress
+
+Materialized per-(user, show) aired/watched episode counts behind the TV
+list's watch status. Rows are filled by writes and by the
+app.jobs.reconcile_tv_progress job (run it once after upgrading); shows
+without a row are counted live meanwhile.
+
+Revision ID: 8c4f1a7d2e65
+Revises: 5d2e8a1f7b40
+Create Date: 2026-10-17 19:02:51.118406
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4f1a7d2e65'
+down_revision: Union[str, Sequence[str], None] = '5d2e8a1f7b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'tv_progress',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('tv_show_id', sa.Integer(), nullable=False),
+        sa.Column('aired_count', sa.Integer(), nullable=False),
+        sa.Column('watched_count', sa.Integer(), nullable=False),
+        sa.Column('next_airdate', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('user_id', 'tv_show_id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('tv_progress')
@@ -0,0 +1,49 @@
+"""ranking versions and idempotency keys
+
+State for the ranking-write guard: a per-user ranking version (ETag /
+If-Match on the ranking endpoints) and the recorded responses of writes
+sent with an Idempotency-Key, so retries replay instead of re-running.
+
+Revision ID: 9a6f3e2c7b14
+Revises: 7e2b9c4d1a58
+Create Date: 2026-10-17 13:26:09.184422
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '9a6f3e2c7b14'
+down_revision: Union[str, Sequence[str], None] = '7e2b9c4d1a58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'ranking_versions',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.pk']),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('key', sa.String(length=300), nullable=False),
+        sa.Column('fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('status_code', sa.Integer(), nullable=True),
+        sa.Column('body', sa.Text(), nullable=True),
+        sa.Column('etag', sa.String(length=40), nullable=True),
+        sa.Column('created_at', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('key'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('idempotency_keys')
+    op.drop_table('ranking_versions')
@@ -0,0 +1,78 @@
+"""schedule entries
+
+Precomputed Schedule page: one row per unwatched, dated episode of each
+show a user follows (listed, not frozen). Backfilled here from the current
+tracker, episode and watch tables; writes keep it current afterwards.
+
+Revision ID: b1e7c3d9f420
+Revises: 8c4f1a7d2e65
+Create Date: 2026-10-18 09:14:37.520914
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b1e7c3d9f420'
+down_revision: Union[str, Sequence[str], None] = '8c4f1a7d2e65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'schedule_entries',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('episode_pk', sa.Integer(), nullable=False),
+        sa.Column('tv_show_id', sa.Integer(), nullable=False),
+        sa.Column('show_id', sa.String(), nullable=False),
+        sa.Column('show_title', sa.String(length=254), nullable=False),
+        sa.Column('episode_id', sa.String(), nullable=False),
+        sa.Column('episode_title', sa.String(length=254), nullable=False),
+        sa.Column('season', sa.Integer(), nullable=True),
+        sa.Column('season_number', sa.Integer(), nullable=True),
+        sa.Column('airdate', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('user_id', 'episode_pk'),
+    )
+    op.create_index(
+        'ix_schedule_entries_user_id_airdate',
+        'schedule_entries',
+        ['user_id', 'airdate'],
+    )
+    op.create_index(
+        'ix_schedule_entries_user_id_show_title',
+        'schedule_entries',
+        ['user_id', 'show_title', 'season'],
+    )
+    op.execute("""
+        INSERT INTO schedule_entries (
+            user_id, episode_pk, tv_show_id, show_id, show_title,
+            episode_id, episode_title, season, season_number, airdate
+        )
+        SELECT t.user_id, e.pk, e.tv_show_id, s.id, s.title,
+               e.id, e.title, e.season, e.season_number, e.airdate
+        FROM user_tv_shows t
+        JOIN tv_episodes e ON e.tv_show_id = t.tv_show_id
+        JOIN tv_shows s ON s.pk = t.tv_show_id
+        WHERE (t.on_watchlist = true OR t.on_rankings = true)
+          AND COALESCE(t.freeze, 0) = 0
+          AND e.airdate IS NOT NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM user_tv_episodes w
+              WHERE w.episode_id = e.pk AND w.user_id = t.user_id
+                AND w.watched = 1
+          )
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        'ix_schedule_entries_user_id_show_title', table_name='schedule_entries'
+    )
+    op.drop_index('ix_schedule_entries_user_id_airdate', table_name='schedule_entries')
+    op.drop_table('schedule_entries')
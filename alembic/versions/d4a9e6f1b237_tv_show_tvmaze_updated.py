@@ -0,0 +1,30 @@
+"""tv show tvmaze_updated watermark
+
+Revision ID: d4a9e6f1b237
+Revises: b1e7c3d9f420
+Create Date: 2026-10-18 11:02:51.304178
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a9e6f1b237'
+down_revision: Union[str, Sequence[str], None] = 'b1e7c3d9f420'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('tv_shows', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('tvmaze_updated', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('tv_shows', schema=None) as batch_op:
+        batch_op.drop_column('tvmaze_updated')
@@ -0,0 +1,36 @@
+"""provider validators
+
+Revision ID: e7b2c5a8d913
+Revises: d4a9e6f1b237
+Create Date: 2026-10-18 13:27:40.118265
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b2c5a8d913'
+down_revision: Union[str, Sequence[str], None] = 'd4a9e6f1b237'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'provider_validators',
+        sa.Column('source', sa.String(length=64), nullable=False),
+        sa.Column('key', sa.String(length=128), nullable=False),
+        sa.Column('etag', sa.String(length=512), nullable=True),
+        sa.Column('last_modified', sa.String(length=64), nullable=True),
+        sa.Column('payload_hash', sa.String(length=64), nullable=True),
+        sa.PrimaryKeyConstraint('source', 'key'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('provider_validators')
@@ -0,0 +1,87 @@
+"""
+Write-behind buffer for API-key ``last_used_at`` stamps.
+
+Every ``drk_`` request used to set ``last_used_at`` and commit, turning each
+read from the MCP servers and crons into a write transaction. Stamps are now
+buffered per key hash (latest wins) and written in one bulk UPDATE at most
+once per ``API_KEY_USAGE_FLUSH_SECONDS``, plus once more at shutdown.
+
+The flush piggybacks on an authenticating request rather than a background
+thread: Cloud Run throttles CPU between requests, so a timer thread would
+stall exactly when it is due. A stamp is a "recently used" hint, so losing
+at most one period of them to a hard crash is an acceptable trade.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import case, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.db.models import DbApiKey
+from app.log.logging_config import logger
+
+_lock = threading.Lock()
+_pending: dict = {}
+_last_flush = time.monotonic()
+
+
+def record(key_hash: str, used_at: datetime) -> None:
+    """Buffer a use of the key; only the newest stamp per key is kept."""
+    with _lock:
+        _pending[key_hash] = used_at
+
+
+def flush_due() -> bool:
+    """True when there is buffered usage and the flush period has elapsed."""
+    period = get_settings().api_key_usage_flush_seconds
+    with _lock:
+        return bool(_pending) and time.monotonic() - _last_flush >= period
+
+
+def flush(db: Session) -> int:
+    """
+    Write all buffered stamps in a single UPDATE and commit. Returns the
+    number of keys flushed. On failure the stamps go back in the buffer
+    (newer ones recorded meanwhile win) so the next flush retries them.
+    """
+    global _last_flush  # pylint: disable=global-statement
+    with _lock:
+        batch = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    if not batch:
+        return 0
+    try:
+        db.execute(
+            update(DbApiKey)
+            .where(DbApiKey.key_hash.in_(list(batch)))
+            .values(last_used_at=case(batch, value=DbApiKey.key_hash))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    except SQLAlchemyError as exc:
+        db.rollback()
+        logger.warning('API key usage flush failed: %s', exc)
+        with _lock:
+            for key_hash, used_at in batch.items():
+                _pending.setdefault(key_hash, used_at)
+        return 0
+    return len(batch)
+
+
+def pending() -> int:
+    """Number of keys with an unflushed stamp."""
+    with _lock:
+        return len(_pending)
+
+
+def reset() -> None:
+    """Drop buffered stamps without writing them (tests only)."""
+    global _last_flush  # pylint: disable=global-statement
+    with _lock:
+        _pending.clear()
+        _last_flush = time.monotonic()
@@ -18,6 +18,7 @@ from app.config import get_settings
 from app.db import models
 from app.db.database import get_db
 from app.db.hash import Hash
+from app.services import provider_http
 
 router = APIRouter(tags=['authentication'])
 
@@ -95,7 +96,8 @@ def google_login(request: GoogleAuthRequest, db: Session = Depends(get_db)):
     try:
         info = google_id_token.verify_oauth2_token(
             request.credential,
-            google_requests.Request(),
+            # Reuses the pooled session for Google's cert fetch.
+            google_requests.Request(session=provider_http.session()),
             settings.google_client_id,
         )
     except ValueError as exc:
@@ -10,8 +10,10 @@ from typing import Optional
 import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.auth import api_key_usage, principal_cache
 from app.config import get_settings
 from app.db import db_user
 from app.db.database import get_db
@@ -69,18 +71,34 @@ def _user_from_api_key(token: str, db: Session, credentials_exception):
     Resolve a ``drk_`` bearer token to its owner, or raise.
 
     Returns the same one-element-list shape as the JWT path so routes can't
-    tell the difference.
+    tell the difference. A cached principal skips the user lookup but not a
+    keyed existence check, so a key revoked on another instance stops
+    working at once. The ``last_used_at`` stamp is buffered (see
+    api_key_usage) instead of committed per request.
     """
     # Local import: models imports nothing from here, but keeping it out of
     # module scope avoids widening the auth module's import surface.
     from app.db.models import DbApiKey  # pylint: disable=import-outside-toplevel
 
-    row = db.query(DbApiKey).filter(DbApiKey.key_hash == hash_api_key(token)).first()
-    if row is None:
-        raise credentials_exception
-    row.last_used_at = datetime.now(timezone.utc)
-    db.commit()
-    return [row.user]
+    key_hash = hash_api_key(token)
+    cache_key = principal_cache.api_key_key(key_hash)
+    snapshot = principal_cache.lookup(cache_key)
+    if snapshot is not None:
+        if db.scalar(select(DbApiKey.pk).where(DbApiKey.key_hash == key_hash)) is None:
+            # Revoked on another instance since we cached it.
+            principal_cache.invalidate(cache_key)
+            raise credentials_exception
+        user = principal_cache.attach(db, snapshot)
+    else:
+        row = db.query(DbApiKey).filter(DbApiKey.key_hash == key_hash).first()
+        if row is None:
+            raise credentials_exception
+        user = row.user
+        principal_cache.store(cache_key, user)
+    api_key_usage.record(key_hash, datetime.now(timezone.utc))
+    if api_key_usage.flush_due():
+        api_key_usage.flush(db)
+    return [user]
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -119,9 +137,14 @@ def get_current_user(
         raise credentials_exception from exc
     except jwt.InvalidTokenError as exc:
         raise credentials_exception from exc
+    cache_key = principal_cache.jwt_key(uuid)
+    snapshot = principal_cache.lookup(cache_key)
+    if snapshot is not None:
+        return [principal_cache.attach(db, snapshot)]
     user = db_user.get_user(db, uuid)
     if user is None:
         raise credentials_exception
+    principal_cache.store(cache_key, user[0])
     return user
 
 
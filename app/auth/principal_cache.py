@@ -0,0 +1,128 @@
+"""
+Per-process cache of authenticated principals.
+
+``get_current_user`` used to load the caller's ``users`` row on every request,
+so a page render fanning out 6-8 API calls paid 6-8 identical lookups. The
+cache remembers the resolved user for a short TTL, keyed on the JWT ``sub``
+(``jwt:<uuid>``) or the API-key hash (``key:<sha256>``).
+
+What is cached is a *snapshot* of the row's column values, never the ORM
+instance itself: instances belong to the session that loaded them, and routes
+mutate ``current_user[0]`` and commit through their own session (visibility
+settings). ``attach`` rebuilds the instance and merges it into the request's
+session without a SELECT.
+
+Like the rate limits, the cache is per-instance. Writes that change what a
+principal resolves to (profile updates, deletion, visibility, key revocation)
+invalidate explicitly; other workers converge within the TTL.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.config import get_settings
+from app.db.models import DbUser
+
+_lock = threading.Lock()
+# key -> (expires_at, snapshot); insertion order doubles as LRU order.
+_entries: 'OrderedDict[str, tuple]' = OrderedDict()
+_counters = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+
+def jwt_key(subject: str) -> str:
+    """Cache key for a JWT principal (the token's ``sub``)."""
+    return f'jwt:{subject}'
+
+
+def api_key_key(key_hash: str) -> str:
+    """Cache key for an API-key principal (the stored SHA-256)."""
+    return f'key:{key_hash}'
+
+
+def _enabled() -> bool:
+    settings = get_settings()
+    return (
+        settings.principal_cache_ttl_seconds > 0 and settings.principal_cache_size > 0
+    )
+
+
+def _snapshot(user: DbUser) -> dict:
+    return {attr.key: getattr(user, attr.key) for attr in inspect(DbUser).column_attrs}
+
+
+def lookup(key: str) -> Optional[dict]:
+    """Return the cached snapshot for ``key``, or None on a miss/expiry."""
+    if not _enabled():
+        return None
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None or entry[0] <= now:
+            if entry is not None:
+                del _entries[key]
+            _counters['misses'] += 1
+            return None
+        _entries.move_to_end(key)
+        _counters['hits'] += 1
+        return entry[1]
+
+
+def store(key: str, user: DbUser) -> None:
+    """Remember ``user`` under ``key``, evicting the least recently used."""
+    if not _enabled():
+        return
+    settings = get_settings()
+    expires_at = time.monotonic() + settings.principal_cache_ttl_seconds
+    snapshot = _snapshot(user)
+    with _lock:
+        _entries[key] = (expires_at, snapshot)
+        _entries.move_to_end(key)
+        while len(_entries) > settings.principal_cache_size:
+            _entries.popitem(last=False)
+
+
+def attach(db: Session, snapshot: dict) -> DbUser:
+    """
+    Rebuild a cached user as a persistent instance of ``db``.
+
+    ``merge(load=False)`` trusts the snapshot instead of re-reading the row,
+    which is the whole point; the result behaves like a freshly queried user.
+    """
+    user = DbUser(**snapshot)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def invalidate(key: str) -> None:
+    """Drop one principal (e.g. a revoked API key)."""
+    with _lock:
+        if _entries.pop(key, None) is not None:
+            _counters['invalidations'] += 1
+
+
+def invalidate_user(user_id: str) -> None:
+    """Drop every principal resolving to ``user_id`` (JWT and API keys alike)."""
+    with _lock:
+        stale = [key for key, (_, snap) in _entries.items() if snap['id'] == user_id]
+        for key in stale:
+            del _entries[key]
+        _counters['invalidations'] += len(stale)
+
+
+def stats() -> dict:
+    """Hit/miss counters since start (or the last reset) plus current size."""
+    with _lock:
+        return {**_counters, 'size': len(_entries)}
+
+
+def reset() -> None:
+    """Clear all entries and counters (tests only)."""
+    with _lock:
+        _entries.clear()
+        for name in _counters:
+            _counters[name] = 0
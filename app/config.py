@@ -44,6 +44,14 @@ class Settings(BaseSettings):
     jwt_secret_key: Optional[str] = None
     access_token_expire_minutes: int = 30
     google_client_id: Optional[str] = None
+    # Resolved principals are cached per process (app/auth/principal_cache.py)
+    # so a page's fan-out of API calls doesn't repeat the user lookup. The TTL
+    # bounds staleness across workers; 0 disables the cache.
+    principal_cache_ttl_seconds: int = 60
+    principal_cache_size: int = 1024
+    # API-key last_used_at stamps are buffered and written in one UPDATE per
+    # period (app/auth/api_key_usage.py); 0 writes them on every request.
+    api_key_usage_flush_seconds: int = 60
 
     # --- Abuse resistance (#148, threat model H1/H2) ---
     # Kill switch for /v1/auth/token: prod is Google + API keys only.
@@ -53,6 +61,28 @@ class Settings(BaseSettings):
     rate_limit_auth: int = 10  # sign-in attempts per IP per 5 minutes
     rate_limit_search: int = 60  # search-proxy calls per user per minute
     catalog_add_daily_cap: int = 200  # catalog creations per user per day
+    # 'memory' (per instance) or 'sql' (rate_limits table, shared by all
+    # workers and instances).
+    rate_limit_backend: str = 'memory'
+
+    # --- Ranking writes (If-Match / Idempotency-Key) ---
+    # How long a completed Idempotency-Key keeps answering retries.
+    idempotency_ttl_hours: int = 24
+
+    # --- Home summary cache (app/services/summary.py) ---
+    # Per-user summaries are cached per process and dropped on tracker writes;
+    # the TTL bounds staleness from catalog edits and other workers. 0
+    # disables the cache.
+    summary_cache_ttl_seconds: int = 300
+    summary_cache_size: int = 1024
+
+    # --- Public profiles (app/services/public_profiles.py) ---
+    # Rendered profiles are cached per handle (0 TTL disables); clients and
+    # the CDN may reuse one for max-age and serve it stale while revalidating.
+    public_profile_cache_ttl_seconds: int = 300
+    public_profile_cache_size: int = 1024
+    public_profile_max_age_seconds: int = 60
+    public_profile_stale_seconds: int = 600
 
     # --- Invite-only access (#183) ---
     # Kill switch for POST /v1/users: closes open password self-registration.
@@ -72,6 +102,22 @@ class Settings(BaseSettings):
     # --- CORS (comma-separated origins) ---
     cors_origins: str = 'http://localhost:3000'
 
+    # --- External providers: shared pooled HTTP client (provider_http) ---
+    provider_timeout_seconds: float = 10
+    provider_retries: int = 2  # extra attempts on connect errors / 502-504
+    provider_pool_maxsize: int = 10  # keep-alive connections per upstream host
+    # Response cache (provider_cache). None = on in dev/prod, off in local/CI.
+    provider_cache_enabled: Optional[bool] = None
+    provider_cache_backend: str = 'memory'  # or 'sqlite' (survives restarts)
+    provider_cache_path: str = './provider-cache.sqlite3'
+    provider_cache_size: int = 5000
+    # /v1/search fan-out: per-provider latency budget and worker pool size.
+    search_provider_deadline_seconds: float = 4
+    search_workers: int = 4
+    # Typeahead index (local_search): full reload period, picks up catalog
+    # writes made by other workers and the jobs.
+    local_search_rebuild_seconds: int = 600
+
     # --- External APIs (movies search proxy) ---
     omdb_api_key: Optional[str] = None
     tmdb_api_key: Optional[str] = None
@@ -9,10 +9,12 @@ from fastapi import HTTPException, status
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.auth import principal_cache
 from app.db.hash import Hash
 from app.db.models import DbUser
 from app.log.logging_config import logger
 from app.schemas.model_schemas import InUserBase
+from app.services import public_profiles
 
 
 def create_user(db: Session, request: InUserBase) -> list[DbUser]:
@@ -198,6 +200,8 @@ def update_user(db: Session, user_id: str, request: InUserBase) -> list[DbUser]:
     user.password = Hash.hash_password(request.password)
     db.commit()
     db.refresh(user)
+    principal_cache.invalidate_user(user.id)
+    public_profiles.invalidate(user.pk)
     logger.info(
         'User updated: %s, display_name: %s, email: %s',
         user.id,
@@ -229,6 +233,8 @@ def delete_user(db: Session, user_id: str) -> list[DbUser]:
 
     db.delete(user)
     db.commit()
+    principal_cache.invalidate_user(user.id)
+    public_profiles.invalidate(user.pk)
     logger.info(
         'User deleted: %s, display_name: %s, email: %s',
         user.id,
@@ -5,7 +5,17 @@ This module defines the database models.
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
 from sqlalchemy.orm import relationship
 
 from app.db.database import Base
@@ -69,6 +79,136 @@ class DbApiKey(DBBaseModel):
     user = relationship('DbUser', backref='api_keys')
 
 
+class DbRateLimit(Base):
+    """
+    Shared rate-limit state (``RATE_LIMIT_BACKEND=sql``): one row per limited
+    key holding its GCRA theoretical arrival time (epoch seconds). Keyed on
+    the limit key itself and kept free of the usual pk/id/timestamps, since
+    every limited request updates it.
+    """
+
+    __tablename__ = 'rate_limits'
+    key = Column(String(length=128), primary_key=True)
+    tat = Column(Float, nullable=False)
+
+
+class DbRankingVersion(Base):
+    """
+    Per-user ranking version, served as the ``ETag`` of the ranking endpoints
+    and checked against ``If-Match``: every ranking write bumps it, so a save
+    made from a stale view fails with 412. Kept off ``users`` because the
+    principal cache snapshots that row.
+    """
+
+    __tablename__ = 'ranking_versions'
+    user_id = Column(Integer, ForeignKey('users.pk'), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class DbIdempotencyKey(Base):
+    """
+    One ``Idempotency-Key`` seen on a ranking write, with the response it
+    produced so a retry can be answered without running the write again.
+    ``status_code`` is NULL while the first request is still in flight.
+    """
+
+    __tablename__ = 'idempotency_keys'
+    # '<user pk>:<Idempotency-Key>' — keys are only unique per user.
+    key = Column(String(length=300), primary_key=True)
+    # SHA-256 of method, path and body: a reused key must mean the same request.
+    fingerprint = Column(String(length=64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    body = Column(Text, nullable=True)
+    etag = Column(String(length=40), nullable=True)
+    created_at = Column(Float, nullable=False)  # epoch seconds
+
+
+class DbTrackerChange(Base):
+    """
+    Change log behind tracker delta sync (``app/services/tracker_changes``):
+    the latest write to each tracker, stamped with an increasing ``seq``.
+    A tracker keeps one row — rewriting it moves the row to a new ``seq`` —
+    and a deleted tracker's row stays behind as its tombstone.
+    """
+
+    __tablename__ = 'tracker_changes'
+    __table_args__ = (
+        Index('ix_tracker_changes_user_id_domain_seq', 'user_id', 'domain', 'seq'),
+        # seq must never be reused (rows are deleted and re-inserted), which
+        # SQLite only guarantees with AUTOINCREMENT.
+        {'sqlite_autoincrement': True},
+    )
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    # No FK: the log must never block deleting a user.
+    user_id = Column(Integer, nullable=False)
+    # Tracker list slug ('movies', 'tv', 'books', 'games', 'countries').
+    domain = Column(String(length=16), nullable=False)
+    tracker_id = Column(String(length=36), nullable=False, unique=True)
+    deleted = Column(Boolean, nullable=False, default=False)
+    changed_at = Column(DateTime, nullable=False)
+
+
+class DbTVProgress(Base):
+    """
+    Materialized watch progress per (user, tracked show) behind the TV
+    list's watch status (``app/services/tv_progress``): aired and watched
+    episode counts, kept current on episode and watch writes, and when the
+    show's next known episode airs — past that moment the counts are stale.
+    """
+
+    __tablename__ = 'tv_progress'
+    # No FKs: derived state must never block deleting a user or a show.
+    user_id = Column(Integer, primary_key=True)
+    tv_show_id = Column(Integer, primary_key=True)
+    aired_count = Column(Integer, nullable=False, default=0)
+    # Watched episodes among the aired ones.
+    watched_count = Column(Integer, nullable=False, default=0)
+    next_airdate = Column(DateTime, nullable=True)
+
+
+class DbScheduleEntry(Base):
+    """
+    Precomputed Schedule page (``app/services/tv_schedule``): one row per
+    unwatched, dated episode of each show a user actively follows (listed,
+    not frozen), carrying what the page shows so reads need no joins.
+    """
+
+    __tablename__ = 'schedule_entries'
+    __table_args__ = (
+        Index('ix_schedule_entries_user_id_airdate', 'user_id', 'airdate'),
+        Index(
+            'ix_schedule_entries_user_id_show_title', 'user_id', 'show_title', 'season'
+        ),
+    )
+    # No FKs, as for tv_progress.
+    user_id = Column(Integer, primary_key=True)
+    episode_pk = Column(Integer, primary_key=True)
+    tv_show_id = Column(Integer, nullable=False)
+    show_id = Column(String, nullable=False)
+    show_title = Column(String(254), nullable=False)
+    episode_id = Column(String, nullable=False)
+    episode_title = Column(String(254), nullable=False)
+    season = Column(Integer, nullable=True)
+    season_number = Column(Integer, nullable=True)
+    airdate = Column(DateTime, nullable=False)
+
+
+class DbProviderValidator(Base):
+    """
+    What the catalog last applied from a provider endpoint, per ``(source,
+    key)`` (``('tvmaze.show', '82')``; ``app/services/provider_validators``):
+    the response's ETag / Last-Modified for conditional requests and a hash
+    of the mapped result. Written in the transaction that applied it.
+    """
+
+    __tablename__ = 'provider_validators'
+    source = Column(String(length=64), primary_key=True)
+    key = Column(String(length=128), primary_key=True)
+    etag = Column(String(length=512), nullable=True)
+    last_modified = Column(String(length=64), nullable=True)
+    payload_hash = Column(String(length=64), nullable=True)
+
+
 # Import sandbox models to ensure they are registered with the Base metadata
 # pylint: disable=cyclic-import, wrong-import-position, unused-import
 from app.db import models_sandbox  # noqa: F401
@@ -14,12 +14,64 @@ from sqlalchemy import (
     ForeignKey,
     Text,
     Boolean,
+    func,
+    or_,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import object_session, relationship
 
 from app.db.models import DBBaseModel
 
 
+class RankedTracker:
+    """
+    Rank storage shared by the five per-user tracker tables.
+
+    ``rank_key`` is a sparse sort key (see ``app.services.rankings``): moving
+    one entry rewrites only that entry's key. ``rank`` is the dense 1-based
+    position the API has always exposed, derived from the keys on read.
+    List endpoints fill it in bulk (``rankings.attach_positions``); a single
+    tracker falls back to one COUNT.
+    """
+
+    # user_id, pk and on_rankings live on the concrete tracker models.
+    # pylint: disable=no-member
+
+    rank_key = Column(Integer, nullable=True)
+
+    @property
+    def rank(self):
+        """1-based position among the user's ranked entries (None if unplaced)."""
+        if self.rank_key is None or not self.on_rankings:
+            return None
+        cached = self.__dict__.get('_rank_position')
+        if cached is not None and cached[0] == self.rank_key:
+            return cached[1]
+        session = object_session(self)
+        if session is None:
+            return None
+        model = type(self)
+        position = (
+            session.query(func.count())  # pylint: disable=not-callable
+            .select_from(model)
+            .filter(
+                model.user_id == self.user_id,
+                model.on_rankings.is_(True),
+                model.rank_key.isnot(None),
+                or_(
+                    model.rank_key < self.rank_key,
+                    (model.rank_key == self.rank_key) & (model.pk <= self.pk),
+                ),
+            )
+            .scalar()
+        )
+        self.remember_rank(position)
+        return position
+
+    def remember_rank(self, position) -> None:
+        """Cache the derived position for the current ``rank_key``."""
+        self.__dict__['_rank_position'] = (self.rank_key, position)
+
+
 class DbNotification(DBBaseModel):
     __tablename__ = 'notifications'
 
@@ -57,7 +109,7 @@ class DbCountry(DBBaseModel):
     user_countries = relationship('DbUserCountry', back_populates='country')
 
 
-class DbUserCountry(DBBaseModel):
+class DbUserCountry(RankedTracker, DBBaseModel):
     __tablename__ = 'user_countries'
 
     country_id = Column(Integer, ForeignKey('countries.pk'), nullable=False)
@@ -68,7 +120,6 @@ class DbUserCountry(DBBaseModel):
     # `completed` is retained from the legacy import but no longer drives the UI.
     on_watchlist = Column(Boolean, nullable=False, default=False)
     on_rankings = Column(Boolean, nullable=False, default=False)
-    rank = Column(Integer, nullable=True)
     # When the current rank was assigned — drives Activity, so notes edits
     # and other tracker updates never re-date a ranking (#141).
     ranked_at = Column(DateTime, nullable=True)
@@ -101,7 +152,7 @@ class DbMovie(DBBaseModel):
     user_movies = relationship('DbUserMovie', back_populates='movie')
 
 
-class DbUserMovie(DBBaseModel):
+class DbUserMovie(RankedTracker, DBBaseModel):
     __tablename__ = 'user_movies'
 
     movie_id = Column(Integer, ForeignKey('movies.pk'), nullable=False)
@@ -112,7 +163,6 @@ class DbUserMovie(DBBaseModel):
     # legacy import but no longer drives the UI.
     on_watchlist = Column(Boolean, nullable=False, default=False)
     on_rankings = Column(Boolean, nullable=False, default=False)
-    rank = Column(Integer, nullable=True)
     # When the current rank was assigned — drives Activity, so notes edits
     # and other tracker updates never re-date a ranking (#141).
     ranked_at = Column(DateTime, nullable=True)
@@ -143,12 +193,15 @@ class DbTVShow(DBBaseModel):
     language = Column(String(40), nullable=True)
     rating = Column(Float, nullable=True)
     summary = Column(Text, nullable=True)
+    # TVMaze's ``updated`` epoch as of our last refresh; refresh_tv skips the
+    # show while /updates/shows still reports it.
+    tvmaze_updated = Column(Integer, nullable=True)
 
     user_tv_shows = relationship('DbUserTVShow', back_populates='tv_show')
     episodes = relationship('DbTVEpisode', back_populates='tv_show')
 
 
-class DbUserTVShow(DBBaseModel):
+class DbUserTVShow(RankedTracker, DBBaseModel):
     __tablename__ = 'user_tv_shows'
 
     tv_show_id = Column(Integer, ForeignKey('tv_shows.pk'), nullable=False)
@@ -158,7 +211,6 @@ class DbUserTVShow(DBBaseModel):
     # `freeze` are retained from the legacy import but no longer drive the UI.
     on_watchlist = Column(Boolean, nullable=False, default=False)
     on_rankings = Column(Boolean, nullable=False, default=False)
-    rank = Column(Integer, nullable=True)
     # When the current rank was assigned — drives Activity, so notes edits
     # and other tracker updates never re-date a ranking (#141).
     ranked_at = Column(DateTime, nullable=True)
@@ -223,7 +275,7 @@ class DbVideoGame(DBBaseModel):
     user_games = relationship('DbUserVideoGame', back_populates='game')
 
 
-class DbUserVideoGame(DBBaseModel):
+class DbUserVideoGame(RankedTracker, DBBaseModel):
     __tablename__ = 'user_video_games'
 
     game_id = Column(Integer, ForeignKey('video_games.pk'), nullable=False)
@@ -234,7 +286,6 @@ class DbUserVideoGame(DBBaseModel):
     # from the legacy import but no longer drives the UI.
     on_watchlist = Column(Boolean, nullable=False, default=False)
     on_rankings = Column(Boolean, nullable=False, default=False)
-    rank = Column(Integer, nullable=True)
     # When the current rank was assigned — drives Activity, so notes edits
     # and other tracker updates never re-date a ranking (#141).
     ranked_at = Column(DateTime, nullable=True)
@@ -268,7 +319,7 @@ class DbBook(DBBaseModel):
     user_books = relationship('DbUserBook', back_populates='book')
 
 
-class DbUserBook(DBBaseModel):
+class DbUserBook(RankedTracker, DBBaseModel):
     __tablename__ = 'user_books'
 
     book_id = Column(Integer, ForeignKey('books.pk'), nullable=False)
@@ -279,7 +330,6 @@ class DbUserBook(DBBaseModel):
     # retained from the legacy import but no longer drives the UI.
     on_watchlist = Column(Boolean, nullable=False, default=False)
     on_rankings = Column(Boolean, nullable=False, default=False)
-    rank = Column(Integer, nullable=True)
     # When the current rank was assigned — drives Activity, so notes edits
     # and other tracker updates never re-date a ranking (#141).
     ranked_at = Column(DateTime, nullable=True)
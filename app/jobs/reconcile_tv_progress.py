@@ -0,0 +1,87 @@
+"""
+Reconcile the materialized TV watch progress (``tv_progress``).
+
+Writes keep the rows current (see ``app.services.tv_progress``), but an
+episode airing is not a write: a row whose next known airdate has passed is
+stale, and the TV list recounts it live on every read until this job stores
+fresh counts. The job also creates rows for tracked shows that have none
+(trackers written before the table existed, bulk imports) and drops rows for
+shows no longer tracked, and prunes their schedule entries
+(``app.services.tv_schedule``).
+
+Usage::
+
+    DATABASE_URL=... ENV=prod python -m app.jobs.reconcile_tv_progress [--full]
+
+``--full`` recounts every tracked show and rebuilds its schedule entries,
+repairing any drift from writes that bypassed the ORM. Idempotent; run it
+on a schedule (hourly is plenty — episodes air at most a few times a day per
+show) and once after deploying the table.
+"""
+
+import argparse
+
+from app.db.database import SessionLocal
+from app.log.logging_config import logger
+from app.services import tv_progress, tv_schedule
+
+# Pairs recounted per transaction, so a large pass commits as it goes.
+BATCH_SIZE = 500
+
+
+def reconcile(db, full: bool = False) -> dict:
+    """
+    Refresh stale/missing rows (all rows and schedules with ``full``) and
+    drop orphans.
+    """
+    pairs = sorted(tv_progress.stale_pairs(db, full))
+    orphans = tv_progress.orphan_pairs(db)
+    unscheduled = tv_schedule.orphan_pairs(db)
+    for start in range(0, len(pairs), BATCH_SIZE):
+        batch = set(pairs[start : start + BATCH_SIZE])
+        tv_progress.refresh(db.connection(), batch)
+        if full:
+            tv_schedule.rebuild(db.connection(), batch)
+        db.commit()
+    tv_progress.drop(db.connection(), orphans)
+    # Untracked, so the rebuild only deletes.
+    tv_schedule.rebuild(db.connection(), unscheduled)
+    db.commit()
+    return {'refreshed': len(pairs), 'dropped': len(orphans | unscheduled)}
+
+
+def run(full: bool = False) -> dict:
+    """Reconcile with a fresh session. Returns a small report dict."""
+    db = SessionLocal()
+    try:
+        report = reconcile(db, full)
+    finally:
+        db.close()
+    logger.info(
+        'reconcile_tv_progress: refreshed=%(refreshed)d dropped=%(dropped)d', report
+    )
+    return report
+
+
+def main() -> None:
+    """CLI entrypoint."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--full',
+        action='store_true',
+        help=(
+            'Recount and reschedule every tracked show '
+            '(default: only stale or missing rows).'
+        ),
+    )
+    args = parser.parse_args()
+    report = run(full=args.full)
+    print(
+        'reconcile_tv_progress: refreshed={refreshed} dropped={dropped}'.format(
+            **report
+        )
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -11,14 +11,26 @@ Usage::
 
     DATABASE_URL=... ENV=prod python -m app.jobs.refresh_tv [--all] [--limit N]
 
+Only shows that moved upstream are fetched. TVMaze's ``/updates/shows`` maps
+every show to the epoch of its last change (new episodes included); each
+show keeps the value it was last refreshed at (``tv_shows.tvmaze_updated``)
+and is skipped while the feed still reports it. The rest are fetched by a
+small worker pool sharing one token bucket sized to TVMaze's limit, and
+written on the main thread as results land. Fetches are conditional
+(``provider_validators``): a show whose detail or episodes come back
+unchanged is not rewritten. Without the feed (TVMaze down)
+every selected show is refreshed, as before.
+
 Idempotent: ``sync_episodes`` upserts on the TVMaze episode id, so re-running
 only ever adds new episodes and refreshes existing titles/airdates.
 """
 
 import argparse
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
 
-from sqlalchemy import or_
+from sqlalchemy import or_, update
 
 from app.db.database import SessionLocal
 from app.db.models_sandbox import (
@@ -26,15 +38,21 @@ from app.db.models_sandbox import (
     DbUserTVShow,
 )
 from app.log.logging_config import logger
+from app.services import provider_validators, rate_limit
 from app.services.tv_search import (
     apply_detail_to_show,
+    get_show_episodes,
+    get_show_updates,
     get_tv_show_detail,
     sync_episodes,
 )
 
-# TVMaze allows ~20 requests / 10s; each show costs two calls (detail +
-# episodes), so 1.5s between shows keeps a full pass well inside the limit.
-THROTTLE_SECONDS = 1.5
+# Concurrent fetches; the token bucket, not the pool, sets the pace.
+WORKERS = 4
+# TVMaze allows ~20 requests / 10s per IP. The bucket refills a token every
+# REQUEST_INTERVAL seconds and holds BURST, so no 10s window exceeds 20.
+REQUEST_INTERVAL = 10 / 18
+BURST = 2
 # Consecutive detail misses almost always mean we are being rate limited
 # rather than that every remaining show vanished — stop and try again later.
 STOP_AFTER_CONSECUTIVE_MISSES = 15
@@ -42,6 +60,18 @@ STOP_AFTER_CONSECUTIVE_MISSES = 15
 # refreshing on an explicit --all pass.
 ACTIVE_STATUSES = ('Running', 'To Be Determined', 'In Development')
 
+# GCRA (see rate_limit) shared by every worker thread.
+_bucket = rate_limit.MemoryBackend(shards=1)
+
+
+def _take_token() -> None:
+    """Block until the TVMaze budget allows one more request."""
+    while True:
+        wait = _bucket.acquire('tvmaze', REQUEST_INTERVAL, REQUEST_INTERVAL * BURST)
+        if not wait:
+            return
+        time.sleep(wait)
+
 
 def _shows_to_refresh(db, include_ended: bool):
     """
@@ -65,23 +95,72 @@ def _shows_to_refresh(db, include_ended: bool):
     return query.distinct().all()
 
 
-def run(include_ended: bool = False, limit: int = 0) -> dict:
-    """Refresh tracked shows. Returns a small report dict."""
-    db = SessionLocal()
-    report = {'shows': 0, 'episodes_created': 0, 'detail_updated': 0, 'misses': 0}
-    try:
-        shows = _shows_to_refresh(db, include_ended)
-        if limit:
-            shows = shows[:limit]
-        logger.info('refresh_tv: %d shows to refresh', len(shows))
+def _moved(shows: List, updates: Optional[Dict[int, int]]) -> List:
+    """
+    The shows TVMaze changed since their watermark (all of them without a
+    feed). A show missing from the feed, or never refreshed, counts as moved.
+    """
+    if updates is None:
+        return shows
+    moved = []
+    for show in shows:
+        updated = updates.get(show.tvmaze)
+        if show.tvmaze_updated is None or updated is None:
+            moved.append(show)
+        elif updated > show.tvmaze_updated:
+            moved.append(show)
+    return moved
+
+
+def _fetch(tvmaze_id: int, known: dict):
+    """
+    Detail and episode list for one show (runs on a worker thread), fetched
+    conditionally: either may come back ``UNCHANGED``. Also returns the new
+    validators to store with the result.
+    """
+    _take_token()
+    detail, pending = provider_validators.fetch(known, get_tv_show_detail, tvmaze_id)
+    _take_token()
+    episodes, more = provider_validators.fetch(known, get_show_episodes, tvmaze_id)
+    return detail, episodes, {**pending, **more}
+
+
+def _mark_refreshed(db, show, updated: Optional[int]) -> None:
+    """Store the watermark. Bookkeeping, not a catalog change: keep updated_at."""
+    db.execute(
+        update(DbTVShow)
+        .where(DbTVShow.pk == show.pk)
+        .values(tvmaze_updated=updated, updated_at=DbTVShow.updated_at)
+    )
 
+
+def _validator_keys(shows: List):
+    for show in shows:
+        yield ('tvmaze.show', str(show.tvmaze))
+        yield ('tvmaze.episodes', str(show.tvmaze))
+
+
+def _refresh(db, shows: List, updates: Optional[Dict[int, int]], report: dict):
+    """Fetch ``shows`` concurrently; apply each result as it completes."""
+    known = provider_validators.load(db, _validator_keys(shows))
+    executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='refresh-tv')
+    try:
+        futures = {executor.submit(_fetch, show.tvmaze, known): show for show in shows}
         consecutive_misses = 0
-        for show in shows:
-            detail = get_tv_show_detail(show.tvmaze)
+        for future in as_completed(futures):
+            show = futures[future]
+            detail, episodes, pending = future.result()
             if detail:
+                # A no-op when UNCHANGED: the row and its updated_at stay put.
                 apply_detail_to_show(show, detail)
-                report['detail_updated'] += 1
+                if detail is provider_validators.UNCHANGED:
+                    report['not_modified'] += 1
+                else:
+                    report['detail_updated'] += 1
                 consecutive_misses = 0
+                # An empty list may be a failed fetch: keep the show due.
+                if episodes and updates is not None:
+                    _mark_refreshed(db, show, updates.get(show.tvmaze))
             else:
                 report['misses'] += 1
                 consecutive_misses += 1
@@ -93,18 +172,49 @@ def run(include_ended: bool = False, limit: int = 0) -> dict:
                     )
                     break
 
-            created = sync_episodes(db, show)
-            report['episodes_created'] += created
+            report['episodes_created'] += sync_episodes(db, show, episodes)
             report['shows'] += 1
+            if detail:
+                provider_validators.store(db, pending)
             # Commit per show so an early stop still keeps completed work.
             db.commit()
-            time.sleep(THROTTLE_SECONDS)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def run(include_ended: bool = False, limit: int = 0) -> dict:
+    """Refresh tracked shows that moved upstream. Returns a small report dict."""
+    db = SessionLocal()
+    report = {
+        'shows': 0,
+        'unchanged': 0,
+        'episodes_created': 0,
+        'detail_updated': 0,
+        'not_modified': 0,
+        'misses': 0,
+    }
+    try:
+        _take_token()
+        updates = get_show_updates()
+        candidates = _shows_to_refresh(db, include_ended)
+        shows = _moved(candidates, updates)
+        report['unchanged'] = len(candidates) - len(shows)
+        if limit:
+            shows = shows[:limit]
+        logger.info(
+            'refresh_tv: %d shows to refresh (%d unchanged upstream)',
+            len(shows),
+            report['unchanged'],
+        )
+        _refresh(db, shows, updates, report)
     finally:
         db.close()
 
     logger.info(
-        'refresh_tv: shows=%(shows)d episodes_created=%(episodes_created)d '
-        'detail_updated=%(detail_updated)d misses=%(misses)d',
+        'refresh_tv: shows=%(shows)d unchanged=%(unchanged)d '
+        'episodes_created=%(episodes_created)d '
+        'detail_updated=%(detail_updated)d not_modified=%(not_modified)d '
+        'misses=%(misses)d',
         report,
     )
     return report
@@ -128,8 +238,10 @@ def main() -> None:
     args = parser.parse_args()
     report = run(include_ended=args.include_ended, limit=args.limit)
     print(
-        'refresh_tv: shows={shows} episodes_created={episodes_created} '
-        'detail_updated={detail_updated} misses={misses}'.format(**report)
+        'refresh_tv: shows={shows} unchanged={unchanged} '
+        'episodes_created={episodes_created} '
+        'detail_updated={detail_updated} not_modified={not_modified} '
+        'misses={misses}'.format(**report)
     )
 
 
@@ -16,6 +16,11 @@ clean — if they aren't, this catches them too.
 Idempotent: a shelf is only shifted when its minimum rank is 0, which stops
 being true after the first run. Safe to re-run.
 
+Since ranks became sparse sort keys (``rank_key``, see
+``app.services.rankings``) the API derives 1-based positions on read, so a
+0-based shelf no longer shows as "0"; the script now only tidies keys left
+over from that import.
+
 Usage::
 
     DATABASE_URL=postgresql://... ENV=prod \\
@@ -48,7 +53,7 @@ def _ranked_filter(tracker, user_pk):
     return (
         tracker.user_id == user_pk,
         tracker.on_rankings.is_(True),
-        tracker.rank.isnot(None),
+        tracker.rank_key.isnot(None),
     )
 
 
@@ -56,7 +61,7 @@ def shelf_stats(db, shelf, user_pk):
     """``(lowest_rank, ranked_row_count)`` for one user's shelf."""
     return (
         db.query(
-            func.min(shelf.tracker_model.rank),
+            func.min(shelf.tracker_model.rank_key),
             func.count(),  # pylint: disable=not-callable
         )
         .select_from(shelf.tracker_model)
@@ -80,7 +85,7 @@ def _shift_shelf(db, shelf, user) -> int:
     return (
         db.query(tracker)
         .filter(*_ranked_filter(tracker, user.pk))
-        .update({tracker.rank: tracker.rank + 1}, synchronize_session=False)
+        .update({tracker.rank_key: tracker.rank_key + 1}, synchronize_session=False)
     )
 
 
@@ -48,6 +48,7 @@ from app.db.models_sandbox import (
     DbVideoGame,
 )
 from app.log.logging_config import logger
+from app.services.rankings import GAP
 
 
 @dataclass
@@ -93,6 +94,11 @@ def _source_url() -> str:
     return url
 
 
+def _rank_key(rank: Optional[int]) -> Optional[int]:
+    """Legacy 1-based rank -> sparse sort key (see app.services.rankings)."""
+    return None if rank is None else rank * GAP
+
+
 def _clean(value: Optional[str], limit: Optional[int] = None) -> Optional[str]:
     """Trim whitespace and optionally truncate to fit the target column."""
     if value is None:
@@ -258,7 +264,7 @@ def run_import(dry_run: bool = False) -> Report:
                         # from 1). Only ranked (completed) rows are re-based,
                         # matching backfill_rank_base's scope for the rows
                         # already in prod.
-                        'rank': (
+                        'rank_key': _rank_key(
                             r['rank'] + 1
                             if r['completed'] == 1 and r['rank'] is not None
                             else r['rank']
@@ -329,7 +335,9 @@ def run_import(dry_run: bool = False) -> Report:
                     {
                         # Legacy TV ranks are 0-based; the API expects 1-based
                         # (mirrors the alembic backfill for pre-migration rows).
-                        'rank': r['rank'] + 1 if r['rank'] is not None else None,
+                        'rank_key': _rank_key(
+                            r['rank'] + 1 if r['rank'] is not None else None
+                        ),
                         'status': _clean(r['status'], 254),
                         'freeze': r['freeze'] or 0,
                         'on_rankings': r['rank'] is not None,
@@ -392,7 +400,9 @@ def run_import(dry_run: bool = False) -> Report:
                     {
                         # Backlog games carry a meaningless rank-0 sentinel;
                         # only played (completed) games keep their 1-based rank.
-                        'rank': r['rank'] if r['completed'] == 1 else None,
+                        'rank_key': _rank_key(
+                            r['rank'] if r['completed'] == 1 else None
+                        ),
                         'completed': r['completed'],
                         'notes': _decode_blob(r['notes']),
                         'is_100_percent': bool(r['100_percent']),
@@ -436,7 +446,9 @@ def run_import(dry_run: bool = False) -> Report:
                     {
                         # Unread books carry a meaningless rank-0 sentinel;
                         # only read (completed) books keep their 1-based rank.
-                        'rank': r['rank'] if r['completed'] == 1 else None,
+                        'rank_key': _rank_key(
+                            r['rank'] if r['completed'] == 1 else None
+                        ),
                         'completed': r['completed'],
                         'notes': r['notes'],
                         'on_rankings': r['completed'] == 1,
@@ -476,7 +488,9 @@ def run_import(dry_run: bool = False) -> Report:
                         'country_id': country_map.get(r['countries_id']),
                     },
                     {
-                        'rank': r['rank'] if r['completed'] == 1 else None,
+                        'rank_key': _rank_key(
+                            r['rank'] if r['completed'] == 1 else None
+                        ),
                         'completed': r['completed'],
                         'notes': r['notes'],
                         'first_visited': r['g_first'],
@@ -51,6 +51,7 @@ from app.db.models_sandbox import (
     DbVideoGame,
 )
 from app.log.logging_config import logger
+from app.services.rankings import GAP
 
 # Reserved integer range for fake tvmaze/igdb ids -- far above any real id.
 FAKE_ID_BASE = 900_000
@@ -118,12 +119,12 @@ def _next_rank(session: Session, model, admin: DbUser) -> int:
     duplicate rank numbers.
     """
     current_max = (
-        session.query(model.rank)
-        .filter(model.user_id == admin.pk, model.rank.isnot(None))
-        .order_by(model.rank.desc())
+        session.query(model.rank_key)
+        .filter(model.user_id == admin.pk, model.rank_key.isnot(None))
+        .order_by(model.rank_key.desc())
         .first()
     )
-    return (current_max[0] if current_max else 0) + 1
+    return (current_max[0] // GAP if current_max else 0) + 1
 
 
 def _wipe(session: Session) -> None:
@@ -230,7 +231,7 @@ def _seed_movies(session: Session, admin: DbUser, count: int) -> None:
                 movie_id=movie.pk,
                 user_id=admin.pk,
                 on_rankings=True,
-                rank=rank,
+                rank_key=rank * GAP,
                 ranked_at=_fake_ranked_at(),
                 completed=1,
                 completed_at=_fake_completed_at(),
@@ -272,7 +273,7 @@ def _seed_tv(  # pylint: disable=too-many-locals
             user_id=admin.pk,
             on_rankings=is_ranked,
             on_watchlist=not is_ranked,
-            rank=None,
+            rank_key=None,
             ranked_at=_fake_ranked_at() if is_ranked else None,
             completed_at=_fake_completed_at() if is_ranked else None,
         )
@@ -310,7 +311,7 @@ def _seed_tv(  # pylint: disable=too-many-locals
 
     rank_start = _next_rank(session, DbUserTVShow, admin)
     for rank, row in enumerate(ranked_trackers, start=rank_start):
-        row.rank = rank
+        row.rank_key = rank * GAP
 
 
 def _seed_games(session: Session, admin: DbUser, count: int) -> None:
@@ -344,7 +345,7 @@ def _seed_games(session: Session, admin: DbUser, count: int) -> None:
                 game_id=game.pk,
                 user_id=admin.pk,
                 on_rankings=True,
-                rank=rank,
+                rank_key=rank * GAP,
                 ranked_at=_fake_ranked_at(),
                 completed=1,
                 completed_at=_fake_completed_at(),
@@ -387,7 +388,7 @@ def _seed_books(session: Session, admin: DbUser, count: int) -> None:
                 book_id=book.pk,
                 user_id=admin.pk,
                 on_rankings=True,
-                rank=rank,
+                rank_key=rank * GAP,
                 ranked_at=_fake_ranked_at(),
                 completed=1,
                 completed_at=_fake_completed_at(),
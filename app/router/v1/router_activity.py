@@ -5,291 +5,260 @@ Cross-domain Activity Log and "I'm bored" recommendation.
 Neither concept is owned by a single tracker domain, so unlike Schedule (which
 lives in router_tv.py because it's purely TV data), this is its own router
 that reads across Movies/TV/Games/Books/Countries.
+
+The Activity Log is a single UNION ALL over the five tracker tables and the
+episode marks, ordered by each entry's computed ``occurred_at`` and limited
+in SQL. A page costs that one query, plus one rank lookup per domain with a
+ranked entry on the page, however large the library. Older history is
+paged with ``before``: a page that isn't the last sets a ``Next-Cursor``
+header, which goes back as ``before`` for the next one.
 """
 
+import base64
+import binascii
+import json
 import random
+from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import case, func
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import (
+    DateTime,
+    Integer,
+    String,
+    case,
+    cast,
+    func,
+    literal,
+    null,
+    select,
+    tuple_,
+    type_coerce,
+    union_all,
+)
 from sqlalchemy.orm import Session, joinedload
 
 from app.db.database import get_db
 from app.db.models_sandbox import (
+    DbBook,
+    DbCountry,
+    DbMovie,
     DbTVEpisode,
+    DbTVShow,
     DbUserBook,
     DbUserCountry,
     DbUserMovie,
     DbUserTVEpisode,
     DbUserTVShow,
     DbUserVideoGame,
+    DbVideoGame,
 )
 from app.auth.oauth2 import get_current_user
 from app.schemas.schemas_sandbox import ActivityItem, BoredItem, BoredResponse
+from app.services import rankings
+from app.services.tracker_query import NEXT_CURSOR_HEADER
 
 router = APIRouter(prefix='/v1', tags=['Activity'])
 
-# Hard ceiling on the returned feed; also bounds per-domain SQL fetches.
+# Largest single page of the feed; older entries are reached with ``before``.
 MAX_FEED = 200
 
+# category -> (tracker, its catalog foreign key, catalog item, poster column)
+_TRACKERS = {
+    'movie': (DbUserMovie, 'movie_id', DbMovie, 'poster_url'),
+    'tv_show': (DbUserTVShow, 'tv_show_id', DbTVShow, 'poster_url'),
+    'game': (DbUserVideoGame, 'game_id', DbVideoGame, 'poster_url'),
+    'book': (DbUserBook, 'book_id', DbBook, 'poster_url'),
+    'country': (DbUserCountry, 'country_id', DbCountry, 'flag_url'),
+}
 
-def _tracker_occurred_at(tracker, action):
+
+# --- Activity Log ---
+def _as_datetime(dialect: str, column):
     """
-    The semantic timestamp for a tracker's feed entry. updated_at is a
-    technical "row was touched" column — it is only ever a last-resort
-    fallback here, never the meaning (#141 follow-up, 2026-07-19).
+    A Date column as midnight, so it sorts and compares like the DateTime
+    columns it is coalesced with. SQLite keeps dates as 'YYYY-MM-DD' text:
+    pad them to the text SQLAlchemy stores DateTimes as.
     """
-    if action == 'ranked':
-        return tracker.ranked_at or tracker.updated_at
-    if action == 'marked_done':
-        return getattr(tracker, 'completed_at', None) or tracker.updated_at
-    # watchlist_added: when the row was created is when it was added.
-    return tracker.created_at or tracker.updated_at
+    if dialect == 'sqlite':
+        return func.strftime('%Y-%m-%d %H:%M:%f000', column)
+    return cast(column, DateTime)
 
 
-def _bounded_tracker_rows(db: Session, model, user_pk: int, *loader_options):
+def _ranked(model):
+    return model.on_rankings.is_(True) & model.rank_key.isnot(None)
+
+
+def _tracker_occurred_at(dialect: str, model):
     """
-    Rows on watchlist or rankings, newest-by-_tracker_occurred_at first,
-    bounded to MAX_FEED in SQL — mirrors _tracker_occurred_at's branching so
-    the SQL order matches the Python-computed occurred_at exactly. Movies/TV
-    shows/games/books share these column names (on_rankings, rank, ranked_at,
-    completed_at, created_at, updated_at).
+    The semantic timestamp for a tracker's feed entry. updated_at is a
+    technical "row was touched" column — it is only ever a last-resort
+    fallback here, never the meaning (#141 follow-up, 2026-07-19).
     """
-    occurred_at = case(
-        (
-            (model.on_rankings.is_(True)) & (model.rank.isnot(None)),
-            func.coalesce(model.ranked_at, model.updated_at),
-        ),
+    if model is DbUserCountry:
+        # Whatever the action, a country is dated by the first visit.
+        return func.coalesce(model.first_visited, model.updated_at)
+    return case(
+        (_ranked(model), func.coalesce(model.ranked_at, model.updated_at)),
         (
             model.on_rankings.is_(True),
-            func.coalesce(model.completed_at, model.updated_at),
+            func.coalesce(_as_datetime(dialect, model.completed_at), model.updated_at),
         ),
+        # watchlist_added: when the row was created is when it was added.
         else_=func.coalesce(model.created_at, model.updated_at),
     )
-    return (
-        db.query(model)
-        .options(*loader_options)
-        .filter(
-            model.user_id == user_pk,
-            (model.on_rankings.is_(True)) | (model.on_watchlist.is_(True)),
-        )
-        .order_by(occurred_at.desc())
-        .limit(MAX_FEED)
-        .all()
-    )
 
 
-# --- Activity Log ---
-def _movie_activity(db: Session, user_pk: int) -> List[ActivityItem]:
-    trackers = _bounded_tracker_rows(
-        db, DbUserMovie, user_pk, joinedload(DbUserMovie.movie)
-    )
-    items = []
-    for t in trackers:
-        if t.on_rankings and t.rank is not None:
-            action = 'ranked'
-        elif t.on_rankings:
-            action = 'marked_done'
-        elif t.on_watchlist:
-            action = 'watchlist_added'
-        else:
-            continue
-        items.append(
-            ActivityItem(
-                category='movie',
-                action=action,
-                title=t.movie.title,
-                entity_id=t.movie.id,
-                poster_url=t.movie.poster_url,
-                rank=t.rank if action == 'ranked' else None,
-                occurred_at=_tracker_occurred_at(t, action),
-            )
+def _tracker_entries(dialect: str, category: str, user_pk: int):
+    """One domain's feed entries, in the union's column order."""
+    model, foreign_key, item, poster = _TRACKERS[category]
+    subtitle = cast(null(), String)
+    if model is DbUserVideoGame:
+        subtitle = case((model.is_100_percent.is_(True), '100%'), else_=subtitle)
+    return (
+        select(
+            literal(category, String).label('category'),
+            case(
+                (_ranked(model), 'ranked'),
+                (model.on_rankings.is_(True), 'marked_done'),
+                else_='watchlist_added',
+            ).label('action'),
+            item.title.label('title'),
+            subtitle.label('subtitle'),
+            cast(null(), Integer).label('season'),
+            cast(null(), Integer).label('season_number'),
+            item.id.label('entity_id'),
+            getattr(item, poster).label('poster_url'),
+            model.pk.label('pk'),
+            type_coerce(_tracker_occurred_at(dialect, model), DateTime).label(
+                'occurred_at'
+            ),
         )
-    return items
-
-
-def _tv_show_activity(db: Session, user_pk: int) -> List[ActivityItem]:
-    trackers = _bounded_tracker_rows(
-        db, DbUserTVShow, user_pk, joinedload(DbUserTVShow.tv_show)
-    )
-    items = []
-    for t in trackers:
-        if t.on_rankings and t.rank is not None:
-            action = 'ranked'
-        elif t.on_rankings:
-            action = 'marked_done'
-        elif t.on_watchlist:
-            action = 'watchlist_added'
-        else:
-            continue
-        items.append(
-            ActivityItem(
-                category='tv_show',
-                action=action,
-                title=t.tv_show.title,
-                entity_id=t.tv_show.id,
-                poster_url=t.tv_show.poster_url,
-                rank=t.rank if action == 'ranked' else None,
-                occurred_at=_tracker_occurred_at(t, action),
-            )
+        .join(item, item.pk == getattr(model, foreign_key))
+        .where(
+            model.user_id == user_pk,
+            model.on_rankings.is_(True) | model.on_watchlist.is_(True),
         )
-    return items
+    )
 
 
-def _episode_activity(db: Session, user_pk: int) -> List[ActivityItem]:
-    rows = (
-        db.query(DbUserTVEpisode)
-        .options(joinedload(DbUserTVEpisode.episode).joinedload(DbTVEpisode.tv_show))
-        .filter(DbUserTVEpisode.user_id == user_pk, DbUserTVEpisode.watched == 1)
-        # Episode marks dwarf every other domain (tens of thousands once a
-        # library is imported) and occurred_at is updated_at here, so only the
-        # newest MAX_FEED can survive the merged sort — bound it in SQL.
-        .order_by(
-            func.coalesce(DbUserTVEpisode.watched_at, DbUserTVEpisode.updated_at).desc()
+def _episode_entries(user_pk: int):
+    """Watched episode marks, one entry each, in the union's column order."""
+    return (
+        select(
+            literal('tv_episode', String).label('category'),
+            literal('watched_episode', String).label('action'),
+            DbTVShow.title.label('title'),
+            DbTVEpisode.title.label('subtitle'),
+            DbTVEpisode.season.label('season'),
+            DbTVEpisode.season_number.label('season_number'),
+            DbTVShow.id.label('entity_id'),
+            DbTVShow.poster_url.label('poster_url'),
+            DbUserTVEpisode.pk.label('pk'),
+            func.coalesce(DbUserTVEpisode.watched_at, DbUserTVEpisode.updated_at).label(
+                'occurred_at'
+            ),
         )
-        .limit(MAX_FEED)
-        .all()
+        .join(DbTVEpisode, DbTVEpisode.pk == DbUserTVEpisode.episode_id)
+        .join(DbTVShow, DbTVShow.pk == DbTVEpisode.tv_show_id)
+        .where(DbUserTVEpisode.user_id == user_pk, DbUserTVEpisode.watched == 1)
     )
-    items = []
-    for row in rows:
-        ep = row.episode
-        show = ep.tv_show
-        label = None
-        if ep.season is not None and ep.season_number is not None:
-            label = f'S{ep.season}E{ep.season_number}'
-        items.append(
-            ActivityItem(
-                category='tv_episode',
-                action='watched_episode',
-                title=show.title,
-                subtitle=f'{label} - {ep.title}' if label else ep.title,
-                entity_id=show.id,
-                poster_url=show.poster_url,
-                occurred_at=row.watched_at or row.updated_at,
-            )
-        )
-    return items
 
 
-def _game_activity(db: Session, user_pk: int) -> List[ActivityItem]:
-    trackers = _bounded_tracker_rows(
-        db, DbUserVideoGame, user_pk, joinedload(DbUserVideoGame.game)
-    )
-    items = []
-    for t in trackers:
-        if t.on_rankings and t.rank is not None:
-            action = 'ranked'
-        elif t.on_rankings:
-            action = 'marked_done'
-        elif t.on_watchlist:
-            action = 'watchlist_added'
-        else:
-            continue
-        items.append(
-            ActivityItem(
-                category='game',
-                action=action,
-                title=t.game.title,
-                subtitle='100%' if t.is_100_percent else None,
-                entity_id=t.game.id,
-                poster_url=t.game.poster_url,
-                rank=t.rank if action == 'ranked' else None,
-                occurred_at=_tracker_occurred_at(t, action),
-            )
-        )
-    return items
+def _encode_before(row) -> str:
+    """Opaque cursor for the entries older than ``row``."""
+    values = [row['occurred_at'].isoformat(), row['category'], row['pk']]
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
 
 
-def _book_activity(db: Session, user_pk: int) -> List[ActivityItem]:
-    trackers = _bounded_tracker_rows(
-        db, DbUserBook, user_pk, joinedload(DbUserBook.book)
+def _decode_before(before: str) -> list:
+    """``[occurred_at, category, pk]`` from ``_encode_before``; 422 otherwise."""
+    try:
+        padded = before + '=' * (-len(before) % 4)
+        occurred_at, category, pk = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(category, str) or not isinstance(pk, int):
+            raise ValueError(before)
+        return [datetime.fromisoformat(occurred_at), category, pk]
+    except (binascii.Error, TypeError, ValueError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail='Invalid before cursor',
+        ) from exc
+
+
+def _activity_item(row, ranks: dict) -> ActivityItem:
+    subtitle = row['subtitle']
+    if None not in (row['season'], row['season_number']):
+        subtitle = f"S{row['season']}E{row['season_number']} - {subtitle}"
+    return ActivityItem(
+        category=row['category'],
+        action=row['action'],
+        title=row['title'],
+        subtitle=subtitle,
+        entity_id=row['entity_id'],
+        poster_url=row['poster_url'],
+        rank=ranks.get((row['category'], row['pk'])),
+        occurred_at=row['occurred_at'],
     )
-    items = []
-    for t in trackers:
-        if t.on_rankings and t.rank is not None:
-            action = 'ranked'
-        elif t.on_rankings:
-            action = 'marked_done'
-        elif t.on_watchlist:
-            action = 'watchlist_added'
-        else:
-            continue
-        items.append(
-            ActivityItem(
-                category='book',
-                action=action,
-                title=t.book.title,
-                entity_id=t.book.id,
-                poster_url=t.book.poster_url,
-                rank=t.rank if action == 'ranked' else None,
-                occurred_at=_tracker_occurred_at(t, action),
-            )
-        )
-    return items
 
 
-def _country_activity(db: Session, user_pk: int) -> List[ActivityItem]:
-    # Countries don't use _tracker_occurred_at (occurred_at is always
-    # first_visited/updated_at here, regardless of action) — bound separately.
-    trackers = (
-        db.query(DbUserCountry)
-        .options(joinedload(DbUserCountry.country))
-        .filter(
-            DbUserCountry.user_id == user_pk,
-            (DbUserCountry.on_rankings.is_(True))
-            | (DbUserCountry.on_watchlist.is_(True)),
-        )
-        .order_by(
-            func.coalesce(DbUserCountry.first_visited, DbUserCountry.updated_at).desc()
-        )
-        .limit(MAX_FEED)
-        .all()
-    )
-    items = []
-    for t in trackers:
-        if t.on_rankings and t.rank is not None:
-            action = 'ranked'
-        elif t.on_rankings:
-            action = 'marked_done'
-        elif t.on_watchlist:
-            action = 'watchlist_added'
-        else:
-            continue
-        items.append(
-            ActivityItem(
-                category='country',
-                action=action,
-                title=t.country.title,
-                entity_id=t.country.id,
-                poster_url=t.country.flag_url,
-                rank=t.rank if action == 'ranked' else None,
-                occurred_at=t.first_visited or t.updated_at,
-            )
-        )
-    return items
+def _ranks(db: Session, user_pk: int, rows) -> dict:
+    """(category, tracker pk) -> dense rank, for the page's ranked entries."""
+    ranks = {}
+    for category in {row['category'] for row in rows if row['action'] == 'ranked'}:
+        positions = rankings.positions(db, _TRACKERS[category][0], user_pk)
+        ranks.update({(category, pk): rank for pk, rank in positions.items()})
+    return ranks
 
 
 @router.get('/users/me/activity', response_model=List[ActivityItem])
-def get_activity(
+def get_activity(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+    response: Response,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
     category: Optional[str] = None,
     limit: int = 50,
+    before: Optional[str] = Query(
+        None, description='Next-Cursor header of the previous page'
+    ),
 ):
     """Cross-domain "what have I been up to" feed, newest first."""
     user_pk = current_user[0].pk
-    items = (
-        _movie_activity(db, user_pk)
-        + _tv_show_activity(db, user_pk)
-        + _episode_activity(db, user_pk)
-        + _game_activity(db, user_pk)
-        + _book_activity(db, user_pk)
-        + _country_activity(db, user_pk)
+    limit = max(1, min(limit, MAX_FEED))
+    dialect = db.get_bind().dialect.name
+    branches = [
+        _tracker_entries(dialect, name, user_pk)
+        for name in _TRACKERS
+        if category in (None, name)
+    ]
+    if category in (None, 'tv_episode'):
+        branches.append(_episode_entries(user_pk))
+    if not branches:
+        return []
+    feed = union_all(*branches).subquery()
+    keys = (feed.c.occurred_at, feed.c.category, feed.c.pk)
+    query = select(feed).where(feed.c.occurred_at.isnot(None))
+    if before is not None:
+        query = query.where(
+            tuple_(*keys)
+            < tuple_(
+                *(
+                    literal(value, key.type)
+                    for key, value in zip(keys, _decode_before(before))
+                )
+            )
+        )
+    rows = (
+        db.execute(query.order_by(*(key.desc() for key in keys)).limit(limit + 1))
+        .mappings()
+        .all()
     )
-    if category:
-        items = [i for i in items if i.category == category]
-    items.sort(key=lambda i: i.occurred_at, reverse=True)
-    return items[: max(1, min(limit, MAX_FEED))]
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = _encode_before(rows[-1])
+    ranks = _ranks(db, user_pk, rows)
+    return [_activity_item(row, ranks) for row in rows]
 
 
 # --- "I'm bored" recommendation ---
@@ -10,7 +10,7 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.auth import oauth2
+from app.auth import oauth2, principal_cache
 from app.auth.oauth2 import get_current_user
 from app.db.database import get_db
 from app.db.models import DbApiKey
@@ -83,3 +83,4 @@ def revoke_api_key(
         )
     db.delete(row)
     db.commit()
+    principal_cache.invalidate(principal_cache.api_key_key(row.key_hash))
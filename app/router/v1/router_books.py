@@ -7,24 +7,23 @@ search proxy, lazy enrichment on detail view (keyed on isbn), and per-user
 trackers with independent Watchlist (to-read) / Rankings (read) lists.
 """
 
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session, joinedload
 
 from app.db.database import get_db
+from app.services import local_search, ranking_guard, rankings
+from app.services.ranking_guard import RankingWrite, ranking_write
 from app.services.rate_limit import catalog_add_cap, search_rate_limit
+from app.services import tracker_query
+from app.services.fieldsets import Fieldset, fieldset, tracker_options
 from app.services.tracker_query import (
     apply_list_params,
-    guard_truncation,
     list_params,
+    paginate,
 )
-from app.services.tracker_rules import (
-    default_completed_at,
-    enforce_single_home,
-    utc_now,
-)
+from app.services.tracker_rules import default_completed_at, enforce_single_home
 from app.db.models_sandbox import DbBook, DbUserBook
 from app.auth.oauth2 import get_current_user, require_admin
 from app.schemas.schemas_sandbox import (
@@ -35,6 +34,7 @@ from app.schemas.schemas_sandbox import (
     BookSummary,
     BookUpdate,
     RankPlacement,
+    TrackerChanges,
     UserBookCreate,
     UserBookResponse,
     UserBookUpdate,
@@ -52,8 +52,14 @@ router = APIRouter(prefix='/v1', tags=['Books'])
 
 # Global Entity Endpoints
 @router.get('/books', response_model=List[BookSummary])
-def get_all_books(db: Session = Depends(get_db)):
-    return db.query(DbBook).all()
+def get_all_books(
+    db: Session = Depends(get_db),
+    fields: Optional[Fieldset] = Depends(fieldset(BookSummary)),
+):
+    query = db.query(DbBook)
+    if fields is None:
+        return query.all()
+    return fields.respond(query.options(*fields.load_options(DbBook)).all())
 
 
 @router.get(
@@ -114,6 +120,7 @@ def create_book(
     db.add(new_book)
     db.commit()
     db.refresh(new_book)
+    local_search.upsert('books', new_book)
     return new_book
 
 
@@ -152,6 +159,7 @@ def update_book(
 
     db.commit()
     db.refresh(book)
+    local_search.upsert('books', book)
     return book
 
 
@@ -165,6 +173,7 @@ def delete_book(
     book = _get_book(db, book_id)
     db.delete(book)
     db.commit()
+    local_search.remove('books', book_id)
     return None
 
 
@@ -186,45 +195,48 @@ def _get_tracker(db: Session, user_pk: int, book_pk: int):
     )
 
 
-def _placed_count(db: Session, user_pk: int) -> int:
-    """Number of books with an assigned rank position for this user."""
-    return (
-        db.query(func.count())  # pylint: disable=not-callable
-        .select_from(DbUserBook)
-        .filter(
-            DbUserBook.user_id == user_pk,
-            DbUserBook.on_rankings.is_(True),
-            DbUserBook.rank.isnot(None),
-        )
-        .scalar()
-    )
-
-
-def _close_rank_gap(db: Session, user_pk: int, vacated_rank) -> None:
-    """After a ranked item leaves the list, shift everything below it up."""
-    if vacated_rank is None:
-        return
-    db.query(DbUserBook).filter(
-        DbUserBook.user_id == user_pk,
-        DbUserBook.on_rankings.is_(True),
-        DbUserBook.rank.isnot(None),
-        DbUserBook.rank > vacated_rank,
-    ).update({DbUserBook.rank: DbUserBook.rank - 1}, synchronize_session=False)
-
-
 @router.get('/users/me/books', response_model=List[UserBookResponse])
 def get_user_books(
+    response: Response,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
     params: dict = Depends(list_params),
+    fields: Optional[Fieldset] = Depends(fieldset(UserBookResponse)),
 ):
     query = (
         db.query(DbUserBook)
-        .options(joinedload(DbUserBook.book))
+        .options(*tracker_options(fields, DbUserBook.book))
         .filter(DbUserBook.user_id == current_user[0].pk)
     )
-    rows = apply_list_params(query, DbUserBook, params).all()
-    return guard_truncation(rows, params, 'Book')
+    rows = paginate(
+        apply_list_params(query, DbUserBook, params).all(), params, response
+    )
+    if fields is None or fields.wants('rank'):
+        rankings.attach_positions(db, rows)
+    # The ranking version a following write's If-Match should carry.
+    response.headers['ETag'] = ranking_guard.current_etag(db, current_user[0].pk)
+    return rows if fields is None else fields.respond(rows, response)
+
+
+@router.get('/users/me/books/changes', response_model=TrackerChanges[UserBookResponse])
+def get_user_book_changes(
+    since: int = Query(
+        0, ge=0, description='Token from the previous sync (0: the whole list)'
+    ),
+    db: Session = Depends(get_db),
+    current_user: list = Depends(get_current_user),
+):
+    """
+    Delta sync: book trackers written since ``since``, tombstones for
+    deleted ones, and the token to pass next time.
+    """
+    user_pk = current_user[0].pk
+    query = (
+        db.query(DbUserBook)
+        .options(joinedload(DbUserBook.book))
+        .filter(DbUserBook.user_id == user_pk)
+    )
+    return tracker_query.changes(db, query, DbUserBook, user_pk, since)
 
 
 @router.put('/users/me/books/rankings/order', response_model=List[UserBookResponse])
@@ -232,27 +244,22 @@ def reorder_rankings(
     request: BookRankingReorder,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
     """Persist a new ranking order (drag-and-drop). Rank = position in the list."""
-    user_pk = current_user[0].pk
-    for position, book_id in enumerate(request.book_ids, start=1):
-        book = db.query(DbBook).filter(DbBook.id == book_id).first()
-        if not book:
-            continue
-        tracker = _get_tracker(db, user_pk, book.pk)
-        if tracker:
-            if tracker.rank != position:
-                tracker.ranked_at = utc_now()
-            tracker.rank = position
-            tracker.on_rankings = True
-            tracker.on_watchlist = False
-    db.commit()
-    return (
-        db.query(DbUserBook)
-        .filter(DbUserBook.user_id == user_pk, DbUserBook.on_rankings.is_(True))
-        .order_by(DbUserBook.rank)
-        .all()
+    if guard.replay is not None:
+        return guard.replay
+    guard.claim()
+    result = rankings.reorder(
+        db,
+        current_user[0].pk,
+        request.book_ids,
+        tracker_model=DbUserBook,
+        catalog_model=DbBook,
+        join_col='book_id',
+        relation='book',
     )
+    return guard.respond(List[UserBookResponse], result)
 
 
 @router.get('/users/me/books/{book_id}', response_model=UserBookResponse)
@@ -277,12 +284,15 @@ def set_book_rank(
     request: RankPlacement,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
     """
     Place a book at an exact 1-based position in the ranked list, shifting the
     books at and below that position down by one. Works for a not-yet-ranked
     book (jump it in) or an already-ranked one (move it).
     """
+    if guard.replay is not None:
+        return guard.replay
     user_pk = current_user[0].pk
     book = _get_book(db, book_id)
     tracker = _get_tracker(db, user_pk, book.pk)
@@ -291,35 +301,15 @@ def set_book_rank(
             status_code=status.HTTP_404_NOT_FOUND, detail='Book not marked'
         )
 
-    old_rank = tracker.rank
+    guard.claim()
     was_on_rankings = tracker.on_rankings
     tracker.on_rankings = True
     tracker.on_watchlist = False
     default_completed_at(tracker, was_on_rankings)
-    # Remove from its current slot first so the shift math excludes it.
-    tracker.rank = None
-    db.flush()
-    if old_rank is not None:
-        db.query(DbUserBook).filter(
-            DbUserBook.user_id == user_pk,
-            DbUserBook.on_rankings.is_(True),
-            DbUserBook.rank.isnot(None),
-            DbUserBook.rank > old_rank,
-        ).update({DbUserBook.rank: DbUserBook.rank - 1}, synchronize_session=False)
-
-    target = max(1, min(request.position, _placed_count(db, user_pk) + 1))
-    db.query(DbUserBook).filter(
-        DbUserBook.user_id == user_pk,
-        DbUserBook.on_rankings.is_(True),
-        DbUserBook.rank.isnot(None),
-        DbUserBook.rank >= target,
-    ).update({DbUserBook.rank: DbUserBook.rank + 1}, synchronize_session=False)
-
-    tracker.rank = target
-    tracker.ranked_at = utc_now()
+    rankings.place(db, tracker, request.position)
     db.commit()
     db.refresh(tracker)
-    return tracker
+    return guard.respond(UserBookResponse, tracker)
 
 
 @router.post(
@@ -332,16 +322,19 @@ def mark_book(
     request: UserBookCreate,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
     """Add a book to the user's lists (idempotent — merges list membership)."""
+    if guard.replay is not None:
+        return guard.replay
     user_pk = current_user[0].pk
     book = _get_book(db, book_id)
     tracker = _get_tracker(db, user_pk, book.pk)
     data = request.model_dump(exclude_unset=True)
 
+    guard.claim()
     if tracker is None:
         was_on_rankings = False
-        old_rank = None
         tracker = DbUserBook(
             user_id=user_pk,
             book_id=book.pk,
@@ -353,7 +346,6 @@ def mark_book(
         db.add(tracker)
     else:
         was_on_rankings = tracker.on_rankings
-        old_rank = tracker.rank
         for key in ('on_watchlist', 'on_rankings', 'notes', 'completed_at'):
             if key in data:
                 setattr(tracker, key, data[key])
@@ -364,13 +356,10 @@ def mark_book(
     enforce_single_home(tracker, data)
     default_completed_at(tracker, was_on_rankings)
     if not tracker.on_rankings or not was_on_rankings:
-        tracker.rank = None
-        tracker.ranked_at = None
-    if old_rank is not None and tracker.rank is None:
-        _close_rank_gap(db, user_pk, old_rank)
+        rankings.unplace(tracker)
     db.commit()
     db.refresh(tracker)
-    return tracker
+    return guard.respond(UserBookResponse, tracker, status.HTTP_201_CREATED)
 
 
 @router.put('/users/me/books/{book_id}', response_model=UserBookResponse)
@@ -379,8 +368,11 @@ def update_user_book(
     request: UserBookUpdate,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
     """Update list membership, rank, or notes for a tracked book."""
+    if guard.replay is not None:
+        return guard.replay
     user_pk = current_user[0].pk
     book = _get_book(db, book_id)
     tracker = _get_tracker(db, user_pk, book.pk)
@@ -389,9 +381,11 @@ def update_user_book(
             status_code=status.HTTP_404_NOT_FOUND, detail='Book not marked'
         )
 
-    old_rank = tracker.rank
+    guard.claim()
     was_on_rankings = tracker.on_rankings
     data = request.model_dump(exclude_unset=True)
+    # ``rank`` is a position, not a column: it re-places the entry.
+    placement = data.pop('rank', None)
     for key, value in data.items():
         setattr(tracker, key, value)
     enforce_single_home(tracker, data)
@@ -400,23 +394,20 @@ def update_user_book(
     # Entering Rankings (or leaving it) resets to unplaced so a stale/leftover
     # rank never places the book automatically; it lands in "to rank" instead.
     if not tracker.on_rankings or not was_on_rankings:
-        tracker.rank = None
-        tracker.ranked_at = None
-
-    # A removed placement leaves a gap — shift everything below it up.
-    if old_rank is not None and tracker.rank is None:
-        _close_rank_gap(db, user_pk, old_rank)
+        rankings.unplace(tracker)
+    elif placement is not None:
+        rankings.place(db, tracker, placement)
 
     # If it's on neither list, drop the tracker entirely.
     if not tracker.on_watchlist and not tracker.on_rankings:
         response = UserBookResponse.model_validate(tracker)
         db.delete(tracker)
         db.commit()
-        return response
+        return guard.respond(UserBookResponse, response)
 
     db.commit()
     db.refresh(tracker)
-    return tracker
+    return guard.respond(UserBookResponse, tracker)
 
 
 @router.delete('/users/me/books/{book_id}', status_code=status.HTTP_204_NO_CONTENT)
@@ -424,7 +415,10 @@ def unmark_book(
     book_id: str,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
+    if guard.replay is not None:
+        return guard.replay
     user_pk = current_user[0].pk
     book = _get_book(db, book_id)
     tracker = _get_tracker(db, user_pk, book.pk)
@@ -432,7 +426,7 @@ def unmark_book(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail='Book not marked'
         )
-    _close_rank_gap(db, user_pk, tracker.rank)
+    guard.claim()
     db.delete(tracker)
     db.commit()
-    return None
+    return guard.respond(None, None, status.HTTP_204_NO_CONTENT)
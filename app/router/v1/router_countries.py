@@ -9,14 +9,18 @@ independent Watchlist (travel bucket list) / Rankings (visited) lists plus a
 ``first_visited`` date.
 """
 
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.orm import Session, joinedload
 
 from app.db.database import get_db
-from app.services.tracker_rules import enforce_single_home, utc_now
+from app.services import ranking_guard, rankings
+from app.services.ranking_guard import RankingWrite, ranking_write
+from app.services import tracker_query
+from app.services.fieldsets import Fieldset, fieldset, tracker_options
+from app.services.tracker_query import apply_list_params, list_params, paginate
+from app.services.tracker_rules import enforce_single_home
 from app.db.models_sandbox import DbCountry, DbUserCountry
 from app.auth.oauth2 import get_current_user, require_admin
 from app.schemas.schemas_sandbox import (
@@ -25,6 +29,7 @@ from app.schemas.schemas_sandbox import (
     CountryResponse,
     CountryUpdate,
     RankPlacement,
+    TrackerChanges,
     UserCountryCreate,
     UserCountryResponse,
     UserCountryUpdate,
@@ -40,8 +45,14 @@ router = APIRouter(prefix='/v1', tags=['Countries'])
 
 # Global Entity Endpoints
 @router.get('/countries', response_model=List[CountryResponse])
-def get_all_countries(db: Session = Depends(get_db)):
-    return db.query(DbCountry).order_by(DbCountry.title).all()
+def get_all_countries(
+    db: Session = Depends(get_db),
+    fields: Optional[Fieldset] = Depends(fieldset(CountryResponse)),
+):
+    query = db.query(DbCountry).order_by(DbCountry.title)
+    if fields is None:
+        return query.all()
+    return fields.respond(query.options(*fields.load_options(DbCountry)).all())
 
 
 @router.post(
@@ -160,41 +171,50 @@ def _get_tracker(db: Session, user_pk: int, country_pk: int):
     )
 
 
-def _placed_count(db: Session, user_pk: int) -> int:
-    """Number of countries with an assigned rank position for this user."""
-    return (
-        db.query(func.count())  # pylint: disable=not-callable
-        .select_from(DbUserCountry)
-        .filter(
-            DbUserCountry.user_id == user_pk,
-            DbUserCountry.on_rankings.is_(True),
-            DbUserCountry.rank.isnot(None),
-        )
-        .scalar()
-    )
-
-
-def _close_rank_gap(db: Session, user_pk: int, vacated_rank) -> None:
-    """After a ranked item leaves the list, shift everything below it up."""
-    if vacated_rank is None:
-        return
-    db.query(DbUserCountry).filter(
-        DbUserCountry.user_id == user_pk,
-        DbUserCountry.on_rankings.is_(True),
-        DbUserCountry.rank.isnot(None),
-        DbUserCountry.rank > vacated_rank,
-    ).update({DbUserCountry.rank: DbUserCountry.rank - 1}, synchronize_session=False)
-
-
 @router.get('/users/me/countries', response_model=List[UserCountryResponse])
 def get_user_countries(
-    db: Session = Depends(get_db), current_user: list = Depends(get_current_user)
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: list = Depends(get_current_user),
+    params: dict = Depends(list_params),
+    fields: Optional[Fieldset] = Depends(fieldset(UserCountryResponse)),
 ):
-    return (
+    query = (
         db.query(DbUserCountry)
+        .options(*tracker_options(fields, DbUserCountry.country))
         .filter(DbUserCountry.user_id == current_user[0].pk)
-        .all()
     )
+    trackers = paginate(
+        apply_list_params(query, DbUserCountry, params).all(), params, response
+    )
+    if fields is None or fields.wants('rank'):
+        rankings.attach_positions(db, trackers)
+    # The ranking version a following write's If-Match should carry.
+    response.headers['ETag'] = ranking_guard.current_etag(db, current_user[0].pk)
+    return trackers if fields is None else fields.respond(trackers, response)
+
+
+@router.get(
+    '/users/me/countries/changes', response_model=TrackerChanges[UserCountryResponse]
+)
+def get_user_country_changes(
+    since: int = Query(
+        0, ge=0, description='Token from the previous sync (0: the whole list)'
+    ),
+    db: Session = Depends(get_db),
+    current_user: list = Depends(get_current_user),
+):
+    """
+    Delta sync: country trackers written since ``since``, tombstones for
+    deleted ones, and the token to pass next time.
+    """
+    user_pk = current_user[0].pk
+    query = (
+        db.query(DbUserCountry)
+        .options(joinedload(DbUserCountry.country))
+        .filter(DbUserCountry.user_id == user_pk)
+    )
+    return tracker_query.changes(db, query, DbUserCountry, user_pk, since)
 
 
 @router.put(
@@ -204,27 +224,22 @@ def reorder_rankings(
     request: CountryRankingReorder,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
     """Persist a new ranking order (drag-and-drop). Rank = position in the list."""
-    user_pk = current_user[0].pk
-    for position, country_id in enumerate(request.country_ids, start=1):
-        country = db.query(DbCountry).filter(DbCountry.id == country_id).first()
-        if not country:
-            continue
-        tracker = _get_tracker(db, user_pk, country.pk)
-        if tracker:
-            if tracker.rank != position:
-                tracker.ranked_at = utc_now()
-            tracker.rank = position
-            tracker.on_rankings = True
-            tracker.on_watchlist = False
-    db.commit()
-    return (
-        db.query(DbUserCountry)
-        .filter(DbUserCountry.user_id == user_pk, DbUserCountry.on_rankings.is_(True))
-        .order_by(DbUserCountry.rank)
-        .all()
+    if guard.replay is not None:
+        return guard.replay
+    guard.claim()
+    result = rankings.reorder(
+        db,
+        current_user[0].pk,
+        request.country_ids,
+        tracker_model=DbUserCountry,
+        catalog_model=DbCountry,
+        join_col='country_id',
+        relation='country',
     )
+    return guard.respond(List[UserCountryResponse], result)
 
 
 @router.get('/users/me/countries/{country_id}', response_model=UserCountryResponse)
@@ -249,11 +264,14 @@ def set_country_rank(
     request: RankPlacement,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
     """
     Place a country at an exact 1-based position in the visited ranking,
     shifting the countries at and below that position down by one.
     """
+    if guard.replay is not None:
+        return guard.replay
     user_pk = current_user[0].pk
     country = _get_country(db, country_id)
     tracker = _get_tracker(db, user_pk, country.pk)
@@ -262,35 +280,13 @@ def set_country_rank(
             status_code=status.HTTP_404_NOT_FOUND, detail='Country not marked'
         )
 
-    old_rank = tracker.rank
+    guard.claim()
     tracker.on_rankings = True
     tracker.on_watchlist = False
-    # Remove from its current slot first so the shift math excludes it.
-    tracker.rank = None
-    db.flush()
-    if old_rank is not None:
-        db.query(DbUserCountry).filter(
-            DbUserCountry.user_id == user_pk,
-            DbUserCountry.on_rankings.is_(True),
-            DbUserCountry.rank.isnot(None),
-            DbUserCountry.rank > old_rank,
-        ).update(
-            {DbUserCountry.rank: DbUserCountry.rank - 1}, synchronize_session=False
-        )
-
-    target = max(1, min(request.position, _placed_count(db, user_pk) + 1))
-    db.query(DbUserCountry).filter(
-        DbUserCountry.user_id == user_pk,
-        DbUserCountry.on_rankings.is_(True),
-        DbUserCountry.rank.isnot(None),
-        DbUserCountry.rank >= target,
-    ).update({DbUserCountry.rank: DbUserCountry.rank + 1}, synchronize_session=False)
-
-    tracker.rank = target
-    tracker.ranked_at = utc_now()
+    rankings.place(db, tracker, request.position)
     db.commit()
     db.refresh(tracker)
-    return tracker
+    return guard.respond(UserCountryResponse, tracker)
 
 
 @router.post(
@@ -303,16 +299,19 @@ def mark_country(
     request: UserCountryCreate,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
     """Add a country to the user's lists (idempotent — merges list membership)."""
+    if guard.replay is not None:
+        return guard.replay
     user_pk = current_user[0].pk
     country = _get_country(db, country_id)
     tracker = _get_tracker(db, user_pk, country.pk)
     data = request.model_dump(exclude_unset=True)
 
+    guard.claim()
     if tracker is None:
         was_on_rankings = False
-        old_rank = None
         tracker = DbUserCountry(
             user_id=user_pk,
             country_id=country.pk,
@@ -324,7 +323,6 @@ def mark_country(
         db.add(tracker)
     else:
         was_on_rankings = tracker.on_rankings
-        old_rank = tracker.rank
         for key in ('on_watchlist', 'on_rankings', 'notes', 'first_visited'):
             if key in data:
                 setattr(tracker, key, data[key])
@@ -334,13 +332,10 @@ def mark_country(
     # it lands in the "to rank" bucket rather than at a stale position.
     enforce_single_home(tracker, data)
     if not tracker.on_rankings or not was_on_rankings:
-        tracker.rank = None
-        tracker.ranked_at = None
-    if old_rank is not None and tracker.rank is None:
-        _close_rank_gap(db, user_pk, old_rank)
+        rankings.unplace(tracker)
     db.commit()
     db.refresh(tracker)
-    return tracker
+    return guard.respond(UserCountryResponse, tracker, status.HTTP_201_CREATED)
 
 
 @router.put('/users/me/countries/{country_id}', response_model=UserCountryResponse)
@@ -349,8 +344,11 @@ def update_user_country(
     request: UserCountryUpdate,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
     """Update list membership, rank, notes, or first-visited for a country."""
+    if guard.replay is not None:
+        return guard.replay
     user_pk = current_user[0].pk
     country = _get_country(db, country_id)
     tracker = _get_tracker(db, user_pk, country.pk)
@@ -359,9 +357,11 @@ def update_user_country(
             status_code=status.HTTP_404_NOT_FOUND, detail='Country not marked'
         )
 
-    old_rank = tracker.rank
+    guard.claim()
     was_on_rankings = tracker.on_rankings
     data = request.model_dump(exclude_unset=True)
+    # ``rank`` is a position, not a column: it re-places the entry.
+    placement = data.pop('rank', None)
     for key, value in data.items():
         setattr(tracker, key, value)
     enforce_single_home(tracker, data)
@@ -369,23 +369,20 @@ def update_user_country(
     # Entering (or leaving) the ranking resets to unplaced so a stale rank
     # never places the country automatically; it lands in "to rank" instead.
     if not tracker.on_rankings or not was_on_rankings:
-        tracker.rank = None
-        tracker.ranked_at = None
-
-    # A removed placement leaves a gap — shift everything below it up.
-    if old_rank is not None and tracker.rank is None:
-        _close_rank_gap(db, user_pk, old_rank)
+        rankings.unplace(tracker)
+    elif placement is not None:
+        rankings.place(db, tracker, placement)
 
     # If it's on neither list, drop the tracker entirely.
     if not tracker.on_watchlist and not tracker.on_rankings:
         response = UserCountryResponse.model_validate(tracker)
         db.delete(tracker)
         db.commit()
-        return response
+        return guard.respond(UserCountryResponse, response)
 
     db.commit()
     db.refresh(tracker)
-    return tracker
+    return guard.respond(UserCountryResponse, tracker)
 
 
 @router.delete(
@@ -395,7 +392,10 @@ def unmark_country(
     country_id: str,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
+    if guard.replay is not None:
+        return guard.replay
     user_pk = current_user[0].pk
     country = _get_country(db, country_id)
     tracker = _get_tracker(db, user_pk, country.pk)
@@ -403,7 +403,7 @@ def unmark_country(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail='Country not marked'
         )
-    _close_rank_gap(db, user_pk, tracker.rank)
+    guard.claim()
     db.delete(tracker)
     db.commit()
-    return None
+    return guard.respond(None, None, status.HTTP_204_NO_CONTENT)
@@ -22,13 +22,8 @@ from app.db.models_sandbox import (
     DbUserTVShow,
     DbUserVideoGame,
 )
-from app.schemas.schemas_sandbox import (
-    UserBookResponse,
-    UserMovieResponse,
-    UserTVEpisodeResponse,
-    UserTVShowResponse,
-    UserVideoGameResponse,
-)
+from app.schemas.schemas_sandbox import DataExport
+from app.services import rankings
 
 router = APIRouter(prefix='/v1/users/me/export', tags=['Export'])
 
@@ -53,12 +48,19 @@ def _state(tracker) -> str:
     return 'none'
 
 
+def _trackers(db: Session, tracker_model, user_pk: int):
+    """Every tracker of one domain, with its dense rank derived up front."""
+    trackers = db.query(tracker_model).filter(tracker_model.user_id == user_pk).all()
+    rankings.attach_positions(db, trackers)
+    return trackers
+
+
 def _movies(db: Session, user_pk: int):
-    return db.query(DbUserMovie).filter(DbUserMovie.user_id == user_pk).all()
+    return _trackers(db, DbUserMovie, user_pk)
 
 
 def _shows(db: Session, user_pk: int):
-    return db.query(DbUserTVShow).filter(DbUserTVShow.user_id == user_pk).all()
+    return _trackers(db, DbUserTVShow, user_pk)
 
 
 def _episode_marks(db: Session, user_pk: int):
@@ -71,49 +73,34 @@ def _episode_marks(db: Session, user_pk: int):
 
 
 def _books(db: Session, user_pk: int):
-    return db.query(DbUserBook).filter(DbUserBook.user_id == user_pk).all()
+    return _trackers(db, DbUserBook, user_pk)
 
 
 def _games(db: Session, user_pk: int):
-    return db.query(DbUserVideoGame).filter(DbUserVideoGame.user_id == user_pk).all()
+    return _trackers(db, DbUserVideoGame, user_pk)
 
 
-@router.get('')
+@router.get('', response_model=DataExport)
 def export_json(
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
 ):
     """
     Full-fidelity JSON export of every domain, using the same schemas the
-    API serves — anything the UI can show is in here.
+    API serves — anything the UI can show is in here. The rows go straight
+    to ``response_model``, which validates and serializes them once.
     """
     user = current_user[0]
-    payload = {
-        'exported_at': datetime.now(timezone.utc).isoformat(),
+    return {
+        'exported_at': datetime.now(timezone.utc),
         'account': {'email': user.email, 'display_name': user.display_name},
         'licenses': LICENSES,
-        'movies': [
-            UserMovieResponse.model_validate(t).model_dump(mode='json')
-            for t in _movies(db, user.pk)
-        ],
-        'tv_shows': [
-            UserTVShowResponse.model_validate(t).model_dump(mode='json')
-            for t in _shows(db, user.pk)
-        ],
-        'tv_episode_marks': [
-            UserTVEpisodeResponse.model_validate(t).model_dump(mode='json')
-            for t in _episode_marks(db, user.pk)
-        ],
-        'books': [
-            UserBookResponse.model_validate(t).model_dump(mode='json')
-            for t in _books(db, user.pk)
-        ],
-        'games': [
-            UserVideoGameResponse.model_validate(t).model_dump(mode='json')
-            for t in _games(db, user.pk)
-        ],
+        'movies': _movies(db, user.pk),
+        'tv_shows': _shows(db, user.pk),
+        'tv_episode_marks': _episode_marks(db, user.pk),
+        'books': _books(db, user.pk),
+        'games': _games(db, user.pk),
     }
-    return payload
 
 
 def _csv_response(filename: str, header: list, rows: list) -> Response:
@@ -8,30 +8,30 @@ and per-user trackers with independent Watchlist (backlog) / Rankings
 (played) lists plus a 100%-completion flag.
 """
 
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session, joinedload
 
 from app.db.database import get_db
+from app.services import local_search, ranking_guard, rankings
+from app.services.ranking_guard import RankingWrite, ranking_write
 from app.services.rate_limit import catalog_add_cap, search_rate_limit
+from app.services import tracker_query
+from app.services.fieldsets import Fieldset, fieldset, tracker_options
 from app.services.tracker_query import (
     apply_list_params,
-    guard_truncation,
     list_params,
+    paginate,
 )
-from app.services.tracker_rules import (
-    default_completed_at,
-    enforce_single_home,
-    utc_now,
-)
+from app.services.tracker_rules import default_completed_at, enforce_single_home
 from app.db.models_sandbox import DbVideoGame, DbUserVideoGame
 from app.auth.oauth2 import get_current_user, require_admin
 from app.schemas.schemas_sandbox import (
     GameRankingReorder,
     GameSearchResult,
     RankPlacement,
+    TrackerChanges,
     UserVideoGameCreate,
     UserVideoGameResponse,
     UserVideoGameUpdate,
@@ -53,8 +53,14 @@ router = APIRouter(prefix='/v1', tags=['Video Games'])
 
 # Global Entity Endpoints
 @router.get('/games', response_model=List[VideoGameSummary])
-def get_all_games(db: Session = Depends(get_db)):
-    return db.query(DbVideoGame).all()
+def get_all_games(
+    db: Session = Depends(get_db),
+    fields: Optional[Fieldset] = Depends(fieldset(VideoGameSummary)),
+):
+    query = db.query(DbVideoGame)
+    if fields is None:
+        return query.all()
+    return fields.respond(query.options(*fields.load_options(DbVideoGame)).all())
 
 
 @router.get(
@@ -107,6 +113,7 @@ def create_game(
     db.add(new_game)
     db.commit()
     db.refresh(new_game)
+    local_search.upsert('games', new_game)
     return new_game
 
 
@@ -145,6 +152,7 @@ def update_game(
 
     db.commit()
     db.refresh(game)
+    local_search.upsert('games', game)
     return game
 
 
@@ -158,6 +166,7 @@ def delete_game(
     game = _get_game(db, game_id)
     db.delete(game)
     db.commit()
+    local_search.remove('games', game_id)
     return None
 
 
@@ -179,47 +188,50 @@ def _get_tracker(db: Session, user_pk: int, game_pk: int):
     )
 
 
-def _placed_count(db: Session, user_pk: int) -> int:
-    """Number of games with an assigned rank position for this user."""
-    return (
-        db.query(func.count())  # pylint: disable=not-callable
-        .select_from(DbUserVideoGame)
-        .filter(
-            DbUserVideoGame.user_id == user_pk,
-            DbUserVideoGame.on_rankings.is_(True),
-            DbUserVideoGame.rank.isnot(None),
-        )
-        .scalar()
+@router.get('/users/me/games', response_model=List[UserVideoGameResponse])
+def get_user_games(
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: list = Depends(get_current_user),
+    params: dict = Depends(list_params),
+    fields: Optional[Fieldset] = Depends(fieldset(UserVideoGameResponse)),
+):
+    query = (
+        db.query(DbUserVideoGame)
+        .options(*tracker_options(fields, DbUserVideoGame.game))
+        .filter(DbUserVideoGame.user_id == current_user[0].pk)
     )
-
-
-def _close_rank_gap(db: Session, user_pk: int, vacated_rank) -> None:
-    """After a ranked item leaves the list, shift everything below it up."""
-    if vacated_rank is None:
-        return
-    db.query(DbUserVideoGame).filter(
-        DbUserVideoGame.user_id == user_pk,
-        DbUserVideoGame.on_rankings.is_(True),
-        DbUserVideoGame.rank.isnot(None),
-        DbUserVideoGame.rank > vacated_rank,
-    ).update(
-        {DbUserVideoGame.rank: DbUserVideoGame.rank - 1}, synchronize_session=False
+    rows = paginate(
+        apply_list_params(query, DbUserVideoGame, params).all(), params, response
     )
+    if fields is None or fields.wants('rank'):
+        rankings.attach_positions(db, rows)
+    # The ranking version a following write's If-Match should carry.
+    response.headers['ETag'] = ranking_guard.current_etag(db, current_user[0].pk)
+    return rows if fields is None else fields.respond(rows, response)
 
 
-@router.get('/users/me/games', response_model=List[UserVideoGameResponse])
-def get_user_games(
+@router.get(
+    '/users/me/games/changes', response_model=TrackerChanges[UserVideoGameResponse]
+)
+def get_user_game_changes(
+    since: int = Query(
+        0, ge=0, description='Token from the previous sync (0: the whole list)'
+    ),
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
-    params: dict = Depends(list_params),
 ):
+    """
+    Delta sync: game trackers written since ``since``, tombstones for
+    deleted ones, and the token to pass next time.
+    """
+    user_pk = current_user[0].pk
     query = (
         db.query(DbUserVideoGame)
         .options(joinedload(DbUserVideoGame.game))
-        .filter(DbUserVideoGame.user_id == current_user[0].pk)
+        .filter(DbUserVideoGame.user_id == user_pk)
     )
-    rows = apply_list_params(query, DbUserVideoGame, params).all()
-    return guard_truncation(rows, params, 'Game')
+    return tracker_query.changes(db, query, DbUserVideoGame, user_pk, since)
 
 
 @router.put(
@@ -229,30 +241,22 @@ def reorder_rankings(
     request: GameRankingReorder,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
     """Persist a new ranking order (drag-and-drop). Rank = position in the list."""
-    user_pk = current_user[0].pk
-    for position, game_id in enumerate(request.game_ids, start=1):
-        game = db.query(DbVideoGame).filter(DbVideoGame.id == game_id).first()
-        if not game:
-            continue
-        tracker = _get_tracker(db, user_pk, game.pk)
-        if tracker:
-            if tracker.rank != position:
-                tracker.ranked_at = utc_now()
-            tracker.rank = position
-            tracker.on_rankings = True
-            tracker.on_watchlist = False
-    db.commit()
-    return (
-        db.query(DbUserVideoGame)
-        .filter(
-            DbUserVideoGame.user_id == user_pk,
-            DbUserVideoGame.on_rankings.is_(True),
-        )
-        .order_by(DbUserVideoGame.rank)
-        .all()
+    if guard.replay is not None:
+        return guard.replay
+    guard.claim()
+    result = rankings.reorder(
+        db,
+        current_user[0].pk,
+        request.game_ids,
+        tracker_model=DbUserVideoGame,
+        catalog_model=DbVideoGame,
+        join_col='game_id',
+        relation='game',
     )
+    return guard.respond(List[UserVideoGameResponse], result)
 
 
 @router.get('/users/me/games/{game_id}', response_model=UserVideoGameResponse)
@@ -277,12 +281,15 @@ def set_game_rank(
     request: RankPlacement,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
     """
     Place a game at an exact 1-based position in the ranked list, shifting the
     games at and below that position down by one. Works for a not-yet-ranked
     game (jump it in) or an already-ranked one (move it).
     """
+    if guard.replay is not None:
+        return guard.replay
     user_pk = current_user[0].pk
     game = _get_game(db, game_id)
     tracker = _get_tracker(db, user_pk, game.pk)
@@ -291,40 +298,15 @@ def set_game_rank(
             status_code=status.HTTP_404_NOT_FOUND, detail='Game not marked'
         )
 
-    old_rank = tracker.rank
+    guard.claim()
     was_on_rankings = tracker.on_rankings
     tracker.on_rankings = True
     tracker.on_watchlist = False
     default_completed_at(tracker, was_on_rankings)
-    # Remove from its current slot first so the shift math excludes it.
-    tracker.rank = None
-    db.flush()
-    if old_rank is not None:
-        db.query(DbUserVideoGame).filter(
-            DbUserVideoGame.user_id == user_pk,
-            DbUserVideoGame.on_rankings.is_(True),
-            DbUserVideoGame.rank.isnot(None),
-            DbUserVideoGame.rank > old_rank,
-        ).update(
-            {DbUserVideoGame.rank: DbUserVideoGame.rank - 1},
-            synchronize_session=False,
-        )
-
-    target = max(1, min(request.position, _placed_count(db, user_pk) + 1))
-    db.query(DbUserVideoGame).filter(
-        DbUserVideoGame.user_id == user_pk,
-        DbUserVideoGame.on_rankings.is_(True),
-        DbUserVideoGame.rank.isnot(None),
-        DbUserVideoGame.rank >= target,
-    ).update(
-        {DbUserVideoGame.rank: DbUserVideoGame.rank + 1}, synchronize_session=False
-    )
-
-    tracker.rank = target
-    tracker.ranked_at = utc_now()
+    rankings.place(db, tracker, request.position)
     db.commit()
     db.refresh(tracker)
-    return tracker
+    return guard.respond(UserVideoGameResponse, tracker)
 
 
 @router.post(
@@ -337,16 +319,19 @@ def mark_game(
     request: UserVideoGameCreate,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
     """Add a game to the user's lists (idempotent — merges list membership)."""
+    if guard.replay is not None:
+        return guard.replay
     user_pk = current_user[0].pk
     game = _get_game(db, game_id)
     tracker = _get_tracker(db, user_pk, game.pk)
     data = request.model_dump(exclude_unset=True)
 
+    guard.claim()
     if tracker is None:
         was_on_rankings = False
-        old_rank = None
         tracker = DbUserVideoGame(
             user_id=user_pk,
             game_id=game.pk,
@@ -359,7 +344,6 @@ def mark_game(
         db.add(tracker)
     else:
         was_on_rankings = tracker.on_rankings
-        old_rank = tracker.rank
         for key in (
             'on_watchlist',
             'on_rankings',
@@ -376,13 +360,10 @@ def mark_game(
     enforce_single_home(tracker, data)
     default_completed_at(tracker, was_on_rankings)
     if not tracker.on_rankings or not was_on_rankings:
-        tracker.rank = None
-        tracker.ranked_at = None
-    if old_rank is not None and tracker.rank is None:
-        _close_rank_gap(db, user_pk, old_rank)
+        rankings.unplace(tracker)
     db.commit()
     db.refresh(tracker)
-    return tracker
+    return guard.respond(UserVideoGameResponse, tracker, status.HTTP_201_CREATED)
 
 
 @router.put('/users/me/games/{game_id}', response_model=UserVideoGameResponse)
@@ -391,8 +372,11 @@ def update_user_game(
     request: UserVideoGameUpdate,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
     """Update list membership, rank, notes, or 100% flag for a tracked game."""
+    if guard.replay is not None:
+        return guard.replay
     user_pk = current_user[0].pk
     game = _get_game(db, game_id)
     tracker = _get_tracker(db, user_pk, game.pk)
@@ -401,9 +385,11 @@ def update_user_game(
             status_code=status.HTTP_404_NOT_FOUND, detail='Game not marked'
         )
 
-    old_rank = tracker.rank
+    guard.claim()
     was_on_rankings = tracker.on_rankings
     data = request.model_dump(exclude_unset=True)
+    # ``rank`` is a position, not a column: it re-places the entry.
+    placement = data.pop('rank', None)
     for key, value in data.items():
         setattr(tracker, key, value)
     enforce_single_home(tracker, data)
@@ -412,23 +398,20 @@ def update_user_game(
     # Entering Rankings (or leaving it) resets to unplaced so a stale/leftover
     # rank never places the game automatically; it lands in "to rank" instead.
     if not tracker.on_rankings or not was_on_rankings:
-        tracker.rank = None
-        tracker.ranked_at = None
-
-    # A removed placement leaves a gap — shift everything below it up.
-    if old_rank is not None and tracker.rank is None:
-        _close_rank_gap(db, user_pk, old_rank)
+        rankings.unplace(tracker)
+    elif placement is not None:
+        rankings.place(db, tracker, placement)
 
     # If it's on neither list, drop the tracker entirely.
     if not tracker.on_watchlist and not tracker.on_rankings:
         response = UserVideoGameResponse.model_validate(tracker)
         db.delete(tracker)
         db.commit()
-        return response
+        return guard.respond(UserVideoGameResponse, response)
 
     db.commit()
     db.refresh(tracker)
-    return tracker
+    return guard.respond(UserVideoGameResponse, tracker)
 
 
 @router.delete('/users/me/games/{game_id}', status_code=status.HTTP_204_NO_CONTENT)
@@ -436,7 +419,10 @@ def unmark_game(
     game_id: str,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
+    if guard.replay is not None:
+        return guard.replay
     user_pk = current_user[0].pk
     game = _get_game(db, game_id)
     tracker = _get_tracker(db, user_pk, game.pk)
@@ -444,7 +430,7 @@ def unmark_game(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail='Game not marked'
         )
-    _close_rank_gap(db, user_pk, tracker.rank)
+    guard.claim()
     db.delete(tracker)
     db.commit()
-    return None
+    return guard.respond(None, None, status.HTTP_204_NO_CONTENT)
@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 
 from app.auth.oauth2 import get_current_user
 from app.db.database import get_db
+from app.services import public_profiles, summary
 from app.services.goodreads_import import import_goodreads_csv
 
 router = APIRouter(prefix='/v1/users/me/import', tags=['Import'])
@@ -42,6 +43,8 @@ async def import_goodreads(
         ) from exc
 
     report = import_goodreads_csv(db, current_user[0].pk, content)
+    summary.invalidate(current_user[0].pk)
+    public_profiles.invalidate(current_user[0].pk)
     return {
         'books_created': report.books_created,
         'books_matched': report.books_matched,
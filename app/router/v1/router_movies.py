@@ -3,19 +3,16 @@
 This module contains the API routes for Movies.
 """
 
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session, joinedload
 
 from app.db.database import get_db
+from app.services import local_search, ranking_guard, rankings
+from app.services.ranking_guard import RankingWrite, ranking_write
 from app.services.rate_limit import catalog_add_cap, search_rate_limit
-from app.services.tracker_rules import (
-    default_completed_at,
-    enforce_single_home,
-    utc_now,
-)
+from app.services.tracker_rules import default_completed_at, enforce_single_home
 from app.db.models_sandbox import DbMovie, DbUserMovie
 from app.auth.oauth2 import get_current_user, require_admin
 from app.schemas.schemas_sandbox import (
@@ -25,6 +22,7 @@ from app.schemas.schemas_sandbox import (
     MovieUpdate,
     RankPlacement,
     RankingReorder,
+    TrackerChanges,
     UserMovieCreate,
     UserMovieResponse,
     UserMovieUpdate,
@@ -36,10 +34,12 @@ from app.services.movie_search import (
 )
 from app.services.search_correction import correct_query
 from app.services.tracked_status import attach_tracked_status
+from app.services import tracker_query
+from app.services.fieldsets import Fieldset, fieldset, tracker_options
 from app.services.tracker_query import (
     apply_list_params,
-    guard_truncation,
     list_params,
+    paginate,
 )
 
 router = APIRouter(prefix='/v1', tags=['Movies'])
@@ -47,8 +47,14 @@ router = APIRouter(prefix='/v1', tags=['Movies'])
 
 # Global Entity Endpoints
 @router.get('/movies', response_model=List[MovieResponse])
-def get_all_movies(db: Session = Depends(get_db)):
-    return db.query(DbMovie).all()
+def get_all_movies(
+    db: Session = Depends(get_db),
+    fields: Optional[Fieldset] = Depends(fieldset(MovieResponse)),
+):
+    query = db.query(DbMovie)
+    if fields is None:
+        return query.all()
+    return fields.respond(query.options(*fields.load_options(DbMovie)).all())
 
 
 @router.get(
@@ -97,6 +103,7 @@ def create_movie(
     db.add(new_movie)
     db.commit()
     db.refresh(new_movie)
+    local_search.upsert('movies', new_movie)
     return new_movie
 
 
@@ -139,6 +146,7 @@ def update_movie(
 
     db.commit()
     db.refresh(movie)
+    local_search.upsert('movies', movie)
     return movie
 
 
@@ -156,6 +164,7 @@ def delete_movie(
         )
     db.delete(movie)
     db.commit()
+    local_search.remove('movies', movie_id)
     return None
 
 
@@ -177,45 +186,50 @@ def _get_tracker(db: Session, user_pk: int, movie_pk: int):
     )
 
 
-def _placed_count(db: Session, user_pk: int) -> int:
-    """Number of movies with an assigned rank position for this user."""
-    return (
-        db.query(func.count())  # pylint: disable=not-callable
-        .select_from(DbUserMovie)
-        .filter(
-            DbUserMovie.user_id == user_pk,
-            DbUserMovie.on_rankings.is_(True),
-            DbUserMovie.rank.isnot(None),
-        )
-        .scalar()
-    )
-
-
-def _close_rank_gap(db: Session, user_pk: int, vacated_rank) -> None:
-    """After a ranked item leaves the list, shift everything below it up."""
-    if vacated_rank is None:
-        return
-    db.query(DbUserMovie).filter(
-        DbUserMovie.user_id == user_pk,
-        DbUserMovie.on_rankings.is_(True),
-        DbUserMovie.rank.isnot(None),
-        DbUserMovie.rank > vacated_rank,
-    ).update({DbUserMovie.rank: DbUserMovie.rank - 1}, synchronize_session=False)
-
-
 @router.get('/users/me/movies', response_model=List[UserMovieResponse])
 def get_user_movies(
+    response: Response,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
     params: dict = Depends(list_params),
+    fields: Optional[Fieldset] = Depends(fieldset(UserMovieResponse)),
 ):
     query = (
         db.query(DbUserMovie)
-        .options(joinedload(DbUserMovie.movie))
+        .options(*tracker_options(fields, DbUserMovie.movie))
         .filter(DbUserMovie.user_id == current_user[0].pk)
     )
-    rows = apply_list_params(query, DbUserMovie, params).all()
-    return guard_truncation(rows, params, 'Movie')
+    rows = paginate(
+        apply_list_params(query, DbUserMovie, params).all(), params, response
+    )
+    if fields is None or fields.wants('rank'):
+        rankings.attach_positions(db, rows)
+    # The ranking version a following write's If-Match should carry.
+    response.headers['ETag'] = ranking_guard.current_etag(db, current_user[0].pk)
+    return rows if fields is None else fields.respond(rows, response)
+
+
+@router.get(
+    '/users/me/movies/changes', response_model=TrackerChanges[UserMovieResponse]
+)
+def get_user_movie_changes(
+    since: int = Query(
+        0, ge=0, description='Token from the previous sync (0: the whole list)'
+    ),
+    db: Session = Depends(get_db),
+    current_user: list = Depends(get_current_user),
+):
+    """
+    Delta sync: movie trackers written since ``since``, tombstones for
+    deleted ones, and the token to pass next time.
+    """
+    user_pk = current_user[0].pk
+    query = (
+        db.query(DbUserMovie)
+        .options(joinedload(DbUserMovie.movie))
+        .filter(DbUserMovie.user_id == user_pk)
+    )
+    return tracker_query.changes(db, query, DbUserMovie, user_pk, since)
 
 
 @router.get('/users/me/movies/{movie_id}', response_model=UserMovieResponse)
@@ -239,27 +253,22 @@ def reorder_rankings(
     request: RankingReorder,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
     """Persist a new ranking order (drag-and-drop). Rank = position in the list."""
-    user_pk = current_user[0].pk
-    for position, movie_id in enumerate(request.movie_ids, start=1):
-        movie = db.query(DbMovie).filter(DbMovie.id == movie_id).first()
-        if not movie:
-            continue
-        tracker = _get_tracker(db, user_pk, movie.pk)
-        if tracker:
-            if tracker.rank != position:
-                tracker.ranked_at = utc_now()
-            tracker.rank = position
-            tracker.on_rankings = True
-            tracker.on_watchlist = False
-    db.commit()
-    return (
-        db.query(DbUserMovie)
-        .filter(DbUserMovie.user_id == user_pk, DbUserMovie.on_rankings.is_(True))
-        .order_by(DbUserMovie.rank)
-        .all()
+    if guard.replay is not None:
+        return guard.replay
+    guard.claim()
+    result = rankings.reorder(
+        db,
+        current_user[0].pk,
+        request.movie_ids,
+        tracker_model=DbUserMovie,
+        catalog_model=DbMovie,
+        join_col='movie_id',
+        relation='movie',
     )
+    return guard.respond(List[UserMovieResponse], result)
 
 
 @router.put('/users/me/movies/{movie_id}/rank', response_model=UserMovieResponse)
@@ -268,12 +277,15 @@ def set_movie_rank(
     request: RankPlacement,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
     """
     Place a movie at an exact 1-based position in the ranked list, shifting the
     movies at and below that position down by one. Works for a not-yet-ranked
     movie (jump it in) or an already-ranked one (move it).
     """
+    if guard.replay is not None:
+        return guard.replay
     user_pk = current_user[0].pk
     movie = _get_movie(db, movie_id)
     tracker = _get_tracker(db, user_pk, movie.pk)
@@ -282,35 +294,15 @@ def set_movie_rank(
             status_code=status.HTTP_404_NOT_FOUND, detail='Movie not marked'
         )
 
-    old_rank = tracker.rank
+    guard.claim()
     was_on_rankings = tracker.on_rankings
     tracker.on_rankings = True
     tracker.on_watchlist = False
     default_completed_at(tracker, was_on_rankings)
-    # Remove from its current slot first so the shift math excludes it.
-    tracker.rank = None
-    db.flush()
-    if old_rank is not None:
-        db.query(DbUserMovie).filter(
-            DbUserMovie.user_id == user_pk,
-            DbUserMovie.on_rankings.is_(True),
-            DbUserMovie.rank.isnot(None),
-            DbUserMovie.rank > old_rank,
-        ).update({DbUserMovie.rank: DbUserMovie.rank - 1}, synchronize_session=False)
-
-    target = max(1, min(request.position, _placed_count(db, user_pk) + 1))
-    db.query(DbUserMovie).filter(
-        DbUserMovie.user_id == user_pk,
-        DbUserMovie.on_rankings.is_(True),
-        DbUserMovie.rank.isnot(None),
-        DbUserMovie.rank >= target,
-    ).update({DbUserMovie.rank: DbUserMovie.rank + 1}, synchronize_session=False)
-
-    tracker.rank = target
-    tracker.ranked_at = utc_now()
+    rankings.place(db, tracker, request.position)
     db.commit()
     db.refresh(tracker)
-    return tracker
+    return guard.respond(UserMovieResponse, tracker)
 
 
 @router.post(
@@ -323,16 +315,19 @@ def mark_movie(
     request: UserMovieCreate,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
     """Add a movie to the user's lists (idempotent — merges list membership)."""
+    if guard.replay is not None:
+        return guard.replay
     user_pk = current_user[0].pk
     movie = _get_movie(db, movie_id)
     tracker = _get_tracker(db, user_pk, movie.pk)
     data = request.model_dump(exclude_unset=True)
 
+    guard.claim()
     if tracker is None:
         was_on_rankings = False
-        old_rank = None
         tracker = DbUserMovie(
             user_id=user_pk,
             movie_id=movie.pk,
@@ -344,7 +339,6 @@ def mark_movie(
         db.add(tracker)
     else:
         was_on_rankings = tracker.on_rankings
-        old_rank = tracker.rank
         for key in ('on_watchlist', 'on_rankings', 'notes', 'completed_at'):
             if key in data:
                 setattr(tracker, key, data[key])
@@ -355,13 +349,10 @@ def mark_movie(
     enforce_single_home(tracker, data)
     default_completed_at(tracker, was_on_rankings)
     if not tracker.on_rankings or not was_on_rankings:
-        tracker.rank = None
-        tracker.ranked_at = None
-    if old_rank is not None and tracker.rank is None:
-        _close_rank_gap(db, user_pk, old_rank)
+        rankings.unplace(tracker)
     db.commit()
     db.refresh(tracker)
-    return tracker
+    return guard.respond(UserMovieResponse, tracker, status.HTTP_201_CREATED)
 
 
 @router.put('/users/me/movies/{movie_id}', response_model=UserMovieResponse)
@@ -370,8 +361,11 @@ def update_user_movie(
     request: UserMovieUpdate,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
     """Update list membership, rank, or notes for a tracked movie."""
+    if guard.replay is not None:
+        return guard.replay
     user_pk = current_user[0].pk
     movie = _get_movie(db, movie_id)
     tracker = _get_tracker(db, user_pk, movie.pk)
@@ -380,9 +374,11 @@ def update_user_movie(
             status_code=status.HTTP_404_NOT_FOUND, detail='Movie not marked'
         )
 
-    old_rank = tracker.rank
+    guard.claim()
     was_on_rankings = tracker.on_rankings
     data = request.model_dump(exclude_unset=True)
+    # ``rank`` is a position, not a column: it re-places the entry.
+    placement = data.pop('rank', None)
     for key, value in data.items():
         setattr(tracker, key, value)
     enforce_single_home(tracker, data)
@@ -391,23 +387,20 @@ def update_user_movie(
     # Entering Rankings (or leaving it) resets to unplaced so a stale/leftover
     # rank never places the movie automatically; it lands in "to rank" instead.
     if not tracker.on_rankings or not was_on_rankings:
-        tracker.rank = None
-        tracker.ranked_at = None
-
-    # A removed placement leaves a gap — shift everything below it up.
-    if old_rank is not None and tracker.rank is None:
-        _close_rank_gap(db, user_pk, old_rank)
+        rankings.unplace(tracker)
+    elif placement is not None:
+        rankings.place(db, tracker, placement)
 
     # If it's on neither list, drop the tracker entirely.
     if not tracker.on_watchlist and not tracker.on_rankings:
         response = UserMovieResponse.model_validate(tracker)
         db.delete(tracker)
         db.commit()
-        return response
+        return guard.respond(UserMovieResponse, response)
 
     db.commit()
     db.refresh(tracker)
-    return tracker
+    return guard.respond(UserMovieResponse, tracker)
 
 
 @router.delete('/users/me/movies/{movie_id}', status_code=status.HTTP_204_NO_CONTENT)
@@ -415,7 +408,10 @@ def unmark_movie(
     movie_id: str,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
+    if guard.replay is not None:
+        return guard.replay
     user_pk = current_user[0].pk
     movie = _get_movie(db, movie_id)
     tracker = _get_tracker(db, user_pk, movie.pk)
@@ -423,7 +419,7 @@ def unmark_movie(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail='Movie not marked'
         )
-    _close_rank_gap(db, user_pk, tracker.rank)
+    guard.claim()
     db.delete(tracker)
     db.commit()
-    return None
+    return guard.respond(None, None, status.HTTP_204_NO_CONTENT)
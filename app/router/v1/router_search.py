@@ -2,22 +2,57 @@
 """
 Global cross-domain search: one query fanned out to every provider.
 
-Providers are independent external APIs, so they run in parallel; a provider
+Providers are independent external APIs, so they run concurrently; a provider
 failing (or being unconfigured) yields an empty list for its domain rather
 than failing the whole search. Domains that come back empty are retried once
 with a spelling correction — some providers fuzzy-match and some don't.
+
+The endpoint is async: the fan-out is an ``asyncio.gather`` over the
+providers, all awaited against one deadline per search
+(``SEARCH_PROVIDER_DEADLINE_SECONDS`` from the start of the request; the
+spelling retry spends what is left of it, not a fresh budget). A provider
+past the deadline contributes an empty domain instead of holding up the
+response; its call still finishes in the background and lands in the
+provider cache for the next search. The blocking provider clients run on
+bounded executors, one per provider, so no threads are created per request
+and a provider whose calls hang can only fill its own pool. Time spent
+queued for a worker counts against the deadline, and a call still queued
+when it passes is dropped.
+
+``/v1/search/stream`` is the same search as Server-Sent Events: one
+``domain`` event per domain as soon as its provider answers (ranked and
+tracked-status annotated, exactly as ``/v1/search`` would return it), then a
+final ``done`` event carrying the spelling correction, if one was used.
+
+``/v1/search/local`` is the typeahead: catalog titles we already have,
+answered from an in-process index (``local_search``) without any provider.
 """
 
+import asyncio
+import json
 from concurrent.futures import ThreadPoolExecutor
-from typing import Callable, Dict, List, Optional
+from typing import AsyncIterator, Callable, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.auth.oauth2 import get_current_user
+from app.config import get_settings
 from app.db.database import get_db
-from app.schemas.schemas_sandbox import GlobalSearchResponse
+from app.log.logging_config import logger
+from app.schemas.schemas_sandbox import (
+    BookSearchResult,
+    GameSearchResult,
+    GlobalSearchResponse,
+    LocalSearchResponse,
+    MovieSearchResult,
+    TVShowSearchResult,
+)
 from app.services.rate_limit import search_rate_limit
+from app.services import local_search
 from app.services.book_search import search_books
 from app.services.game_search import search_games
 from app.services.movie_search import search_movies
@@ -28,6 +63,23 @@ from app.services.tv_search import search_tv_shows
 
 router = APIRouter(prefix='/v1', tags=['Search'])
 
+# One pool per provider, shared by every search request.
+_executors = {
+    name: ThreadPoolExecutor(
+        max_workers=get_settings().search_workers, thread_name_prefix=f'search-{name}'
+    )
+    for name in ('movies', 'tv_shows', 'games', 'books')
+}
+
+# Serializers for streamed domain events (the REST path gets this from its
+# response_model).
+_RESULT_ADAPTERS = {
+    'movies': TypeAdapter(List[MovieSearchResult]),
+    'tv_shows': TypeAdapter(List[TVShowSearchResult]),
+    'games': TypeAdapter(List[GameSearchResult]),
+    'books': TypeAdapter(List[BookSearchResult]),
+}
+
 
 def _providers() -> Dict[str, Callable[[str], List[dict]]]:
     # Resolved at call time (not module load) so tests can patch the
@@ -40,20 +92,66 @@ def _providers() -> Dict[str, Callable[[str], List[dict]]]:
     }
 
 
-def _fan_out(q: str, only: Optional[List[str]] = None) -> Dict[str, List[dict]]:
-    def run(fn: Callable[[str], List[dict]]) -> List[dict]:
-        try:
-            return fn(q)
-        except HTTPException:
-            # Unconfigured/unavailable provider: skip its domain, keep the rest.
-            return []
+def _deadline() -> float:
+    """Event-loop time by which the current search has to answer."""
+    budget = get_settings().search_provider_deadline_seconds
+    return asyncio.get_running_loop().time() + budget
+
 
+async def _search_domain(
+    name: str, fn: Callable[[str], List[dict]], q: str, deadline: float
+) -> List[dict]:
+    loop = asyncio.get_running_loop()
+    call = loop.run_in_executor(_executors[name], fn, q)
+    try:
+        return await asyncio.wait_for(call, timeout=deadline - loop.time())
+    except HTTPException:
+        # Unconfigured/unavailable provider: skip its domain, keep the rest.
+        return []
+    except asyncio.TimeoutError:
+        logger.warning('search: %s missed the search deadline', name)
+        return []
+    finally:
+        # Drops the call if it is still queued; a running one can't be
+        # interrupted and finishes in the background.
+        call.cancel()
+
+
+async def _named_search(
+    name: str, fn: Callable[[str], List[dict]], q: str, deadline: float
+):
+    return name, await _search_domain(name, fn, q, deadline)
+
+
+async def _fan_out(
+    q: str, deadline: float, only: Optional[List[str]] = None
+) -> Dict[str, List[dict]]:
     providers = _providers()
     if only is not None:
         providers = {name: fn for name, fn in providers.items() if name in only}
-    with ThreadPoolExecutor(max_workers=max(len(providers), 1)) as pool:
-        futures = {name: pool.submit(run, fn) for name, fn in providers.items()}
-        return {name: future.result() for name, future in futures.items()}
+    hits = await asyncio.gather(
+        *(_search_domain(name, fn, q, deadline) for name, fn in providers.items())
+    )
+    return dict(zip(providers, hits))
+
+
+def _rank_and_annotate(
+    db: Session,
+    user_pk: int,
+    results: Dict[str, List[dict]],
+    query_by_domain: Dict[str, str],
+) -> Dict[str, List[dict]]:
+    # Cap to the top DEFAULT_DOMAIN_CAP per domain, best match first (see
+    # search_ranking for the exact-match/partial-match/popularity
+    # heuristic), before the tracked-status lookup so it only does DB work
+    # for the results that are actually shown.
+    results = {
+        domain: rank_and_cap(query_by_domain[domain], hits)
+        for domain, hits in results.items()
+    }
+    for domain, hits in results.items():
+        attach_tracked_status(db, user_pk, hits, domain)
+    return results
 
 
 @router.get(
@@ -61,12 +159,13 @@ def _fan_out(q: str, only: Optional[List[str]] = None) -> Dict[str, List[dict]]:
     response_model=GlobalSearchResponse,
     dependencies=[Depends(search_rate_limit)],
 )
-def global_search(
+async def global_search(
     q: str,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
 ):
-    results = _fan_out(q)
+    deadline = _deadline()
+    results = await _fan_out(q, deadline)
     corrected = None
     # Track which query actually produced each domain's hits, so ranking
     # (below) scores against the right string.
@@ -75,23 +174,101 @@ def global_search(
     # that came back empty with a spell-corrected query.
     empty = [name for name, hits in results.items() if not hits]
     if empty:
-        respelled = correct_query(q)
+        respelled = await run_in_threadpool(correct_query, q)
         if respelled:
-            retried = _fan_out(respelled, only=empty)
+            retried = await _fan_out(respelled, deadline, only=empty)
             if any(retried.values()):
                 corrected = respelled
                 results.update(retried)
                 for name in empty:
                     query_by_domain[name] = respelled
-    # Cap to the top DEFAULT_DOMAIN_CAP per domain, best match first (see
-    # search_ranking for the exact-match/partial-match/popularity
-    # heuristic), before the tracked-status lookup so it only does DB work
-    # for the results that are actually shown.
-    results = {
-        domain: rank_and_cap(query_by_domain[domain], hits)
-        for domain, hits in results.items()
-    }
-    user_pk = current_user[0].pk
-    for domain, hits in results.items():
-        attach_tracked_status(db, user_pk, hits, domain)
+    # The ranking and tracked-status queries are blocking DB work.
+    results = await run_in_threadpool(
+        _rank_and_annotate, db, current_user[0].pk, results, query_by_domain
+    )
     return GlobalSearchResponse(query=q, corrected=corrected, **results)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+async def _domain_event(
+    db: Session, user_pk: int, domain: str, query: str, hits: List[dict]
+) -> str:
+    ranked = await run_in_threadpool(
+        _rank_and_annotate, db, user_pk, {domain: hits}, {domain: query}
+    )
+    adapter = _RESULT_ADAPTERS[domain]
+    payload = adapter.dump_python(adapter.validate_python(ranked[domain]), mode='json')
+    return _sse('domain', {'domain': domain, 'query': query, 'hits': payload})
+
+
+async def _stream_search(q: str, db: Session, user_pk: int) -> AsyncIterator[str]:
+    deadline = _deadline()
+    tasks = [
+        asyncio.ensure_future(_named_search(name, fn, q, deadline))
+        for name, fn in _providers().items()
+    ]
+    try:
+        # Domains with hits go out as they land; empty ones wait for the
+        # spelling retry so every domain is sent exactly once.
+        empty = []
+        for next_done in asyncio.as_completed(tasks):
+            domain, hits = await next_done
+            if hits:
+                yield await _domain_event(db, user_pk, domain, q, hits)
+            else:
+                empty.append(domain)
+        corrected = None
+        retried: Dict[str, List[dict]] = {}
+        if empty:
+            respelled = await run_in_threadpool(correct_query, q)
+            if respelled:
+                retried = await _fan_out(respelled, deadline, only=empty)
+                if any(retried.values()):
+                    corrected = respelled
+        for domain in empty:
+            hits = retried.get(domain) or []
+            query = corrected if hits else q
+            yield await _domain_event(db, user_pk, domain, query, hits)
+        yield _sse('done', {'query': q, 'corrected': corrected})
+    finally:
+        # Client went away mid-stream: stop waiting on the rest.
+        for task in tasks:
+            task.cancel()
+
+
+@router.get('/search/stream', dependencies=[Depends(search_rate_limit)])
+async def stream_search(
+    q: str,
+    db: Session = Depends(get_db),
+    current_user: list = Depends(get_current_user),
+):
+    return StreamingResponse(
+        _stream_search(q, db, current_user[0].pk),
+        media_type='text/event-stream',
+        # Keep proxies from buffering the events.
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@router.get('/search/local', response_model=LocalSearchResponse)
+def local_typeahead(
+    q: str,
+    domain: Optional[List[str]] = Query(None),
+    limit: int = Query(10, ge=1, le=25),
+    db: Session = Depends(get_db),
+    current_user: list = Depends(get_current_user),
+):
+    # Not behind search_rate_limit: it is per keystroke and never leaves
+    # the process.
+    del current_user
+    unknown = set(domain or ()) - set(local_search.CATALOGS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f'Unknown domain: {", ".join(sorted(unknown))}',
+        )
+    hits = local_search.search(db, q, domains=domain, limit=limit)
+    return LocalSearchResponse(query=q, hits=hits)
@@ -10,16 +10,20 @@ Watchlist/Rankings lists plus episode-level watched marks.
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session, joinedload
 
 from app.db.database import get_db
+from app.services import local_search, ranking_guard, rankings
+from app.services.ranking_guard import RankingWrite, ranking_write
 from app.services.rate_limit import catalog_add_cap, search_rate_limit
+from app.services import tracker_query, tv_progress, tv_schedule
+from app.services.fieldsets import Fieldset, fieldset, tracker_options
 from app.services.tracker_query import (
     apply_list_params,
-    guard_truncation,
     list_params,
+    paginate,
 )
 from app.services.tracker_rules import (
     default_completed_at,
@@ -30,8 +34,6 @@ from app.db.models_sandbox import DbTVShow, DbUserTVShow, DbTVEpisode, DbUserTVE
 from app.auth.oauth2 import get_current_user, require_admin
 from app.schemas.schemas_sandbox import (
     RankPlacement,
-    ScheduleEpisodeItem,
-    ScheduleFrozenShow,
     ScheduleResponse,
     TVEpisodeCreate,
     TVEpisodeResponse,
@@ -42,6 +44,7 @@ from app.schemas.schemas_sandbox import (
     TVShowSearchResult,
     TVShowSummary,
     TVShowUpdate,
+    TrackerChanges,
     UserTVEpisodeResponse,
     UserTVShowCreate,
     UserTVShowResponse,
@@ -62,8 +65,14 @@ router = APIRouter(prefix='/v1', tags=['TV'])
 
 # Global Entity Endpoints
 @router.get('/tv-shows', response_model=List[TVShowSummary])
-def get_all_tv_shows(db: Session = Depends(get_db)):
-    return db.query(DbTVShow).all()
+def get_all_tv_shows(
+    db: Session = Depends(get_db),
+    fields: Optional[Fieldset] = Depends(fieldset(TVShowSummary)),
+):
+    query = db.query(DbTVShow)
+    if fields is None:
+        return query.all()
+    return fields.respond(query.options(*fields.load_options(DbTVShow)).all())
 
 
 @router.get(
@@ -124,6 +133,7 @@ def create_tv_show(
     sync_episodes(db, new_show)
     db.commit()
     db.refresh(new_show)
+    local_search.upsert('tv_shows', new_show)
     return new_show
 
 
@@ -163,6 +173,7 @@ def update_tv_show(
 
     db.commit()
     db.refresh(show)
+    local_search.upsert('tv_shows', show)
     return show
 
 
@@ -176,6 +187,7 @@ def delete_tv_show(
     show = _get_show(db, show_id)
     db.delete(show)
     db.commit()
+    local_search.remove('tv_shows', show_id)
     return None
 
 
@@ -293,32 +305,6 @@ def _get_tracker(db: Session, user_pk: int, show_pk: int):
     )
 
 
-def _placed_count(db: Session, user_pk: int) -> int:
-    """Number of shows with an assigned rank position for this user."""
-    return (
-        db.query(func.count())  # pylint: disable=not-callable
-        .select_from(DbUserTVShow)
-        .filter(
-            DbUserTVShow.user_id == user_pk,
-            DbUserTVShow.on_rankings.is_(True),
-            DbUserTVShow.rank.isnot(None),
-        )
-        .scalar()
-    )
-
-
-def _close_rank_gap(db: Session, user_pk: int, vacated_rank) -> None:
-    """After a ranked item leaves the list, shift everything below it up."""
-    if vacated_rank is None:
-        return
-    db.query(DbUserTVShow).filter(
-        DbUserTVShow.user_id == user_pk,
-        DbUserTVShow.on_rankings.is_(True),
-        DbUserTVShow.rank.isnot(None),
-        DbUserTVShow.rank > vacated_rank,
-    ).update({DbUserTVShow.rank: DbUserTVShow.rank - 1}, synchronize_session=False)
-
-
 def _watch_status(aired: int, watched: int, show_status: Optional[str]) -> str:
     """The per-show badge the legacy site showed next to each series."""
     if aired == 0 or watched == 0:
@@ -328,164 +314,138 @@ def _watch_status(aired: int, watched: int, show_status: Optional[str]) -> str:
     return 'complete' if show_status == 'Ended' else 'up_to_date'
 
 
+# UserTVShowWithStatus fields computed by _with_status.
+STATUS_FIELDS = ('watch_status', 'aired_count', 'watched_count')
+
+
+def _with_status(db: Session, user_pk: int, trackers: list) -> list:
+    """
+    Set each tracker's aired/watched counts and watch status (the extra
+    ``UserTVShowWithStatus`` fields) and return the trackers, so the response
+    is validated once, straight from the rows. The counts come from the
+    materialized ``tv_progress`` rows.
+    """
+    progress = tv_progress.counts(db, user_pk, (t.tv_show_id for t in trackers))
+    for tracker in trackers:
+        tracker.aired_count, tracker.watched_count, _ = progress.get(
+            tracker.tv_show_id, (0, 0, None)
+        )
+        tracker.watch_status = _watch_status(
+            tracker.aired_count, tracker.watched_count, tracker.tv_show.status
+        )
+    return trackers
+
+
 @router.get('/users/me/tv-shows', response_model=List[UserTVShowWithStatus])
 def get_user_tv_shows(
+    response: Response,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
     params: dict = Depends(list_params),
+    fields: Optional[Fieldset] = Depends(fieldset(UserTVShowWithStatus)),
 ):
     user_pk = current_user[0].pk
+    with_status = fields is None or fields.wants(*STATUS_FIELDS)
+    # The status needs the show pk and the show's own status, selected or not.
+    needs = (('tv_show_id',), {'tv_show': ('status',)}) if with_status else ((), None)
     query = (
         db.query(DbUserTVShow)
-        .options(joinedload(DbUserTVShow.tv_show))
+        .options(*tracker_options(fields, DbUserTVShow.tv_show, *needs))
         .filter(DbUserTVShow.user_id == user_pk)
     )
-    trackers = guard_truncation(
-        apply_list_params(query, DbUserTVShow, params).all(), params, 'TV'
+    trackers = paginate(
+        apply_list_params(query, DbUserTVShow, params).all(), params, response
     )
-    show_pks = [t.tv_show_id for t in trackers]
-    # airdate is stored tz-naive (see tv_search._to_date), so compare naive.
-    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    if fields is None or fields.wants('rank'):
+        rankings.attach_positions(db, trackers)
+    if with_status:
+        _with_status(db, user_pk, trackers)
+    # The ranking version a following write's If-Match should carry.
+    response.headers['ETag'] = ranking_guard.current_etag(db, current_user[0].pk)
+    return trackers if fields is None else fields.respond(trackers, response)
 
-    aired: dict = {}
-    watched: dict = {}
-    if show_pks:
-        aired = dict(
-            db.query(
-                DbTVEpisode.tv_show_id,
-                func.count(),  # pylint: disable=not-callable
-            )
-            .filter(
-                DbTVEpisode.tv_show_id.in_(show_pks),
-                DbTVEpisode.airdate.isnot(None),
-                DbTVEpisode.airdate <= now,
-            )
-            .group_by(DbTVEpisode.tv_show_id)
-            .all()
-        )
-        watched = dict(
-            db.query(
-                DbTVEpisode.tv_show_id,
-                func.count(),  # pylint: disable=not-callable
-            )
-            .join(DbUserTVEpisode, DbUserTVEpisode.episode_id == DbTVEpisode.pk)
-            .filter(
-                DbTVEpisode.tv_show_id.in_(show_pks),
-                DbTVEpisode.airdate.isnot(None),
-                DbTVEpisode.airdate <= now,
-                DbUserTVEpisode.user_id == user_pk,
-                DbUserTVEpisode.watched == 1,
-            )
-            .group_by(DbTVEpisode.tv_show_id)
-            .all()
-        )
 
-    results = []
-    for tracker in trackers:
-        aired_count = aired.get(tracker.tv_show_id, 0)
-        watched_count = watched.get(tracker.tv_show_id, 0)
-        results.append(
-            UserTVShowWithStatus(
-                **UserTVShowResponse.model_validate(tracker).model_dump(),
-                watch_status=_watch_status(
-                    aired_count, watched_count, tracker.tv_show.status
-                ),
-                aired_count=aired_count,
-                watched_count=watched_count,
-            )
-        )
-    return results
+@router.get(
+    '/users/me/tv-shows/changes',
+    response_model=TrackerChanges[UserTVShowWithStatus],
+)
+def get_user_tv_show_changes(
+    since: int = Query(
+        0, ge=0, description='Token from the previous sync (0: the whole list)'
+    ),
+    db: Session = Depends(get_db),
+    current_user: list = Depends(get_current_user),
+):
+    """
+    Delta sync: show trackers written since ``since``, tombstones for
+    deleted ones, and the token to pass next time.
+    """
+    user_pk = current_user[0].pk
+    query = (
+        db.query(DbUserTVShow)
+        .options(joinedload(DbUserTVShow.tv_show))
+        .filter(DbUserTVShow.user_id == user_pk)
+    )
+    result = tracker_query.changes(db, query, DbUserTVShow, user_pk, since)
+    result['upserted'] = _with_status(db, user_pk, result['upserted'])
+    return result
 
 
 @router.get('/users/me/schedule', response_model=ScheduleResponse)
-def get_schedule(  # pylint: disable=too-many-locals
+def get_schedule(  # pylint: disable=too-many-arguments, too-many-positional-arguments
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
     window_days: int = 5,
+    limit: int = Query(
+        tv_schedule.DEFAULT_PAGE,
+        ge=1,
+        le=tv_schedule.MAX_PAGE,
+        description='Page size of upcoming and of catch_up',
+    ),
+    upcoming_cursor: Optional[str] = Query(
+        None, description='next_upcoming_cursor of the previous page'
+    ),
+    catch_up_cursor: Optional[str] = Query(
+        None, description='next_catch_up_cursor of the previous page'
+    ),
 ):
     """
     What to watch: unwatched episodes airing within +/- ``window_days`` of
     today, everything overdue and unwatched (catch-up), and shows the user
     has frozen (paused tracking on, so they're excluded from both).
+
+    Read from the precomputed schedule (``tv_schedule``). ``upcoming`` and
+    ``catch_up`` are paged independently: pass a ``next_*_cursor`` back as
+    ``upcoming_cursor`` / ``catch_up_cursor`` for the following page.
     """
     user_pk = current_user[0].pk
     # airdate is stored tz-naive (see tv_search._to_date), so compare naive too.
     now = datetime.now(timezone.utc).replace(tzinfo=None)
-    window_start = now - timedelta(days=window_days)
-    window_end = now + timedelta(days=window_days)
+    window = timedelta(days=window_days)
 
-    trackers = (
-        db.query(DbUserTVShow)
-        .options(joinedload(DbUserTVShow.tv_show))
-        .filter(
+    upcoming, next_upcoming = tv_schedule.page(
+        db, user_pk, 'upcoming', (now - window, now + window), limit, upcoming_cursor
+    )
+    catch_up, next_catch_up = tv_schedule.page(
+        db, user_pk, 'catch_up', (None, now), limit, catch_up_cursor
+    )
+    frozen_shows = db.execute(
+        select(DbTVShow.id.label('show_id'), DbTVShow.title.label('show_title'))
+        .join(DbUserTVShow, DbUserTVShow.tv_show_id == DbTVShow.pk)
+        .where(
             DbUserTVShow.user_id == user_pk,
             (DbUserTVShow.on_watchlist.is_(True))
             | (DbUserTVShow.on_rankings.is_(True)),
+            func.coalesce(DbUserTVShow.freeze, 0) != 0,
         )
-        .all()
-    )
-    frozen_shows = [
-        ScheduleFrozenShow(show_id=t.tv_show.id, show_title=t.tv_show.title)
-        for t in trackers
-        if t.freeze
-    ]
-    active_show_pks = [t.tv_show_id for t in trackers if not t.freeze]
-
-    upcoming: List[ScheduleEpisodeItem] = []
-    catch_up: List[ScheduleEpisodeItem] = []
-    if active_show_pks:
-        shows_by_pk = {
-            s.pk: s for s in db.query(DbTVShow).filter(DbTVShow.pk.in_(active_show_pks))
-        }
-        # catch_up only needs airdate <= now; upcoming only needs <= window_end
-        # (>= window_start is checked in Python below). window_end >= now
-        # always, so bounding the fetch to airdate <= window_end covers both.
-        # The unwatched anti-join is pushed into SQL too, instead of loading
-        # every episode of every active show and filtering in Python — row
-        # count no longer scales with the full episode catalog.
-        watched_exists = (
-            db.query(DbUserTVEpisode.pk)
-            .filter(
-                DbUserTVEpisode.episode_id == DbTVEpisode.pk,
-                DbUserTVEpisode.user_id == user_pk,
-                DbUserTVEpisode.watched == 1,
-            )
-            .exists()
-        )
-        episodes = (
-            db.query(DbTVEpisode)
-            .filter(
-                DbTVEpisode.tv_show_id.in_(active_show_pks),
-                DbTVEpisode.airdate.isnot(None),
-                DbTVEpisode.airdate <= window_end,
-                ~watched_exists,
-            )
-            .all()
-        )
-        for ep in episodes:
-            show = shows_by_pk.get(ep.tv_show_id)
-            if show is None:
-                continue
-            item = ScheduleEpisodeItem(
-                show_id=show.id,
-                show_title=show.title,
-                episode_id=ep.id,
-                episode_title=ep.title,
-                season=ep.season,
-                season_number=ep.season_number,
-                airdate=ep.airdate,
-            )
-            if window_start <= ep.airdate <= window_end:
-                upcoming.append(item)
-            if ep.airdate <= now:
-                catch_up.append(item)
-
-        upcoming.sort(key=lambda i: (i.airdate, i.show_title, i.season_number or 0))
-        catch_up.sort(key=lambda i: (i.show_title, i.season or 0, i.season_number or 0))
-
-    return ScheduleResponse(
-        upcoming=upcoming, catch_up=catch_up, frozen_shows=frozen_shows
-    )
+    ).mappings()
+    return {
+        'upcoming': upcoming,
+        'catch_up': catch_up,
+        'frozen_shows': frozen_shows.all(),
+        'next_upcoming_cursor': next_upcoming,
+        'next_catch_up_cursor': next_catch_up,
+    }
 
 
 @router.put(
@@ -495,27 +455,22 @@ def reorder_rankings(
     request: TVRankingReorder,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
     """Persist a new ranking order (drag-and-drop). Rank = position in the list."""
-    user_pk = current_user[0].pk
-    for position, show_id in enumerate(request.show_ids, start=1):
-        show = db.query(DbTVShow).filter(DbTVShow.id == show_id).first()
-        if not show:
-            continue
-        tracker = _get_tracker(db, user_pk, show.pk)
-        if tracker:
-            if tracker.rank != position:
-                tracker.ranked_at = utc_now()
-            tracker.rank = position
-            tracker.on_rankings = True
-            tracker.on_watchlist = False
-    db.commit()
-    return (
-        db.query(DbUserTVShow)
-        .filter(DbUserTVShow.user_id == user_pk, DbUserTVShow.on_rankings.is_(True))
-        .order_by(DbUserTVShow.rank)
-        .all()
+    if guard.replay is not None:
+        return guard.replay
+    guard.claim()
+    result = rankings.reorder(
+        db,
+        current_user[0].pk,
+        request.show_ids,
+        tracker_model=DbUserTVShow,
+        catalog_model=DbTVShow,
+        join_col='tv_show_id',
+        relation='tv_show',
     )
+    return guard.respond(List[UserTVShowResponse], result)
 
 
 @router.get('/users/me/tv-shows/{show_id}', response_model=UserTVShowResponse)
@@ -540,12 +495,15 @@ def set_show_rank(
     request: RankPlacement,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
     """
     Place a show at an exact 1-based position in the ranked list, shifting the
     shows at and below that position down by one. Works for a not-yet-ranked
     show (jump it in) or an already-ranked one (move it).
     """
+    if guard.replay is not None:
+        return guard.replay
     user_pk = current_user[0].pk
     show = _get_show(db, show_id)
     tracker = _get_tracker(db, user_pk, show.pk)
@@ -554,35 +512,15 @@ def set_show_rank(
             status_code=status.HTTP_404_NOT_FOUND, detail='TV Show not marked'
         )
 
-    old_rank = tracker.rank
+    guard.claim()
     was_on_rankings = tracker.on_rankings
     tracker.on_rankings = True
     tracker.on_watchlist = False
     default_completed_at(tracker, was_on_rankings)
-    # Remove from its current slot first so the shift math excludes it.
-    tracker.rank = None
-    db.flush()
-    if old_rank is not None:
-        db.query(DbUserTVShow).filter(
-            DbUserTVShow.user_id == user_pk,
-            DbUserTVShow.on_rankings.is_(True),
-            DbUserTVShow.rank.isnot(None),
-            DbUserTVShow.rank > old_rank,
-        ).update({DbUserTVShow.rank: DbUserTVShow.rank - 1}, synchronize_session=False)
-
-    target = max(1, min(request.position, _placed_count(db, user_pk) + 1))
-    db.query(DbUserTVShow).filter(
-        DbUserTVShow.user_id == user_pk,
-        DbUserTVShow.on_rankings.is_(True),
-        DbUserTVShow.rank.isnot(None),
-        DbUserTVShow.rank >= target,
-    ).update({DbUserTVShow.rank: DbUserTVShow.rank + 1}, synchronize_session=False)
-
-    tracker.rank = target
-    tracker.ranked_at = utc_now()
+    rankings.place(db, tracker, request.position)
     db.commit()
     db.refresh(tracker)
-    return tracker
+    return guard.respond(UserTVShowResponse, tracker)
 
 
 @router.post(
@@ -595,16 +533,19 @@ def mark_tv_show(
     request: UserTVShowCreate,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
     """Add a show to the user's lists (idempotent — merges list membership)."""
+    if guard.replay is not None:
+        return guard.replay
     user_pk = current_user[0].pk
     show = _get_show(db, show_id)
     tracker = _get_tracker(db, user_pk, show.pk)
     data = request.model_dump(exclude_unset=True)
 
+    guard.claim()
     if tracker is None:
         was_on_rankings = False
-        old_rank = None
         tracker = DbUserTVShow(
             user_id=user_pk,
             tv_show_id=show.pk,
@@ -616,7 +557,6 @@ def mark_tv_show(
         db.add(tracker)
     else:
         was_on_rankings = tracker.on_rankings
-        old_rank = tracker.rank
         for key in ('on_watchlist', 'on_rankings', 'notes', 'completed_at'):
             if key in data:
                 setattr(tracker, key, data[key])
@@ -627,13 +567,10 @@ def mark_tv_show(
     enforce_single_home(tracker, data)
     default_completed_at(tracker, was_on_rankings)
     if not tracker.on_rankings or not was_on_rankings:
-        tracker.rank = None
-        tracker.ranked_at = None
-    if old_rank is not None and tracker.rank is None:
-        _close_rank_gap(db, user_pk, old_rank)
+        rankings.unplace(tracker)
     db.commit()
     db.refresh(tracker)
-    return tracker
+    return guard.respond(UserTVShowResponse, tracker, status.HTTP_201_CREATED)
 
 
 @router.put('/users/me/tv-shows/{show_id}', response_model=UserTVShowResponse)
@@ -642,8 +579,11 @@ def update_user_tv_show(
     request: UserTVShowUpdate,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
     """Update list membership, rank, or notes for a tracked show."""
+    if guard.replay is not None:
+        return guard.replay
     user_pk = current_user[0].pk
     show = _get_show(db, show_id)
     tracker = _get_tracker(db, user_pk, show.pk)
@@ -652,9 +592,11 @@ def update_user_tv_show(
             status_code=status.HTTP_404_NOT_FOUND, detail='TV Show not marked'
         )
 
-    old_rank = tracker.rank
+    guard.claim()
     was_on_rankings = tracker.on_rankings
     data = request.model_dump(exclude_unset=True)
+    # ``rank`` is a position, not a column: it re-places the entry.
+    placement = data.pop('rank', None)
     for key, value in data.items():
         setattr(tracker, key, value)
     enforce_single_home(tracker, data)
@@ -663,23 +605,20 @@ def update_user_tv_show(
     # Entering Rankings (or leaving it) resets to unplaced so a stale/leftover
     # rank never places the show automatically; it lands in "to rank" instead.
     if not tracker.on_rankings or not was_on_rankings:
-        tracker.rank = None
-        tracker.ranked_at = None
-
-    # A removed placement leaves a gap — shift everything below it up.
-    if old_rank is not None and tracker.rank is None:
-        _close_rank_gap(db, user_pk, old_rank)
+        rankings.unplace(tracker)
+    elif placement is not None:
+        rankings.place(db, tracker, placement)
 
     # If it's on neither list, drop the tracker entirely.
     if not tracker.on_watchlist and not tracker.on_rankings:
         response = UserTVShowResponse.model_validate(tracker)
         db.delete(tracker)
         db.commit()
-        return response
+        return guard.respond(UserTVShowResponse, response)
 
     db.commit()
     db.refresh(tracker)
-    return tracker
+    return guard.respond(UserTVShowResponse, tracker)
 
 
 @router.delete('/users/me/tv-shows/{show_id}', status_code=status.HTTP_204_NO_CONTENT)
@@ -687,7 +626,10 @@ def unmark_tv_show(
     show_id: str,
     db: Session = Depends(get_db),
     current_user: list = Depends(get_current_user),
+    guard: RankingWrite = Depends(ranking_write),
 ):
+    if guard.replay is not None:
+        return guard.replay
     user_pk = current_user[0].pk
     show = _get_show(db, show_id)
     tracker = _get_tracker(db, user_pk, show.pk)
@@ -695,10 +637,10 @@ def unmark_tv_show(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail='TV Show not marked'
         )
-    _close_rank_gap(db, user_pk, tracker.rank)
+    guard.claim()
     db.delete(tracker)
     db.commit()
-    return None
+    return guard.respond(None, None, status.HTTP_204_NO_CONTENT)
 
 
 # User Episode Tracker Endpoints
@@ -8,15 +8,18 @@ notes, no watchlist, no watch state, no activity.
 """
 
 import re
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from app.auth import principal_cache
 from app.auth.oauth2 import get_current_user
 from app.db.database import get_db
 from app.db.models import DbUser
 from app.schemas.model_schemas import InVisibilityUpdate, OutVisibility
+from app.services import fast_json, public_profiles
 from app.services.shelves import SHELVES
 
 router = APIRouter(prefix='/v1', tags=['Visibility'])
@@ -102,17 +105,45 @@ def update_visibility(
 
     db.commit()
     db.refresh(user)
+    principal_cache.invalidate_user(user.id)
+    public_profiles.invalidate(user.pk, user.handle)
     return user
 
 
 @router.get('/public/{handle}')
-def public_profile(handle: str, db: Session = Depends(get_db)):
+def public_profile(
+    handle: str,
+    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+):
     """
     Read-only public profile: ranked lists of the categories the owner has
     opted in, best first. Fully private profiles (and unknown handles) 404
     identically, so the endpoint never confirms a private account exists.
+
+    Served from the profile cache when possible; a conditional GET matching
+    the cached ``ETag`` / ``Last-Modified`` gets a 304 without a query.
     """
-    user = db.query(DbUser).filter(DbUser.handle == handle.lower()).first()
+    handle = handle.lower()
+    profile = public_profiles.lookup(handle)
+    if profile is None:
+        owner_pk, body = _render_profile(db, handle)
+        profile = public_profiles.store(handle, owner_pk, fast_json.encode(body))
+    if profile.not_modified(if_none_match, if_modified_since):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers=profile.headers()
+        )
+    return Response(
+        content=profile.body,
+        media_type='application/json',
+        headers=profile.headers(),
+    )
+
+
+def _render_profile(db: Session, handle: str):
+    """The owner's pk and the profile payload; 404 when nothing is public."""
+    user = db.query(DbUser).filter(DbUser.handle == handle).first()
     not_found = HTTPException(
         status_code=status.HTTP_404_NOT_FOUND, detail='No public profile here'
     )
@@ -127,7 +158,7 @@ def public_profile(handle: str, db: Session = Depends(get_db)):
         ranked = (
             tracker_model.user_id == user.pk,
             tracker_model.on_rankings.is_(True),
-            tracker_model.rank.isnot(None),
+            tracker_model.rank_key.isnot(None),
         )
         # ranked_count is the shelf total, so it comes from COUNT rather than
         # len(rows) now that rows are capped at PROFILE_SHELF_LIMIT.
@@ -138,13 +169,13 @@ def public_profile(handle: str, db: Session = Depends(get_db)):
             .scalar()
         )
         rows = (
-            db.query(tracker_model.rank, catalog_model)
+            db.query(catalog_model)
             .join(
-                catalog_model,
+                tracker_model,
                 getattr(tracker_model, shelf.join_col) == catalog_model.pk,
             )
             .filter(*ranked)
-            .order_by(tracker_model.rank)
+            .order_by(tracker_model.rank_key, tracker_model.pk)
             .limit(PROFILE_SHELF_LIMIT)
             .all()
         )
@@ -159,7 +190,7 @@ def public_profile(handle: str, db: Session = Depends(get_db)):
                         'year': item.year,
                         'poster_url': item.poster_url,
                     }
-                    for rank, item in rows
+                    for rank, item in enumerate(rows, start=1)
                 ],
             }
         )
@@ -167,7 +198,7 @@ def public_profile(handle: str, db: Session = Depends(get_db)):
     if not shelves:
         raise not_found
 
-    return {
+    return user.pk, {
         'handle': user.handle,
         'display_name': user.display_name,
         'shelves': shelves,
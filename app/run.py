@@ -5,7 +5,9 @@ This module contains the main application setup and routing.
 import asyncio
 import json
 import os
+import threading
 import time
+from contextlib import asynccontextmanager
 
 import uvicorn
 from fastapi import FastAPI
@@ -15,10 +17,10 @@ from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-from .auth import authentication
+from .auth import api_key_usage, authentication
 from .config import get_settings
 from .db import db_user, models
-from .db.database import engine, get_db
+from .db.database import SessionLocal, engine, get_db
 from .db.models_sandbox import DbCountry
 from .log.logging_config import logger
 from .router.v1 import (
@@ -38,6 +40,7 @@ from .router.v1 import (
     router_tv,
 )
 from .schemas.model_schemas import OutResponseBaseModel
+from .services import local_search, provider_http, search_correction
 from .services.country_data import seed_countries
 from .utils.exceptions import (
     generic_exception_handler,
@@ -48,8 +51,43 @@ from .utils.exceptions import (
 settings = get_settings()
 
 
+def _warm_search() -> None:
+    """Build the typeahead index and the spell checker (with the catalog's
+    title words) before the first search needs them."""
+    db = SessionLocal()
+    try:
+        local_search.rebuild(db)
+        search_correction.warm(local_search.vocabulary())
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        # Both build lazily on first use anyway; warming is an optimisation.
+        logger.warning('Search warm-up failed: %s', exc)
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """
+    Process lifecycle hooks. On startup, warm the search structures in the
+    background. On shutdown, write out API-key usage stamps still sitting in
+    the write-behind buffer so a deploy doesn't drop them, and close the
+    pooled provider connections.
+    """
+    threading.Thread(target=_warm_search, name='search-warm', daemon=True).start()
+    yield
+    provider_http.close()
+    if api_key_usage.pending():
+        db = SessionLocal()
+        try:
+            flushed = api_key_usage.flush(db)
+            logger.info('Flushed API key usage for %d keys on shutdown', flushed)
+        finally:
+            db.close()
+
+
 # Create FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title='druthers.io API ' + settings.env,
     description=(
         'API for druthers.io — track and rank the movies, TV, books, and '
@@ -183,6 +221,8 @@ if settings.env in ('local', 'dev'):
         allow_credentials=True,
         allow_methods=['*'],
         allow_headers=['*'],
+        # Paging and ranking validators the web client reads cross-origin.
+        expose_headers=['ETag', 'Next-Cursor'],
     )
 
 
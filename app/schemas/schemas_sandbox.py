@@ -5,7 +5,7 @@ This module contains Pydantic schemas for Sandbox entities.
 # pylint: disable=missing-class-docstring
 
 from datetime import date, datetime
-from typing import List, Optional
+from typing import Dict, Generic, List, Optional, TypeVar
 
 from pydantic import BaseModel, ConfigDict
 
@@ -367,11 +367,15 @@ class ScheduleResponse(BaseModel):
     Mirrors the legacy schedule page: what's airing in the +/- window around
     today (``upcoming``), everything overdue and unwatched (``catch_up``),
     and shows the user has paused tracking on (``frozen_shows``).
+    ``upcoming`` and ``catch_up`` are paged; a ``next_*_cursor`` is set while
+    more remain.
     """
 
     upcoming: List[ScheduleEpisodeItem]
     catch_up: List[ScheduleEpisodeItem]
     frozen_shows: List[ScheduleFrozenShow]
+    next_upcoming_cursor: Optional[str] = None
+    next_catch_up_cursor: Optional[str] = None
 
 
 # --- Video Games ---
@@ -587,6 +591,58 @@ class GlobalSearchResponse(BaseModel):
     books: List[BookSearchResult]
 
 
+class LocalSearchHit(BaseModel):
+    """A catalog title matched by the local typeahead index."""
+
+    domain: str
+    id: str
+    title: str
+    year: Optional[int] = None
+    poster_url: Optional[str] = None
+    score: float
+
+
+class LocalSearchResponse(BaseModel):
+    query: str
+    hits: List[LocalSearchHit]
+
+
+# --- Tracker delta sync ---
+TrackerT = TypeVar('TrackerT')
+
+
+class TrackerChanges(BaseModel, Generic[TrackerT]):
+    """
+    Delta of one tracker list since a client's token (see
+    app/services/tracker_changes.py). ``ranking`` is the full ranked order
+    (tracker ids, best first), sent whenever anything changed.
+    """
+
+    token: int
+    upserted: List[TrackerT]
+    deleted: List[str]
+    ranking: Optional[List[str]] = None
+
+
+# --- Data export ---
+class ExportAccount(BaseModel):
+    email: Optional[str] = None
+    display_name: Optional[str] = None
+
+
+class DataExport(BaseModel):
+    """Everything a user has tracked, in the same schemas the API serves."""
+
+    exported_at: datetime
+    account: ExportAccount
+    licenses: Dict[str, str]
+    movies: List[UserMovieResponse]
+    tv_shows: List[UserTVShowResponse]
+    tv_episode_marks: List[UserTVEpisodeResponse]
+    books: List[UserBookResponse]
+    games: List[UserVideoGameResponse]
+
+
 # --- Notifications ---
 class NotificationResponse(BaseModel):
     id: str
@@ -18,10 +18,16 @@ import requests
 from fastapi import HTTPException, status
 
 from app.log.logging_config import logger
+from app.services import (
+    provider_cache,
+    provider_http,
+    provider_validators,
+    single_flight,
+)
 
 OPENLIBRARY_URL = 'https://openlibrary.org'
 COVERS_URL = 'https://covers.openlibrary.org'
-REQUEST_TIMEOUT = 10
+REQUEST_TIMEOUT = provider_http.REQUEST_TIMEOUT
 
 _SEARCH_FIELDS = (
     'key,title,author_name,first_publish_year,isbn,cover_i,'
@@ -99,7 +105,7 @@ def _search_by_isbn(isbn: str) -> List[dict]:
     same "no matches" shape a title search produces, not an error.
     """
     try:
-        response = requests.get(
+        response = provider_http.get(
             f'{OPENLIBRARY_URL}/api/books',
             params={
                 'bibkeys': f'ISBN:{isbn}',
@@ -132,6 +138,8 @@ def _search_by_isbn(isbn: str) -> List[dict]:
     ]
 
 
+@provider_cache.cached('openlibrary.search', key=provider_cache.normalized_query)
+@single_flight.coalesced('openlibrary.search', key=provider_cache.normalized_query)
 def search_books(query: str) -> List[dict]:
     """
     Search Open Library for books matching ``query``.
@@ -156,7 +164,7 @@ def search_books(query: str) -> List[dict]:
         return _search_by_isbn(normalized_isbn)
 
     try:
-        response = requests.get(
+        response = provider_http.get(
             f'{OPENLIBRARY_URL}/search.json',
             params={'q': query, 'limit': 20, 'fields': _SEARCH_FIELDS},
             timeout=REQUEST_TIMEOUT,
@@ -199,8 +207,11 @@ _FIELD_LIMITS = {
 def apply_detail_to_book(book, detail: dict) -> None:
     """
     Copy Open Library detail onto a DbBook, truncating to column limits and
-    skipping None values (never clobber a good value with None).
+    skipping None values (never clobber a good value with None). A no-op for
+    ``provider_validators.UNCHANGED``.
     """
+    if detail is provider_validators.UNCHANGED:
+        return
     for key, value in detail.items():
         if value is None:
             continue
@@ -219,7 +230,7 @@ def _work_description(work_key: Optional[str]) -> Optional[str]:
     if not work_key or not _WORK_KEY_RE.match(work_key):
         return None
     try:
-        response = requests.get(
+        response = provider_http.get(
             f'{OPENLIBRARY_URL}{work_key}.json', timeout=REQUEST_TIMEOUT
         )
         response.raise_for_status()
@@ -232,26 +243,33 @@ def _work_description(work_key: Optional[str]) -> Optional[str]:
     return description or None
 
 
+@provider_cache.cached('openlibrary.detail')
+@single_flight.coalesced('openlibrary.detail')
 def get_book_detail(isbn: Optional[str]) -> Optional[dict]:
     """
     Fetch full detail for a book by ISBN and map it to the fields the
     catalog stores. Returns None when unavailable so callers can skip
-    enrichment gracefully.
+    enrichment gracefully, and ``UNCHANGED`` from a conditional fetch
+    (``provider_validators``) with nothing new.
     """
     isbn = (isbn or '').strip().replace('-', '')
     if not isbn:
         return None
     try:
-        response = requests.get(
+        response = provider_validators.get(
+            'openlibrary.detail',
+            isbn,
             f'{OPENLIBRARY_URL}/search.json',
             params={'q': f'isbn:{isbn}', 'limit': 1, 'fields': _SEARCH_FIELDS},
             timeout=REQUEST_TIMEOUT,
         )
+        if response is provider_validators.UNCHANGED:
+            return response
         response.raise_for_status()
         docs = response.json().get('docs') or []
     except (requests.RequestException, ValueError) as exc:
         logger.warning('Open Library detail failed for %s: %s', isbn, exc)
-        return None
+        raise provider_cache.Unavailable(None) from exc
     if not docs:
         return None
 
@@ -259,7 +277,7 @@ def get_book_detail(isbn: Optional[str]) -> Optional[dict]:
     year = doc.get('first_publish_year')
     rating = doc.get('ratings_average')
     languages = doc.get('language') or []
-    return {
+    detail = {
         'title': doc.get('title'),
         'isbn': isbn,
         'authors': _authors(doc),
@@ -271,3 +289,4 @@ def get_book_detail(isbn: Optional[str]) -> Optional[dict]:
         'language': languages[0] if languages else None,
         'poster_url': _cover(doc.get('cover_i')),
     }
+    return provider_validators.settle('openlibrary.detail', isbn, detail)
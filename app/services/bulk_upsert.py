@@ -0,0 +1,94 @@
+"""
+Set-based, chunked writes for catalog syncs.
+
+Going through the ORM unit of work costs one flush operation per row, which
+adds up for a provider payload of a thousand episodes. These helpers issue
+one multi-row ``INSERT ... ON CONFLICT`` per chunk instead. Postgres (prod)
+and SQLite (local, tests; 3.24+) share the syntax, so only the statement
+constructor differs by dialect.
+
+Core statements bypass the ORM: objects already loaded in the session are
+not updated, and ``after_flush`` hooks do not see the rows. Callers refresh
+any derived state themselves.
+"""
+
+from typing import Iterable, List, Sequence
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Rows per statement; ~10 bound columns each stays far below SQLite's
+# 32766-parameter cap.
+CHUNK_SIZE = 500
+
+
+def _insert(connection, table):
+    if connection.dialect.name == 'postgresql':
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+def _chunks(rows: Sequence[dict]) -> Iterable[List[dict]]:
+    for start in range(0, len(rows), CHUNK_SIZE):
+        yield list(rows[start : start + CHUNK_SIZE])
+
+
+def insert_missing(connection, table, rows: Sequence[dict], conflict: str) -> int:
+    """
+    Insert ``rows``, skipping any that collide on the unique ``conflict``
+    column (e.g. a concurrent sync got there first). Returns rows inserted.
+    Column defaults (``id``, timestamps) apply per row.
+    """
+    inserted = 0
+    for chunk in _chunks(rows):
+        statement = (
+            _insert(connection, table)
+            .values(chunk)
+            .on_conflict_do_nothing(index_elements=[conflict])
+        )
+        inserted += connection.execute(statement).rowcount
+    return inserted
+
+
+def update_rows(
+    connection,
+    table,
+    rows: Sequence[dict],
+    columns: Sequence[str],
+    key: Sequence[str] = ('pk',),
+) -> None:
+    """
+    Overwrite ``columns`` of existing rows, keyed on the unique ``key``
+    columns (``pk`` by default); rows not there yet are inserted. Each row
+    carries its key and every NOT NULL column, as the INSERT half requires.
+    """
+    for chunk in _chunks(rows):
+        statement = _insert(connection, table).values(chunk)
+        connection.execute(
+            statement.on_conflict_do_update(
+                index_elements=list(key),
+                set_={name: statement.excluded[name] for name in columns},
+            )
+        )
+
+
+def insert_from_select(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+    connection,
+    table,
+    columns: Sequence[str],
+    query,
+    key: Sequence[str],
+    update: Sequence[str],
+) -> None:
+    """
+    ``INSERT ... SELECT`` of ``query`` into ``columns``, overwriting
+    ``update`` on rows that collide on the unique ``key`` (a concurrent
+    writer inserted them first). SQLite needs ``query`` to have a WHERE
+    clause, which keeps its ON CONFLICT unambiguous.
+    """
+    statement = _insert(connection, table).from_select(list(columns), query)
+    connection.execute(
+        statement.on_conflict_do_update(
+            index_elements=list(key),
+            set_={name: statement.excluded[name] for name in update},
+        )
+    )
@@ -16,6 +16,7 @@ from typing import List, Optional
 import requests
 
 from app.log.logging_config import logger
+from app.services import provider_http
 
 WORLD_DATA_URL = (
     'https://raw.githubusercontent.com/mledoze/countries/master/countries.json'
@@ -50,7 +51,7 @@ def fetch_all_countries() -> List[dict]:
     if _world_cache is not None:
         return _world_cache
     try:
-        response = requests.get(WORLD_DATA_URL, timeout=REQUEST_TIMEOUT)
+        response = provider_http.get(WORLD_DATA_URL, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         payload = response.json()
     except (requests.RequestException, ValueError) as exc:
@@ -0,0 +1,58 @@
+"""
+JSON bodies serialized once, by Pydantic's Rust core.
+
+FastAPI already takes this path for routes with a ``response_model`` and the
+default response class: the returned rows are validated once (straight from
+ORM attributes) and dumped to bytes without an intermediate dict. Setting a
+custom ``default_response_class`` would switch that off, so the app keeps the
+default and the places that build their own body use these helpers instead
+of ``model_validate(...).model_dump()`` + ``jsonable_encoder`` + ``json.dumps``:
+
+- ``dump(schema, value)``: validate ``value`` (ORM rows included) against
+  ``schema`` once and return the JSON bytes;
+- ``encode(content)``: JSON bytes of plain data (dicts, lists, datetimes);
+- ``response(body, ...)``: an ``application/json`` response for either.
+
+``scripts/bench_serialization.py`` measures the per-row cost of both paths.
+"""
+
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import status
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+
+@lru_cache(maxsize=None)
+def adapter(schema) -> TypeAdapter:
+    """The (cached) ``TypeAdapter`` for a response schema such as ``List[X]``."""
+    return TypeAdapter(schema)
+
+
+def dump(schema, value) -> bytes:
+    """``value`` validated once against ``schema``, as JSON bytes."""
+    schema_adapter = adapter(schema)
+    return schema_adapter.dump_json(
+        schema_adapter.validate_python(value, from_attributes=True)
+    )
+
+
+def encode(content) -> bytes:
+    """JSON bytes of plain data; datetimes, dates and UUIDs as ISO strings."""
+    return to_json(content)
+
+
+def response(
+    body: bytes,
+    status_code: int = status.HTTP_200_OK,
+    headers: Optional[dict] = None,
+) -> Response:
+    """An ``application/json`` response carrying already-serialized ``body``."""
+    return Response(
+        content=body,
+        status_code=status_code,
+        media_type='application/json',
+        headers=headers,
+    )
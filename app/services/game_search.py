@@ -21,11 +21,12 @@ from fastapi import HTTPException, status
 
 from app.config import get_settings
 from app.log.logging_config import logger
+from app.services import provider_cache, provider_http, single_flight
 
 TWITCH_OAUTH_URL = 'https://id.twitch.tv/oauth2/token'
 IGDB_URL = 'https://api.igdb.com/v4'
 COVER_URL = 'https://images.igdb.com/igdb/image/upload/t_cover_big_2x'
-REQUEST_TIMEOUT = 10
+REQUEST_TIMEOUT = provider_http.REQUEST_TIMEOUT
 
 _DETAIL_FIELDS = (
     'name,slug,first_release_date,total_rating,genres.name,'
@@ -56,7 +57,7 @@ def _access_token() -> str:
 
     client_id, client_secret = _credentials()
     try:
-        response = requests.post(
+        response = provider_http.post(
             TWITCH_OAUTH_URL,
             params={
                 'client_id': client_id,
@@ -79,6 +80,7 @@ def _access_token() -> str:
     return token
 
 
+@single_flight.coalesced('igdb.query')
 def _igdb_query(endpoint: str, body: str) -> list:
     """
     POST an APIcalypse query to IGDB and return the JSON list.
@@ -93,7 +95,7 @@ def _igdb_query(endpoint: str, body: str) -> list:
             'Client-ID': client_id,
             'Authorization': f'Bearer {_access_token()}',
         }
-        response = requests.post(
+        response = provider_http.post(
             f'{IGDB_URL}/{endpoint}',
             data=body,
             headers=headers,
@@ -165,6 +167,7 @@ def _search_games_by_id(igdb_id: int) -> List[dict]:
     return [_search_hit(payload[0])]
 
 
+@provider_cache.cached('igdb.search', key=provider_cache.normalized_query)
 def search_games(query: str) -> List[dict]:
     """
     Search IGDB for games matching ``query``.
@@ -246,6 +249,7 @@ def apply_detail_to_game(game, detail: dict) -> None:
         setattr(game, key, value)
 
 
+@provider_cache.cached('igdb.detail')
 def get_game_detail(igdb_id: Optional[int]) -> Optional[dict]:
     """
     Fetch full detail for a game by IGDB id and map it to the fields the
@@ -259,12 +263,15 @@ def get_game_detail(igdb_id: Optional[int]) -> Optional[dict]:
             'games',
             f'fields {_DETAIL_FIELDS}; where id = {int(igdb_id)};',
         )
-    except HTTPException:
-        # Unconfigured (503) or upstream auth failure — skip enrichment.
-        return None
+    except HTTPException as exc:
+        # Unconfigured (503): skip enrichment. An upstream auth failure (502)
+        # is transient, like any other.
+        if exc.status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
+            return None
+        raise provider_cache.Unavailable(None) from exc
     except (requests.RequestException, ValueError) as exc:
         logger.warning('IGDB detail failed for %s: %s', igdb_id, exc)
-        return None
+        raise provider_cache.Unavailable(None) from exc
     if not payload:
         return None
 
@@ -0,0 +1,302 @@
+"""
+In-process search index over our own catalog titles, for typeahead.
+
+Every keystroke used to go to an external provider, even for titles already
+in ``movies``/``tv_shows``/``books``/``video_games``. This index answers
+``/v1/search/local`` from memory with three kinds of match, best first:
+
+    1. exact — normalized title equals the normalized query
+       (``search_ranking._normalize``: case and punctuation folded).
+    2. prefix — the normalized title, or one of its words, starts with the
+       query ("jurassic pa" → "Jurassic Park", "park" → "Jurassic Park").
+    3. fuzzy — trigram similarity, so typos still find the title
+       ("jurasic" → "Jurassic Park").
+
+The index is built from the catalog tables on first use and kept current by
+the catalog create/update/delete routes (``upsert``/``remove``). Writes made
+by other workers or by the jobs are picked up by a periodic rebuild
+(``LOCAL_SEARCH_REBUILD_SECONDS``) — the same converge-within-a-TTL trade as
+the principal cache. A rebuild runs one at a time and off the lock: the new
+index is built aside (prefixes sorted once) and swapped in whole, with any
+``upsert``/``remove`` made meanwhile replayed onto it. Searches keep reading
+the current index until then; only the very first build makes them wait.
+"""
+
+import bisect
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.db.models_sandbox import DbBook, DbMovie, DbTVShow, DbVideoGame
+from app.services.search_ranking import _normalize
+
+# Search domain (as in /v1/search) -> catalog model.
+CATALOGS = {
+    'movies': DbMovie,
+    'tv_shows': DbTVShow,
+    'games': DbVideoGame,
+    'books': DbBook,
+}
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+# Fuzzy matches below this trigram (Jaccard) similarity are noise.
+MIN_SIMILARITY = 0.3
+# Upper bound on prefix entries scanned for very short queries ("t").
+MAX_PREFIX_SCAN = 2000
+
+_SCORE_EXACT = 3.0
+_SCORE_TITLE_PREFIX = 2.0
+_SCORE_WORD_PREFIX = 1.5
+
+
+class Doc(NamedTuple):
+    """One indexed catalog title."""
+
+    domain: str
+    id: str
+    title: str
+    year: Optional[int]
+    poster_url: Optional[str]
+    norm: str
+
+
+Key = Tuple[str, str]
+
+_lock = threading.Lock()
+# Held for a whole rebuild, so only one runs at a time.
+_rebuild_lock = threading.Lock()
+_docs: Dict[Key, Doc] = {}
+# Sorted (token, key) pairs: the normalized title and each normalized word.
+_prefixes: List[Tuple[str, Key]] = []
+_trigrams: Dict[str, set] = {}
+_built_at: Optional[float] = None
+# (key, doc or None) writes made while a rebuild runs, replayed onto its result.
+_replay: Optional[List[Tuple[Key, Optional[Doc]]]] = None
+
+
+def _tokens(doc: Doc) -> set:
+    words = {_normalize(word) for word in _WORD_RE.findall(doc.title.lower())}
+    return {token for token in words | {doc.norm} if token}
+
+
+def _grams(norm: str) -> set:
+    padded = f'$${norm}$'
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _add(key: Key, doc: Doc) -> None:
+    _docs[key] = doc
+    for token in _tokens(doc):
+        bisect.insort(_prefixes, (token, key))
+    for gram in _grams(doc.norm):
+        _trigrams.setdefault(gram, set()).add(key)
+
+
+def _index(docs: List[Doc]) -> tuple:
+    """Fresh ``(docs, prefixes, trigrams)`` for ``docs``, built unlocked."""
+    by_key: Dict[Key, Doc] = {}
+    prefixes: List[Tuple[str, Key]] = []
+    trigrams: Dict[str, set] = {}
+    for doc in docs:
+        key = (doc.domain, doc.id)
+        by_key[key] = doc
+        prefixes.extend((token, key) for token in _tokens(doc))
+        for gram in _grams(doc.norm):
+            trigrams.setdefault(gram, set()).add(key)
+    prefixes.sort()
+    return by_key, prefixes, trigrams
+
+
+def _drop(key: Key) -> None:
+    doc = _docs.pop(key, None)
+    if doc is None:
+        return
+    for token in _tokens(doc):
+        i = bisect.bisect_left(_prefixes, (token, key))
+        if i < len(_prefixes) and _prefixes[i] == (token, key):
+            del _prefixes[i]
+    for gram in _grams(doc.norm):
+        postings = _trigrams.get(gram)
+        if postings is not None:
+            postings.discard(key)
+            if not postings:
+                del _trigrams[gram]
+
+
+def _doc(domain: str, row) -> Optional[Doc]:
+    norm = _normalize(row.title)
+    if not norm:
+        return None
+    return Doc(domain, row.id, row.title, row.year, row.poster_url, norm)
+
+
+def _put(key: Key, doc: Optional[Doc]) -> None:
+    _drop(key)
+    if doc is not None:
+        _add(key, doc)
+
+
+def _rebuild(db: Session) -> int:
+    """``rebuild``'s body; the caller holds ``_rebuild_lock``."""
+    # pylint: disable=global-statement
+    global _docs, _prefixes, _trigrams, _built_at, _replay
+    with _lock:
+        _replay = []
+    try:
+        docs = []
+        for domain, model in CATALOGS.items():
+            rows = db.query(model.id, model.title, model.year, model.poster_url).all()
+            docs.extend(doc for doc in (_doc(domain, row) for row in rows) if doc)
+        built = _index(docs)
+        with _lock:
+            _docs, _prefixes, _trigrams = built
+            for key, doc in _replay:
+                _put(key, doc)
+            _built_at = time.monotonic()
+            return len(_docs)
+    finally:
+        with _lock:
+            _replay = None
+
+
+def rebuild(db: Session) -> int:
+    """Reload the whole index from the catalog tables. Returns its size."""
+    with _rebuild_lock:
+        return _rebuild(db)
+
+
+def _stale(period: int) -> bool:
+    with _lock:
+        built_at = _built_at
+    return built_at is None or time.monotonic() - built_at >= period
+
+
+def _ensure_fresh(db: Session) -> None:
+    period = get_settings().local_search_rebuild_seconds
+    if not _stale(period):
+        return
+    # Only the first build is waited for; past that, a rebuild already
+    # running elsewhere means this search reads the current index.
+    with _lock:
+        first = _built_at is None
+    if not _rebuild_lock.acquire(blocking=first):  # pylint: disable=consider-using-with
+        return
+    try:
+        if _stale(period):
+            _rebuild(db)
+    finally:
+        _rebuild_lock.release()
+
+
+def _write(key: Key, doc: Optional[Doc]) -> None:
+    with _lock:
+        if _replay is not None:
+            _replay.append((key, doc))
+        if _built_at is not None:  # not built yet: the first build loads it
+            _put(key, doc)
+
+
+def upsert(domain: str, item) -> None:
+    """Index (or re-index) a catalog row after it was created or edited."""
+    _write((domain, item.id), _doc(domain, item))
+
+
+def remove(domain: str, item_id: str) -> None:
+    """Forget a deleted catalog row."""
+    _write((domain, item_id), None)
+
+
+def _score(query: str) -> Dict[Key, float]:
+    scores: Dict[Key, float] = {}
+    start = bisect.bisect_left(_prefixes, (query,))
+    for token, key in _prefixes[start : start + MAX_PREFIX_SCAN]:
+        if not token.startswith(query):
+            break
+        doc = _docs[key]
+        if doc.norm == query:
+            score = _SCORE_EXACT
+        elif token == doc.norm:
+            score = _SCORE_TITLE_PREFIX
+        else:
+            score = _SCORE_WORD_PREFIX
+        scores[key] = max(score, scores.get(key, 0.0))
+
+    if len(query) >= 3:
+        grams = _grams(query)
+        shared = Counter()
+        for gram in grams:
+            shared.update(_trigrams.get(gram, ()))
+        for key, count in shared.items():
+            if key in scores:
+                continue
+            union = len(grams) + len(_grams(_docs[key].norm)) - count
+            similarity = count / union
+            if similarity >= MIN_SIMILARITY:
+                scores[key] = similarity
+    return scores
+
+
+def search(
+    db: Session, query: str, domains: Optional[List[str]] = None, limit: int = 10
+) -> List[dict]:
+    """
+    Best local matches for ``query``, highest score first; ties go to the
+    shorter title. ``domains`` restricts the result to some catalogs.
+    """
+    _ensure_fresh(db)
+    norm = _normalize(query)
+    if not norm:
+        return []
+    with _lock:
+        scores = _score(norm)
+        docs = [
+            (score, _docs[key])
+            for key, score in scores.items()
+            if domains is None or key[0] in domains
+        ]
+    docs.sort(key=lambda pair: (-pair[0], len(pair[1].norm), pair[1].title))
+    return [
+        {
+            'domain': doc.domain,
+            'id': doc.id,
+            'title': doc.title,
+            'year': doc.year,
+            'poster_url': doc.poster_url,
+            'score': round(score, 3),
+        }
+        for score, doc in docs[:limit]
+    ]
+
+
+def vocabulary() -> set:
+    """Alphabetic words of every indexed title, lowercased (for the spelling
+    dictionary)."""
+    with _lock:
+        titles = [doc.title for doc in _docs.values()]
+    return {
+        word
+        for title in titles
+        for word in _WORD_RE.findall(title.lower())
+        if word.isalpha()
+    }
+
+
+def size() -> int:
+    """Number of indexed titles."""
+    with _lock:
+        return len(_docs)
+
+
+def reset() -> None:
+    """Empty the index and force a rebuild on next search (tests only)."""
+    global _built_at  # pylint: disable=global-statement
+    with _lock:
+        _docs.clear()
+        _prefixes.clear()
+        _trigrams.clear()
+        _built_at = None
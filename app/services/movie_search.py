@@ -14,13 +14,21 @@ from fastapi import HTTPException, status
 
 from app.config import get_settings
 from app.log.logging_config import logger
+from app.services import (
+    provider_cache,
+    provider_http,
+    provider_validators,
+    single_flight,
+)
 
 OMDB_URL = 'https://www.omdbapi.com/'
-REQUEST_TIMEOUT = 10
+REQUEST_TIMEOUT = provider_http.REQUEST_TIMEOUT
 
 _IMDB_ID_RE = re.compile(r'^tt\d+$', re.IGNORECASE)
 
 
+@provider_cache.cached('omdb.search', key=provider_cache.normalized_query)
+@single_flight.coalesced('omdb.search', key=provider_cache.normalized_query)
 def search_movies(query: str) -> List[dict]:
     """
     Search OMDB for movies matching ``query``.
@@ -47,7 +55,7 @@ def search_movies(query: str) -> List[dict]:
         return _search_by_imdb_id(query, settings.omdb_api_key)
 
     try:
-        response = requests.get(
+        response = provider_http.get(
             OMDB_URL,
             params={
                 'apikey': settings.omdb_api_key,
@@ -94,7 +102,7 @@ def _search_by_imdb_id(imdb_id: str, api_key: str) -> List[dict]:
     upstream call fails, mirroring the "not found" behavior of title search.
     """
     try:
-        response = requests.get(
+        response = provider_http.get(
             OMDB_URL,
             params={'apikey': api_key, 'i': imdb_id},
             timeout=REQUEST_TIMEOUT,
@@ -168,8 +176,11 @@ _FIELD_LIMITS = {
 def apply_detail_to_movie(movie, detail: dict) -> None:
     """
     Copy OMDB detail onto a DbMovie, truncating to column limits and only
-    filling empty fields (never clobber a good value with None).
+    filling empty fields (never clobber a good value with None). A no-op for
+    ``provider_validators.UNCHANGED``.
     """
+    if detail is provider_validators.UNCHANGED:
+        return
     for key, value in detail.items():
         if value is None:
             continue
@@ -178,11 +189,14 @@ def apply_detail_to_movie(movie, detail: dict) -> None:
         setattr(movie, key, value)
 
 
+@provider_cache.cached('omdb.detail')
+@single_flight.coalesced('omdb.detail')
 def get_movie_detail(imdb_id: str) -> Optional[dict]:
     """
     Fetch full detail for a movie by imdb id (OMDB ``i=``) and map it to the
     fields the catalog stores. Returns None when unavailable/unconfigured so
-    callers can skip enrichment gracefully.
+    callers can skip enrichment gracefully, and ``UNCHANGED`` from a
+    conditional fetch (``provider_validators``) with nothing new.
     """
     imdb_id = (imdb_id or '').strip()
     if not imdb_id:
@@ -191,20 +205,24 @@ def get_movie_detail(imdb_id: str) -> Optional[dict]:
     if not settings.omdb_api_key:
         return None
     try:
-        response = requests.get(
+        response = provider_validators.get(
+            'omdb.detail',
+            imdb_id,
             OMDB_URL,
             params={'apikey': settings.omdb_api_key, 'i': imdb_id, 'plot': 'full'},
             timeout=REQUEST_TIMEOUT,
         )
+        if response is provider_validators.UNCHANGED:
+            return response
         response.raise_for_status()
         payload = response.json()
     except (requests.RequestException, ValueError) as exc:
         logger.warning('OMDB detail failed for %s: %s', imdb_id, exc)
-        return None
+        raise provider_cache.Unavailable(None) from exc
     if payload.get('Response') == 'False':
         return None
 
-    return {
+    detail = {
         'title': _na(payload.get('Title')),
         'imdb': imdb_id,
         'year': _to_int(payload.get('Year')),
@@ -218,3 +236,4 @@ def get_movie_detail(imdb_id: str) -> Optional[dict]:
         'rating_imdb': _to_float(payload.get('imdbRating')),
         'poster_url': _na(payload.get('Poster')),
     }
+    return provider_validators.settle('omdb.detail', imdb_id, detail)
@@ -0,0 +1,352 @@
+"""
+Response cache for the external catalog providers.
+
+Identical searches ("the office", "zelda") and detail lookups used to hit the
+upstream API every time — burning OMDB's daily quota and adding 300-800 ms
+per call. Provider functions opt in with the ``cached`` decorator and a
+per-provider policy (``POLICIES``):
+
+- ``ttl``: how long a result is served as fresh.
+- ``negative_ttl``: how long an empty result (no match / 404 / ``None``) is
+  remembered. Shorter, because "not found yet" is the answer most likely to
+  change.
+- ``stale_ttl``: stale-while-revalidate window. Past ``ttl`` but inside this
+  window the cached value is served immediately and refreshed in the
+  background, so a detail page never waits on an expired entry.
+
+Raised errors (502/503 ``HTTPException``s) are never cached. Detail
+fetchers that degrade to an empty result on a transient failure (timeout,
+5xx, unparsable payload) raise ``Unavailable`` instead of returning it: the
+decorator hands the caller the empty fallback without caching it, so one
+upstream blip doesn't suppress enrichment for the whole negative TTL.
+
+Two backends: an in-process LRU (default) and a SQLite file that survives
+restarts (``PROVIDER_CACHE_BACKEND=sqlite``). Like the rate limits, the cache
+is on in deployed environments and off in local/CI unless
+``PROVIDER_CACHE_ENABLED`` says otherwise, so tests always see the provider.
+"""
+
+import copy
+import functools
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Any, Callable, NamedTuple, Optional
+
+from app.config import get_settings
+from app.log.logging_config import logger
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+class Policy(NamedTuple):
+    """Freshness rules for one provider endpoint (seconds)."""
+
+    ttl: int
+    negative_ttl: int
+    stale_ttl: int = 0
+
+
+# Search results churn slowly; detail payloads slower still (and are served
+# stale while refreshing). Negative entries stay short everywhere.
+POLICIES = {
+    'tvmaze.search': Policy(ttl=6 * HOUR, negative_ttl=15 * 60),
+    'tvmaze.show': Policy(ttl=DAY, negative_ttl=HOUR, stale_ttl=7 * DAY),
+    'tvmaze.episodes': Policy(ttl=6 * HOUR, negative_ttl=HOUR, stale_ttl=DAY),
+    'omdb.search': Policy(ttl=DAY, negative_ttl=HOUR),
+    'omdb.detail': Policy(ttl=7 * DAY, negative_ttl=6 * HOUR, stale_ttl=30 * DAY),
+    'igdb.search': Policy(ttl=DAY, negative_ttl=HOUR),
+    'igdb.detail': Policy(ttl=7 * DAY, negative_ttl=6 * HOUR, stale_ttl=30 * DAY),
+    'openlibrary.search': Policy(ttl=DAY, negative_ttl=HOUR),
+    'openlibrary.detail': Policy(
+        ttl=7 * DAY, negative_ttl=6 * HOUR, stale_ttl=30 * DAY
+    ),
+}
+
+
+class Unavailable(Exception):
+    """
+    A transient provider failure. Cached functions raise it with the value
+    their callers expect instead (``None`` / ``[]``); ``cached`` returns that
+    fallback and stores nothing.
+    """
+
+    def __init__(self, fallback: Any = None):
+        super().__init__(fallback)
+        self.fallback = fallback
+
+
+class Entry(NamedTuple):
+    """A cached value and the wall-clock times it stops being usable."""
+
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__date__': value.isoformat()}
+    raise TypeError(f'{type(value).__name__} is not cacheable')
+
+
+def _decode(obj: dict) -> Any:
+    if '__datetime__' in obj:
+        return datetime.fromisoformat(obj['__datetime__'])
+    if '__date__' in obj:
+        return date.fromisoformat(obj['__date__'])
+    return obj
+
+
+class MemoryBackend:
+    """
+    Bounded in-process LRU. Values are copied in and out: callers decorate
+    search hits in place (``attach_tracked_status``), and one user's badges
+    must never leak into the shared entry.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Entry]' = OrderedDict()
+
+    def get(self, key: str) -> Optional[Entry]:
+        """Return the entry for ``key`` (possibly expired), or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        return entry._replace(value=copy.deepcopy(entry.value))
+
+    def set(self, key: str, entry: Entry) -> None:
+        """Store ``entry``, evicting the least recently used beyond the cap."""
+        entry = entry._replace(value=copy.deepcopy(entry.value))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteBackend:
+    """
+    File-backed cache that survives restarts. Values are stored as JSON
+    (datetimes tagged), expired rows are pruned on write.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS provider_cache ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+            'fresh_until REAL NOT NULL, stale_until REAL NOT NULL)'
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Entry]:
+        """Return the entry for ``key`` (possibly expired), or None."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, fresh_until, stale_until FROM provider_cache '
+                'WHERE key = ?',
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        return Entry(json.loads(row[0], object_hook=_decode), row[1], row[2])
+
+    def set(self, key: str, entry: Entry) -> None:
+        """Upsert ``entry`` and prune anything past its stale window."""
+        payload = json.dumps(entry.value, default=_encode)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO provider_cache '
+                '(key, value, fresh_until, stale_until) VALUES (?, ?, ?, ?)',
+                (key, payload, entry.fresh_until, entry.stale_until),
+            )
+            self._conn.execute(
+                'DELETE FROM provider_cache WHERE stale_until < ?', (time.time(),)
+            )
+            self._conn.execute(
+                'DELETE FROM provider_cache WHERE key IN (SELECT key FROM '
+                'provider_cache ORDER BY stale_until DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._conn.execute('DELETE FROM provider_cache')
+            self._conn.commit()
+
+
+_backend_lock = threading.Lock()
+_backend = None
+_refreshing: set = set()
+_local = threading.local()
+_counters = {'hits': 0, 'stale_hits': 0, 'negative_hits': 0, 'misses': 0}
+
+
+def _enabled() -> bool:
+    settings = get_settings()
+    if settings.provider_cache_enabled is not None:
+        return settings.provider_cache_enabled
+    return settings.env in ('dev', 'qa', 'prod')
+
+
+def backend():
+    """The configured backend, built on first use."""
+    global _backend  # pylint: disable=global-statement
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                settings = get_settings()
+                if settings.provider_cache_backend == 'sqlite':
+                    _backend = SQLiteBackend(
+                        settings.provider_cache_path, settings.provider_cache_size
+                    )
+                else:
+                    _backend = MemoryBackend(settings.provider_cache_size)
+    return _backend
+
+
+@contextmanager
+def bypass():
+    """
+    Skip cached reads on this thread while still writing results through.
+
+    For the refresh jobs: their whole point is fresh upstream data, and the
+    entries they write leave the cache warm for the next page view.
+    """
+    previous = getattr(_local, 'bypass', False)
+    _local.bypass = True
+    try:
+        yield
+    finally:
+        _local.bypass = previous
+
+
+def _is_negative(value: Any) -> bool:
+    return value is None or value == [] or value == {}
+
+
+def _count(name: str) -> None:
+    with _backend_lock:
+        _counters[name] += 1
+
+
+def _store(key: str, policy: Policy, value: Any) -> None:
+    ttl = policy.negative_ttl if _is_negative(value) else policy.ttl
+    # Negative entries are never served stale.
+    stale = 0 if _is_negative(value) else policy.stale_ttl
+    now = time.time()
+    try:
+        backend().set(key, Entry(value, now + ttl, now + ttl + stale))
+    except (TypeError, ValueError, sqlite3.Error) as exc:
+        logger.warning('Provider cache write failed for %s: %s', key, exc)
+
+
+def _refresh_in_background(key: str, policy: Policy, call: Callable[[], Any]):
+    with _backend_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def run():
+        try:
+            _store(key, policy, call())
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            # The stale value keeps being served until its window closes.
+            logger.warning('Provider cache refresh failed for %s: %s', key, exc)
+        finally:
+            with _backend_lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=run, name=f'cache-refresh:{key}', daemon=True).start()
+
+
+def cached(namespace: str, key: Optional[Callable[..., Any]] = None):
+    """
+    Cache a provider function under ``POLICIES[namespace]``.
+
+    ``key`` maps the call's arguments to the cache key (defaults to the
+    arguments themselves); searches use it to fold case and whitespace. An
+    ``Unavailable`` raised by the function returns its fallback, uncached.
+    """
+    policy = POLICIES[namespace]
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                return lookup(*args, **kwargs)
+            except Unavailable as exc:
+                return exc.fallback
+
+        def lookup(*args, **kwargs):
+            if not _enabled():
+                return fn(*args, **kwargs)
+            parts = key(*args, **kwargs) if key else (args, sorted(kwargs.items()))
+            cache_key = f'{namespace}:{json.dumps(parts, default=str)}'
+            entry = None
+            if not getattr(_local, 'bypass', False):
+                try:
+                    entry = backend().get(cache_key)
+                except sqlite3.Error as exc:
+                    logger.warning('Provider cache read failed: %s', exc)
+            now = time.time()
+            if entry is not None and now < entry.fresh_until:
+                _count('negative_hits' if _is_negative(entry.value) else 'hits')
+                return entry.value
+            if entry is not None and now < entry.stale_until:
+                _count('stale_hits')
+                _refresh_in_background(
+                    cache_key, policy, functools.partial(fn, *args, **kwargs)
+                )
+                return entry.value
+            _count('misses')
+            value = fn(*args, **kwargs)
+            _store(cache_key, policy, value)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def normalized_query(query: str, *_args, **_kwargs) -> str:
+    """Cache key for free-text searches: case- and whitespace-insensitive."""
+    return ' '.join((query or '').lower().split())
+
+
+def stats() -> dict:
+    """Counters since start (or the last reset) and the overall hit ratio."""
+    with _backend_lock:
+        counters = dict(_counters)
+    served = counters['hits'] + counters['stale_hits'] + counters['negative_hits']
+    total = served + counters['misses']
+    return {**counters, 'hit_ratio': round(served / total, 3) if total else 0.0}
+
+
+def reset() -> None:
+    """Clear entries and counters (tests only)."""
+    backend().clear()
+    with _backend_lock:
+        for name in _counters:
+            _counters[name] = 0
@@ -0,0 +1,91 @@
+"""
+Shared HTTP client for the external catalog providers.
+
+The search proxies (TVMaze, OMDB, IGDB/Twitch, Open Library, the countries
+dataset) used to call module-level ``requests.get``/``requests.post``, which
+opens a fresh TCP + TLS connection for every upstream call. They now go
+through one process-wide ``requests.Session`` whose adapter keeps a
+keep-alive connection pool per host, so ``/v1/search`` fan-out and the
+enrich/refresh jobs reuse warm connections.
+
+Transient upstream failures (connection resets, 502/503/504) are retried a
+bounded number of times with a short backoff. The final response is always
+handed back to the caller, so each provider keeps its own status handling
+(404 = no match, 401 = refresh the IGDB token, etc.).
+"""
+
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# Default per-call timeout (seconds); providers may pass their own.
+REQUEST_TIMEOUT = settings.provider_timeout_seconds
+# Distinct upstream hosts we keep a pool for: TVMaze, OMDB, IGDB, Twitch,
+# Open Library (+ covers), GitHub raw, with headroom.
+POOL_HOSTS = 10
+RETRY_STATUSES = (502, 503, 504)
+
+_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=settings.provider_retries,
+        read=0,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({'GET', 'POST'}),
+        backoff_factor=0.3,
+        # A long Retry-After would hold a request thread hostage; give up and
+        # let the caller degrade instead.
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=POOL_HOSTS,
+        pool_maxsize=settings.provider_pool_maxsize,
+        max_retries=retry,
+    )
+    http = requests.Session()
+    http.mount('https://', adapter)
+    http.mount('http://', adapter)
+    http.headers['User-Agent'] = 'druthers-api (+https://www.druthers.io)'
+    return http
+
+
+def session() -> requests.Session:
+    """Return the shared session, creating it on first use."""
+    global _session  # pylint: disable=global-statement
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """``requests.get`` over the shared pooled session."""
+    kwargs.setdefault('timeout', REQUEST_TIMEOUT)
+    return session().get(url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    """``requests.post`` over the shared pooled session."""
+    kwargs.setdefault('timeout', REQUEST_TIMEOUT)
+    return session().post(url, **kwargs)
+
+
+def close() -> None:
+    """Close pooled connections (shutdown); the next call reopens them."""
+    global _session  # pylint: disable=global-statement
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,163 @@
+"""
+Conditional provider fetches for catalog refreshes.
+
+A nightly refresh re-downloaded every show's detail and episode list, and
+re-applied it even when nothing upstream had changed. The provider layer
+now remembers, per ``(source, key)``, what the catalog last applied
+(``provider_validators``): the response's ETag / Last-Modified and a hash
+of the *mapped* result (so upstream churn in fields we don't store, like
+TVMaze's ``weight``, doesn't count as a change).
+
+A fetch made through ``fetch``:
+
+- sends ``If-None-Match`` / ``If-Modified-Since`` from the stored
+  validators; a 304 returns ``UNCHANGED`` without downloading the payload;
+- otherwise maps the payload as usual and returns ``UNCHANGED`` if its hash
+  matches the stored one.
+
+``apply_detail_to_*`` and ``sync_episodes`` return straight away on
+``UNCHANGED``, so an unchanged show writes nothing and keeps its
+``updated_at``. New validators come back from ``fetch`` as ``pending`` and
+are written by ``store`` in the transaction that applies the result: a
+payload is only ever marked as seen once it is in the catalog.
+
+Conditional fetches go straight to the provider, past the response cache
+and single-flight, since their result depends on the stored validators and
+not just on the arguments. Outside ``fetch`` (page views, the enrich
+backfills) the fetchers behave exactly as before.
+"""
+
+import hashlib
+import inspect
+import json
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import select, tuple_
+
+from app.services import bulk_upsert, provider_cache, provider_http
+
+# (source, key), e.g. ('tvmaze.show', '82')
+Key = Tuple[str, str]
+
+
+class _Unchanged:
+    """Marker result: upstream has nothing new since it was last applied."""
+
+    def __repr__(self) -> str:
+        return 'UNCHANGED'
+
+
+UNCHANGED = _Unchanged()
+
+_local = threading.local()
+
+
+def load(db, keys: Iterable[Key]) -> Dict[Key, dict]:
+    """Stored validators for ``keys`` (missing keys are simply absent)."""
+    # pylint: disable=import-outside-toplevel
+    from app.db.models import DbProviderValidator
+
+    keys = list(keys)
+    if not keys:
+        return {}
+    table = DbProviderValidator.__table__
+    rows = db.execute(
+        select(table).where(tuple_(table.c.source, table.c.key).in_(keys))
+    ).mappings()
+    return {(row['source'], row['key']): dict(row) for row in rows}
+
+
+def store(db, pending: Dict[Key, dict]) -> None:
+    """Write the validators ``fetch`` returned, in the caller's transaction."""
+    # pylint: disable=import-outside-toplevel
+    from app.db.models import DbProviderValidator
+
+    if not pending:
+        return
+    # One upsert, so overlapping refreshes of a show can't collide on the key.
+    bulk_upsert.update_rows(
+        db.connection(),
+        DbProviderValidator.__table__,
+        list(pending.values()),
+        ('etag', 'last_modified', 'payload_hash'),
+        key=('source', 'key'),
+    )
+
+
+def fetch(known: Dict[Key, dict], fn: Callable, *args) -> Tuple[Any, Dict[Key, dict]]:
+    """
+    Call provider fetcher ``fn`` conditionally against ``known`` (from
+    ``load``). Returns ``(result, pending)``: ``result`` is ``UNCHANGED``
+    when upstream has nothing new; ``pending`` holds the validators to
+    ``store`` once the result is applied. A transient failure returns the
+    fetcher's usual empty result and no validators.
+    """
+    pending: Dict[Key, dict] = {}
+    _local.state = (known, pending)
+    try:
+        return inspect.unwrap(fn)(*args), pending
+    except provider_cache.Unavailable as exc:
+        return exc.fallback, {}
+    finally:
+        _local.state = None
+
+
+def _state():
+    return getattr(_local, 'state', None)
+
+
+def get(source: str, key: str, url: str, **kwargs):
+    """
+    ``provider_http.get``, made conditional inside ``fetch``: returns
+    ``UNCHANGED`` on a 304, and notes the response's validators.
+    """
+    state = _state()
+    if state is None:
+        return provider_http.get(url, **kwargs)
+    known, pending = state
+    stored = known.get((source, key)) or {}
+    headers = dict(kwargs.pop('headers', None) or {})
+    if stored.get('etag'):
+        headers['If-None-Match'] = stored['etag']
+    if stored.get('last_modified'):
+        headers['If-Modified-Since'] = stored['last_modified']
+    response = provider_http.get(url, headers=headers, **kwargs)
+    if response.status_code == 304:
+        return UNCHANGED
+    if response.ok:
+        pending[(source, key)] = {
+            'source': source,
+            'key': key,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'payload_hash': stored.get('payload_hash'),
+        }
+    return response
+
+
+def payload_hash(result: Any) -> str:
+    """Stable hash of a mapped provider result."""
+    raw = json.dumps(result, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def settle(source: str, key: str, result: Any) -> Any:
+    """
+    ``result``, or ``UNCHANGED`` inside ``fetch`` when it hashes the same as
+    what was last applied. Empty results (misses) pass through untouched.
+    """
+    state = _state()
+    if state is None or not result:
+        return result
+    known, pending = state
+    digest = payload_hash(result)
+    entry = pending.setdefault(
+        (source, key),
+        {'source': source, 'key': key, 'etag': None, 'last_modified': None},
+    )
+    entry['payload_hash'] = digest
+    stored: Optional[dict] = known.get((source, key))
+    if stored is not None and stored.get('payload_hash') == digest:
+        return UNCHANGED
+    return result
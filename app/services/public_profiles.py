@@ -0,0 +1,158 @@
+"""
+Per-process cache of rendered public profiles (``GET /v1/public/{handle}``).
+
+The public profile is unauthenticated and the most shared URL we have, yet
+every hit looked the owner up and ran a COUNT plus a capped join per opted-in
+shelf. Rendered profiles are now kept per handle as the exact response bytes,
+with a strong ``ETag`` (a hash of those bytes) and the time they last changed:
+
+- a request whose ``If-None-Match`` / ``If-Modified-Since`` matches a cached
+  entry is answered 304 before the database is touched;
+- anything else cached is served from memory;
+- ``Cache-Control`` lets browsers and the CDN reuse a profile for a short
+  ``max-age`` and serve it stale while they revalidate.
+
+Like the principal cache, entries are invalidated explicitly when the owner's
+profile can change — ranking writes, visibility/handle changes, account
+updates — and the TTL bounds staleness from catalog edits and other workers.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import NamedTuple, Optional
+
+from app.config import get_settings
+
+_lock = threading.Lock()
+# handle -> Profile; insertion order doubles as LRU order.
+_entries: 'OrderedDict[str, Profile]' = OrderedDict()
+_counters = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+
+class Profile(NamedTuple):
+    """One rendered profile and its validators."""
+
+    owner_pk: int
+    body: bytes
+    etag: str
+    # Epoch seconds the body last changed (re-renders of identical bytes keep
+    # the earlier stamp).
+    modified_at: float
+    expires_at: float
+
+    def headers(self) -> dict:
+        """Validator and caching headers for this representation."""
+        settings = get_settings()
+        return {
+            'ETag': self.etag,
+            'Last-Modified': formatdate(self.modified_at, usegmt=True),
+            'Cache-Control': (
+                f'public, max-age={settings.public_profile_max_age_seconds}, '
+                'stale-while-revalidate='
+                f'{settings.public_profile_stale_seconds}'
+            ),
+        }
+
+    def not_modified(
+        self, if_none_match: Optional[str], if_modified_since: Optional[str]
+    ) -> bool:
+        """
+        Whether a conditional GET can be answered 304 (RFC 9110 13.1.2/13.1.3:
+        ``If-None-Match`` wins over ``If-Modified-Since`` when both are sent).
+        """
+        if if_none_match is not None:
+            if if_none_match.strip() == '*':
+                return True
+            # Weak comparison: W/"x" matches "x".
+            tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+            return self.etag in tags
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(self.modified_at) <= since
+        return False
+
+
+def _enabled() -> bool:
+    settings = get_settings()
+    return (
+        settings.public_profile_cache_ttl_seconds > 0
+        and settings.public_profile_cache_size > 0
+    )
+
+
+def lookup(handle: str) -> Optional[Profile]:
+    """The cached profile for ``handle``, or None on a miss/expiry."""
+    if not _enabled():
+        return None
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(handle)
+        if entry is None or entry.expires_at <= now:
+            _counters['misses'] += 1
+            return None
+        _entries.move_to_end(handle)
+        _counters['hits'] += 1
+        return entry
+
+
+def store(handle: str, owner_pk: int, body: bytes) -> Profile:
+    """Remember a freshly rendered profile and return it with its validators."""
+    settings = get_settings()
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    with _lock:
+        previous = _entries.get(handle)
+        modified_at = (
+            previous.modified_at
+            if previous is not None and previous.etag == etag
+            else time.time()
+        )
+        entry = Profile(
+            owner_pk,
+            body,
+            etag,
+            modified_at,
+            time.monotonic() + settings.public_profile_cache_ttl_seconds,
+        )
+        if _enabled():
+            _entries[handle] = entry
+            _entries.move_to_end(handle)
+            while len(_entries) > settings.public_profile_cache_size:
+                _entries.popitem(last=False)
+    return entry
+
+
+def invalidate(owner_pk: int, handle: Optional[str] = None) -> None:
+    """
+    Drop every profile owned by ``owner_pk`` (call after their writes
+    commit), plus ``handle`` whoever owned it — a freshly claimed handle may
+    still hold a previous owner's entry.
+    """
+    with _lock:
+        stale = [
+            key
+            for key, entry in _entries.items()
+            if entry.owner_pk == owner_pk or key == handle
+        ]
+        for key in stale:
+            del _entries[key]
+        _counters['invalidations'] += len(stale)
+
+
+def stats() -> dict:
+    """Hit/miss counters since start (or the last reset) plus current size."""
+    with _lock:
+        return {**_counters, 'size': len(_entries)}
+
+
+def reset() -> None:
+    """Clear all entries and counters (tests only)."""
+    with _lock:
+        _entries.clear()
+        for name in _counters:
+            _counters[name] = 0
@@ -0,0 +1,282 @@
+"""
+Optimistic concurrency and retry safety for ranking writes.
+
+Two tabs (or the web UI and an MCP agent) saving rankings at once could
+interleave their writes, and a retried request repeated its write. Every
+ranking write (mark, update, rank, reorder, unmark) now goes through a
+``RankingWrite`` guard (the ``ranking_write`` dependency):
+
+- Each user has a ranking version (``ranking_versions``), served as the
+  ``ETag`` of the tracker lists and of every ranking write. A write sent with
+  ``If-Match`` only proceeds while that version is still current; otherwise
+  it fails fast with 412 and the current ``ETag`` rather than clobbering the
+  other writer's order. Check and bump are one conditional UPDATE.
+- A write sent with ``Idempotency-Key`` records the response it produced. A
+  retry with the same key and request is answered from that record (marked
+  ``Idempotent-Replayed: true``) without touching the rankings; reusing the
+  key for a different request is a 422, and a retry that overlaps the
+  still-running original is a 409.
+
+Both headers are optional, so clients that send neither behave as before.
+"""
+
+import hashlib
+import threading
+import time
+from typing import Optional, Set
+
+from fastapi import Depends, Header, HTTPException, Request, status
+from fastapi.responses import Response
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.auth.oauth2 import get_current_user
+from app.config import get_settings
+from app.db.database import get_db
+from app.db.models import DbIdempotencyKey, DbRankingVersion
+from app.services import fast_json, public_profiles, summary
+
+MAX_KEY_LENGTH = 255
+# Expired idempotency records are swept after this many keyed writes.
+SWEEP_EVERY = 256
+
+_sweep_lock = threading.Lock()
+_writes = [0]
+
+
+def etag(version: int) -> str:
+    """The ETag for a ranking version."""
+    return f'"{version}"'
+
+
+def current_version(db: Session, user_pk: int) -> int:
+    """The user's ranking version (0 before their first ranking write)."""
+    table = DbRankingVersion.__table__
+    version = db.execute(
+        select(table.c.version).where(table.c.user_id == user_pk)
+    ).scalar()
+    return version or 0
+
+
+def current_etag(db: Session, user_pk: int) -> str:
+    """``ETag`` header value for the user's current ranking version."""
+    return etag(current_version(db, user_pk))
+
+
+def parse_if_match(header: Optional[str]) -> Optional[Set[int]]:
+    """
+    Versions an ``If-Match`` header accepts; None when any version will do
+    (no header, or ``*``). Weak tags never match (RFC 9110 strong
+    comparison), so a header made only of those accepts nothing.
+    """
+    if header is None or header.strip() == '*':
+        return None
+    versions = set()
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            continue
+        value = tag.strip('"')
+        if value.isdigit():
+            versions.add(int(value))
+    return versions
+
+
+def _sweep_due() -> bool:
+    with _sweep_lock:
+        _writes[0] += 1
+        if _writes[0] < SWEEP_EVERY:
+            return False
+        _writes[0] = 0
+        return True
+
+
+class RankingWrite:  # pylint: disable=too-many-instance-attributes
+    """
+    Guard for one ranking write. Endpoints return ``replay`` when it is set,
+    call ``claim`` before writing and answer through ``respond``.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+        self,
+        db: Session,
+        user_pk: int,
+        if_match: Optional[Set[int]],
+        key: Optional[str],
+        fingerprint: str,
+    ):
+        self.db = db
+        self.user_pk = user_pk
+        self.if_match = if_match
+        self.key = key
+        self.fingerprint = fingerprint
+        self.version: Optional[int] = None
+        self.replay: Optional[Response] = None
+        self._pending = False
+
+    def start(self) -> None:
+        """Reserve the idempotency key, or load the response to replay."""
+        if self.key is None:
+            return
+        table = DbIdempotencyKey.__table__
+        now = time.time()
+        expired = now - get_settings().idempotency_ttl_hours * 3600
+        if _sweep_due():
+            self.db.execute(delete(table).where(table.c.created_at <= expired))
+        record = self.db.get(DbIdempotencyKey, self.key)
+        if record is not None and record.created_at <= expired:
+            self.db.delete(record)
+            self.db.flush()
+            record = None
+        if record is None:
+            self.db.add(
+                DbIdempotencyKey(
+                    key=self.key, fingerprint=self.fingerprint, created_at=now
+                )
+            )
+            try:
+                self.db.commit()
+            except IntegrityError as exc:
+                self.db.rollback()
+                raise _in_progress() from exc
+            self._pending = True
+            return
+        if record.fingerprint != self.fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail='Idempotency-Key was already used for a different request',
+            )
+        if record.status_code is None:
+            raise _in_progress()
+        self.replay = Response(
+            content=record.body,
+            status_code=record.status_code,
+            media_type='application/json' if record.body is not None else None,
+            headers={'ETag': record.etag, 'Idempotent-Replayed': 'true'},
+        )
+
+    def claim(self) -> None:
+        """
+        Check ``If-Match`` and bump the user's ranking version, inside the
+        caller's transaction (so a failed write rolls the bump back too).
+        Raises 412, carrying the current ``ETag``, when the client's view is
+        stale.
+        """
+        table = DbRankingVersion.__table__
+        bump = (
+            update(table)
+            .where(table.c.user_id == self.user_pk)
+            .values(version=table.c.version + 1)
+        )
+        if self.if_match is not None:
+            bump = bump.where(table.c.version.in_(self.if_match))
+        if self.db.execute(bump).rowcount:
+            self.version = current_version(self.db, self.user_pk)
+            return
+        current = current_version(self.db, self.user_pk)
+        first_write = current == 0 and (self.if_match is None or 0 in self.if_match)
+        if first_write:
+            try:
+                # In a savepoint, so losing the race leaves the request's
+                # transaction usable (Postgres aborts it otherwise).
+                with self.db.begin_nested():
+                    self.db.execute(
+                        insert(table).values(user_id=self.user_pk, version=1)
+                    )
+                self.version = 1
+                return
+            except IntegrityError:
+                # A concurrent first write won; this view is stale now.
+                current = current_version(self.db, self.user_pk)
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail='Rankings changed since they were loaded — reload and retry',
+            headers={'ETag': etag(current)},
+        )
+
+    def respond(self, schema, value, status_code: int = status.HTTP_200_OK):
+        """
+        Serialize ``value`` as ``schema`` with the new ``ETag``, and record
+        it against the idempotency key. ``schema=None`` sends no body. The
+        write has committed by now, so the user's cached home summary and
+        public profile go.
+        """
+        body = None
+        if schema is not None:
+            body = fast_json.dump(schema, value).decode()
+        tag = etag(self.version if self.version is not None else 0)
+        if self._pending:
+            record = self.db.get(DbIdempotencyKey, self.key)
+            record.status_code = status_code
+            record.body = body
+            record.etag = tag
+            self.db.commit()
+            self._pending = False
+        summary.invalidate(self.user_pk)
+        public_profiles.invalidate(self.user_pk)
+        return Response(
+            content=body,
+            status_code=status_code,
+            media_type='application/json' if body is not None else None,
+            headers={'ETag': tag},
+        )
+
+    def abandon(self) -> None:
+        """Release a reserved key after the write failed, so it can be retried."""
+        if not self._pending:
+            return
+        self._pending = False
+        # Endpoints only write after ``claim``; a request refused before that
+        # (a 404, say) has nothing of its own to undo.
+        if self.version is not None or not self.db.is_active:
+            self.db.rollback()
+        table = DbIdempotencyKey.__table__
+        self.db.execute(
+            delete(table).where(table.c.key == self.key, table.c.status_code.is_(None))
+        )
+        self.db.commit()
+
+
+def _in_progress() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail='A request with this Idempotency-Key is still in progress',
+    )
+
+
+async def _fingerprint(request: Request) -> str:
+    digest = hashlib.sha256()
+    digest.update(f'{request.method} {request.url.path}\n'.encode())
+    digest.update(await request.body())
+    return digest.hexdigest()
+
+
+def ranking_write(
+    if_match: Optional[str] = Header(
+        None, description='Ranking ETag the write is based on (412 if stale)'
+    ),
+    idempotency_key: Optional[str] = Header(
+        None,
+        max_length=MAX_KEY_LENGTH,
+        description='Client-chosen key; retries with it replay the first response',
+    ),
+    fingerprint: str = Depends(_fingerprint),
+    db: Session = Depends(get_db),
+    current_user: list = Depends(get_current_user),
+):
+    """FastAPI dependency supplying the ``RankingWrite`` guard for a request."""
+    user_pk = current_user[0].pk
+    guard = RankingWrite(
+        db,
+        user_pk,
+        parse_if_match(if_match),
+        f'{user_pk}:{idempotency_key}' if idempotency_key else None,
+        fingerprint,
+    )
+    guard.start()
+    try:
+        yield guard
+    except Exception:
+        guard.abandon()
+        raise
@@ -1,35 +1,172 @@
 """
-Abuse resistance (#148, threat model H1/H2): lightweight sliding-window rate
-limits served as FastAPI dependencies.
-
-Limits are in-memory and therefore per-instance — plenty for a small Cloud
-Run service where the caps exist to stop bots and runaway loops, not to
-meter a distributed fleet. Enforcement is on in deployed environments
-(dev/prod) and off in local/CI unless ``RATE_LIMITS_ENABLED`` says otherwise;
-defaults are generous enough that a human never notices them.
+Abuse resistance (#148, threat model H1/H2): lightweight rate limits served
+as FastAPI dependencies.
+
+Each limit is "``limit`` requests per ``window``", enforced with GCRA (the
+generic cell rate algorithm, a token bucket that stores one number): a key
+keeps only its *theoretical arrival time* (TAT). A full bucket allows
+``limit`` requests back to back; after that one request is let through every
+``window / limit`` seconds, and a 429's ``Retry-After`` says exactly when.
+Memory per key is constant, and a key whose TAT has passed holds no
+information, so idle keys are evicted.
+
+State lives behind a small backend interface:
+
+- ``memory`` (default): per-instance, in sharded dicts so concurrent
+  requests for different keys don't contend on one lock. Plenty for a small
+  Cloud Run service where the caps exist to stop bots and runaway loops.
+- ``sql``: the ``rate_limits`` table in the app database, so a limit holds
+  across uvicorn workers and instances. One conditional UPDATE per check.
+
+Enforcement is on in deployed environments (dev/prod) and off in local/CI
+unless ``RATE_LIMITS_ENABLED`` says otherwise; defaults are generous enough
+that a human never notices them.
 """
 
+import hashlib
+import math
 import threading
 import time
-from collections import defaultdict, deque
+import zlib
+from typing import Optional
 
 from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy import case, delete, insert, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
 
 from app.auth.oauth2 import get_current_user
 from app.config import get_settings
-
-_lock = threading.Lock()
-_events: dict = defaultdict(deque)
+from app.db.database import engine
+from app.db.models import DbRateLimit
 
 AUTH_WINDOW_SECONDS = 300
 SEARCH_WINDOW_SECONDS = 60
 CATALOG_WINDOW_SECONDS = 86400
 
+# Expired keys are swept after this many checks (per shard / per process).
+SWEEP_EVERY = 1024
+
+# Longest key stored as is; longer ones are hashed to fit ``rate_limits.key``.
+MAX_KEY_LENGTH = DbRateLimit.__table__.c.key.type.length
+
+
+class MemoryBackend:
+    """Per-instance GCRA state in lock-sharded dicts (key -> TAT)."""
+
+    def __init__(self, shards: int = 16):
+        self._shards = [(threading.Lock(), {}, [0]) for _ in range(shards)]
+
+    def _shard(self, key: str):
+        return self._shards[zlib.crc32(key.encode()) % len(self._shards)]
+
+    def acquire(self, key: str, interval: float, window: float) -> float:
+        """
+        Spend one request for ``key``. Returns 0 when allowed, otherwise the
+        seconds until the next request would be.
+        """
+        lock, tats, ops = self._shard(key)
+        now = time.monotonic()
+        with lock:
+            ops[0] += 1
+            if ops[0] >= SWEEP_EVERY:
+                ops[0] = 0
+                for idle in [k for k, tat in tats.items() if tat <= now]:
+                    del tats[idle]
+            new_tat = max(tats.get(key, now), now) + interval
+            if new_tat - now > window:
+                return new_tat - now - window
+            tats[key] = new_tat
+            return 0.0
+
+    def size(self) -> int:
+        """Number of keys currently held."""
+        return sum(len(tats) for _, tats, _ in self._shards)
+
+    def clear(self) -> None:
+        """Forget every key."""
+        for lock, tats, _ in self._shards:
+            with lock:
+                tats.clear()
+
+
+class SQLBackend:
+    """
+    GCRA state in the ``rate_limits`` table, shared by every worker and
+    instance using the database. Times are wall-clock epoch seconds.
+    """
+
+    def __init__(self, bind: Engine):
+        self.engine = bind
+        self._lock = threading.Lock()
+        self._ops = 0
+
+    def _sweep_due(self) -> bool:
+        with self._lock:
+            self._ops += 1
+            if self._ops < SWEEP_EVERY:
+                return False
+            self._ops = 0
+            return True
+
+    def acquire(self, key: str, interval: float, window: float) -> float:
+        """Same contract as ``MemoryBackend.acquire``."""
+        table = DbRateLimit.__table__
+        now = time.time()
+        if self._sweep_due():
+            with self.engine.begin() as conn:
+                conn.execute(delete(table).where(table.c.tat <= now))
+        tat = case((table.c.tat > now, table.c.tat), else_=now)
+        for _ in range(2):
+            with self.engine.begin() as conn:
+                # Check-and-spend in one statement: it only matches while the
+                # key still has room, so concurrent callers can't overspend.
+                spent = conn.execute(
+                    update(table)
+                    .where(table.c.key == key, tat + interval - now <= window)
+                    .values(tat=tat + interval)
+                )
+                if spent.rowcount:
+                    return 0.0
+                current = conn.execute(
+                    select(table.c.tat).where(table.c.key == key)
+                ).scalar()
+            if current is not None:
+                return max(max(current, now) + interval - now - window, 0.0)
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(insert(table).values(key=key, tat=now + interval))
+                return 0.0
+            except IntegrityError:
+                continue  # another caller created the key first; re-check
+        return interval
+
+    def clear(self) -> None:
+        """Forget every key."""
+        with self.engine.begin() as conn:
+            conn.execute(delete(DbRateLimit.__table__))
+
+
+_backend_lock = threading.Lock()
+_backend = None
+
+
+def backend():
+    """The configured backend, built on first use."""
+    global _backend  # pylint: disable=global-statement
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if get_settings().rate_limit_backend == 'sql':
+                    _backend = SQLBackend(engine)
+                else:
+                    _backend = MemoryBackend()
+    return _backend
+
 
 def reset() -> None:
-    """Clear all recorded events (tests only)."""
-    with _lock:
-        _events.clear()
+    """Clear all recorded state (tests only)."""
+    backend().clear()
 
 
 def _enforced() -> bool:
@@ -50,16 +187,13 @@ def client_ip(request: Request) -> str:
     return request.client.host if request.client else 'unknown'
 
 
-def _allow(key: str, limit: int, window_seconds: int) -> bool:
-    now = time.monotonic()
-    with _lock:
-        events = _events[key]
-        while events and events[0] <= now - window_seconds:
-            events.popleft()
-        if len(events) >= limit:
-            return False
-        events.append(now)
-        return True
+def _retry_after(key: str, limit: int, window_seconds: int) -> Optional[int]:
+    """Spend one request; None when allowed, else whole seconds to wait."""
+    if len(key) > MAX_KEY_LENGTH:
+        # The X-Forwarded-For hop is client-supplied and unbounded.
+        key = hashlib.sha256(key.encode()).hexdigest()
+    wait = backend().acquire(key, window_seconds / limit, window_seconds)
+    return max(math.ceil(wait), 1) if wait > 0 else None
 
 
 def _reject(what: str, retry_after_seconds: int):
@@ -75,8 +209,9 @@ def auth_rate_limit(request: Request) -> None:
     if not _enforced():
         return
     limit = get_settings().rate_limit_auth
-    if not _allow(f'auth:{client_ip(request)}', limit, AUTH_WINDOW_SECONDS):
-        _reject('sign-in attempts', AUTH_WINDOW_SECONDS)
+    retry = _retry_after(f'auth:{client_ip(request)}', limit, AUTH_WINDOW_SECONDS)
+    if retry:
+        _reject('sign-in attempts', retry)
 
 
 def search_rate_limit(current_user: list = Depends(get_current_user)) -> None:
@@ -84,8 +219,9 @@ def search_rate_limit(current_user: list = Depends(get_current_user)) -> None:
     if not _enforced():
         return
     limit = get_settings().rate_limit_search
-    if not _allow(f'search:{current_user[0].pk}', limit, SEARCH_WINDOW_SECONDS):
-        _reject('searches', SEARCH_WINDOW_SECONDS)
+    retry = _retry_after(f'search:{current_user[0].pk}', limit, SEARCH_WINDOW_SECONDS)
+    if retry:
+        _reject('searches', retry)
 
 
 def catalog_add_cap(current_user: list = Depends(get_current_user)) -> None:
@@ -93,5 +229,6 @@ def catalog_add_cap(current_user: list = Depends(get_current_user)) -> None:
     if not _enforced():
         return
     limit = get_settings().catalog_add_daily_cap
-    if not _allow(f'catalog:{current_user[0].pk}', limit, CATALOG_WINDOW_SECONDS):
-        _reject('catalog additions for today', CATALOG_WINDOW_SECONDS)
+    retry = _retry_after(f'catalog:{current_user[0].pk}', limit, CATALOG_WINDOW_SECONDS)
+    if retry:
+        _reject('catalog additions for today', retry)
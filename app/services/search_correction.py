@@ -6,32 +6,99 @@ like "jurrasic" returns nothing. When a search comes back empty, the routers
 retry once with a spell-corrected query. Correction is per-word against an
 offline English dictionary; words it can't improve pass through unchanged,
 so proper nouns degrade gracefully to the original behavior.
+
+One checker is shared by every request in the process. ``warm`` builds it
+ahead of the first search (the app calls it at startup) and can fold in our
+own catalog vocabulary, so titles' proper nouns ("witcher", "skyrim") count as
+correctly spelled instead of being "fixed" into dictionary words. Per-word
+corrections are memoized, and the expensive edit-distance-2 search is only
+tried for short words, where a double typo is plausible and the candidate
+set stays small.
 """
 
-from typing import Optional
+import threading
+from functools import lru_cache
+from typing import Iterable, Optional
 
 from spellchecker import SpellChecker
 
+from app.log.logging_config import logger
+
+# Distinct words whose correction is remembered.
+MEMO_SIZE = 8192
+# Longer words only get distance-1 candidates: distance-2 candidate sets grow
+# quadratically with word length and long words rarely carry two typos.
+MAX_DISTANCE_2_LENGTH = 8
+
+_lock = threading.Lock()
 _spell: Optional[SpellChecker] = None
 
 
+def _build(extra_words: Iterable[str] = ()) -> SpellChecker:
+    spell = SpellChecker(distance=2)
+    words = [
+        word for text in extra_words for word in text.lower().split() if word.isalpha()
+    ]
+    if words:
+        spell.word_frequency.load_words(words)
+    return spell
+
+
+def _checker() -> SpellChecker:
+    global _spell  # pylint: disable=global-statement
+    if _spell is None:
+        with _lock:
+            if _spell is None:
+                # Loading the dictionary costs ~0.3s; warm() normally pays it
+                # at startup instead of the first empty search.
+                _spell = _build()
+    return _spell
+
+
+def warm(extra_words: Iterable[str] = ()) -> None:
+    """
+    Build the shared checker now, adding ``extra_words`` (e.g. catalog title
+    words) to the vocabulary. Safe to call again to refresh the vocabulary;
+    the swap is atomic and resets the memo.
+    """
+    global _spell  # pylint: disable=global-statement
+    spell = _build(extra_words)
+    with _lock:
+        _spell = spell
+        _correct_word.cache_clear()
+    logger.info('Spell correction ready (%d words)', spell.word_frequency.unique_words)
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _correct_word(word: str) -> str:
+    spell = _checker()
+    if spell.known([word]):
+        return word
+    candidates = spell.known(spell.edit_distance_1(word))
+    if not candidates and len(word) <= MAX_DISTANCE_2_LENGTH:
+        candidates = spell.known(spell.edit_distance_2(word))
+    if not candidates:
+        return word
+    # Most frequent first; ties broken alphabetically so results are stable.
+    return max(sorted(candidates), key=spell.word_usage_frequency)
+
+
 def correct_query(query: str) -> Optional[str]:
     """
     Best-effort respelling of ``query``. Returns the corrected string, or
     None when correction wouldn't change anything (so callers can skip the
     retry).
     """
-    global _spell  # pylint: disable=global-statement
-    if _spell is None:
-        # Lazy: loading the dictionary costs ~0.3s; only pay it on the first
-        # empty search result, not at import time.
-        _spell = SpellChecker()
-
     words = query.split()
     if not words:
         return None
-    corrected = [_spell.correction(word) or word for word in words]
+    corrected = [_correct_word(word.lower()) for word in words]
     result = ' '.join(corrected)
     if result.lower() == query.lower():
         return None
     return result
+
+
+def memo_info():
+    """Hit/miss statistics of the per-word memo."""
+    return _correct_word.cache_info()
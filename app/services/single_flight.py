@@ -0,0 +1,101 @@
+"""
+Single-flight coalescing for concurrent identical upstream calls.
+
+When several users search the same title at once, or one page fires parallel
+requests that resolve the same show, each caller used to send its own
+upstream request. Functions wrapped with ``coalesced`` share one in-flight
+call per key instead: the first caller (the leader) runs it, everyone who
+arrives while it is running waits and receives the same result — or the
+same exception.
+
+This sits underneath the response cache (``provider_cache``): the cache
+removes repeats over time, single-flight removes the concurrent ones a cold
+or expired entry would otherwise let through. Nothing is remembered once the
+call returns.
+"""
+
+import copy
+import functools
+import json
+import threading
+from typing import Any, Callable, Optional
+
+
+class _Call:
+    """One in-flight call and its outcome, shared with the waiters."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+_lock = threading.Lock()
+_calls: dict = {}
+_counters = {'calls': 0, 'coalesced': 0}
+
+
+def do(key: str, fn: Callable[[], Any]) -> Any:
+    """
+    Run ``fn`` unless a call for ``key`` is already in flight, in which case
+    wait for it. Waiters get a copy of the result, since callers decorate
+    search hits in place.
+    """
+    with _lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+            _counters['calls'] += 1
+        else:
+            _counters['coalesced'] += 1
+
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return copy.deepcopy(call.result)
+
+    try:
+        call.result = fn()
+        return call.result
+    except BaseException as exc:
+        call.error = exc
+        raise
+    finally:
+        with _lock:
+            del _calls[key]
+        call.done.set()
+
+
+def coalesced(namespace: str, key: Optional[Callable[..., Any]] = None):
+    """
+    Coalesce concurrent calls of the decorated function with equal arguments.
+
+    ``key`` maps the call's arguments to the coalescing key (defaults to the
+    arguments themselves), as in ``provider_cache.cached``.
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            parts = key(*args, **kwargs) if key else (args, sorted(kwargs.items()))
+            call_key = f'{namespace}:{json.dumps(parts, default=str)}'
+            return do(call_key, functools.partial(fn, *args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+def stats() -> dict:
+    """Leader calls and coalesced waiters since start (or the last reset)."""
+    with _lock:
+        return {**_counters, 'in_flight': len(_calls)}
+
+
+def reset() -> None:
+    """Zero the counters (tests only)."""
+    with _lock:
+        for name in _counters:
+            _counters[name] = 0
@@ -1,70 +1,175 @@
 """
-The home summary: everything the landing page needs, in bounded queries.
+The home summary: everything the landing page needs, in one query.
 
 The dashboard used to be assembled client-side from ``/v1/users/me/{movies,
 tv-shows,books,games}`` — four unpaginated collections (~1,400 movie rows
 alone) fetched, validated and shipped so the page could render eight counts
-and twenty titles. This module answers the same question with two small
-indexed queries per shelf, so page cost stops scaling with library size.
+and twenty titles. This module answers the same question server-side, so page
+cost stops scaling with library size.
+
+Every shelf's counts and Top 5 come back from a single ``UNION ALL`` (one
+aggregate row plus a ``row_number()``-bounded top per shelf) instead of two
+queries per shelf. The result is cached per user and dropped whenever one of
+their tracker writes commits (``invalidate``, called by the ranking write
+guard and the importers), so repeat views of the landing page are served from
+memory. Only the shelf numbers are cached: handle, display name and public
+flags are read from the (already loaded) user row on every call.
 """
 
-from typing import List, Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
 
-from sqlalchemy import case, func
+from sqlalchemy import Integer, String, case, func, literal, null, select, union_all
 from sqlalchemy.orm import Session
 
+from app.config import get_settings
 from app.db.models import DbUser
-from app.services.shelves import SHELVES, Shelf
+from app.services.shelves import SHELVES
 
 # Ranked entries returned per shelf. Five is the product ("your Top 5"), not
 # an arbitrary page size — callers may ask for fewer but not more, so this
 # endpoint can never become another unbounded collection.
 TOP_N = 5
 
+_lock = threading.Lock()
+# user pk -> (expires_at, user id, shelves); insertion order doubles as LRU
+# order. The user id guards against a pk being reused for another account.
+_entries: 'OrderedDict[int, tuple]' = OrderedDict()
+_counters = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
 
-def _counts(db: Session, shelf: Shelf, user_pk: int):
-    """Ranked and queued totals for one shelf, in a single aggregate query."""
-    tracker = shelf.tracker_model
-    # count() ignores NULLs, so a CASE with no ELSE counts only the matches.
-    return (
-        db.query(
-            func.count(  # pylint: disable=not-callable
-                case((tracker.on_rankings.is_(True), 1))
-            ).label('ranked'),
-            func.count(  # pylint: disable=not-callable
-                case((tracker.on_watchlist.is_(True), 1))
-            ).label('queued'),
+def _shelf_query(user_pk: int):
+    """
+    One statement for every shelf: a counts row (``position`` 0) and the
+    ``TOP_N`` best-ranked entries (``position`` 1..N) of each.
+    """
+    branches = []
+    for index, shelf in enumerate(SHELVES):
+        tracker, catalog = shelf.tracker_model, shelf.catalog_model
+        # count() ignores NULLs, so a CASE with no ELSE counts only matches.
+        branches.append(
+            select(
+                literal(index, Integer).label('shelf'),
+                literal(0, Integer).label('position'),
+                func.count(  # pylint: disable=not-callable
+                    case((tracker.on_rankings.is_(True), 1))
+                ).label('ranked'),
+                func.count(  # pylint: disable=not-callable
+                    case((tracker.on_watchlist.is_(True), 1))
+                ).label('queued'),
+                null().cast(String).label('id'),
+                null().cast(String).label('title'),
+                null().cast(Integer).label('year'),
+                null().cast(String).label('poster_url'),
+            ).where(tracker.user_id == user_pk)
+        )
+        ordered = (
+            select(
+                catalog.id,
+                catalog.title,
+                catalog.year,
+                catalog.poster_url,
+                func.row_number()
+                .over(order_by=(tracker.rank_key, tracker.pk))
+                .label('position'),
+            )
+            .join(tracker, getattr(tracker, shelf.join_col) == catalog.pk)
+            .where(
+                tracker.user_id == user_pk,
+                tracker.on_rankings.is_(True),
+                tracker.rank_key.isnot(None),
+            )
+            .subquery()
         )
-        .filter(tracker.user_id == user_pk)
-        .one()
-    )
-
-
-def _top(db: Session, shelf: Shelf, user_pk: int, limit: int) -> List[dict]:
-    """The best-ranked entries for one shelf, best first."""
-    tracker, catalog = shelf.tracker_model, shelf.catalog_model
-    rows = (
-        db.query(tracker.rank, catalog)
-        .join(catalog, getattr(tracker, shelf.join_col) == catalog.pk)
-        .filter(
-            tracker.user_id == user_pk,
-            tracker.on_rankings.is_(True),
-            tracker.rank.isnot(None),
+        branches.append(
+            select(
+                literal(index, Integer),
+                ordered.c.position,
+                literal(0, Integer),
+                literal(0, Integer),
+                ordered.c.id,
+                ordered.c.title,
+                ordered.c.year,
+                ordered.c.poster_url,
+            ).where(ordered.c.position <= TOP_N)
         )
-        .order_by(tracker.rank)
-        .limit(limit)
-        .all()
-    )
-    return [
-        {
-            'rank': rank,
-            'id': item.id,
-            'title': item.title,
-            'year': item.year,
-            'poster_url': item.poster_url,
-        }
-        for rank, item in rows
-    ]
+    return union_all(*branches)
+
+
+def _load_shelves(db: Session, user_pk: int) -> Tuple[dict, ...]:
+    """Counts and full Top ``TOP_N`` per shelf, in ``SHELVES`` order."""
+    shelves = [{'ranked': 0, 'queued': 0, 'top': []} for _ in SHELVES]
+    for row in db.execute(_shelf_query(user_pk)):
+        shelf = shelves[row.shelf]
+        if row.position == 0:
+            shelf['ranked'], shelf['queued'] = row.ranked, row.queued
+            continue
+        shelf['top'].append(
+            {
+                'rank': row.position,
+                'id': row.id,
+                'title': row.title,
+                'year': row.year,
+                'poster_url': row.poster_url,
+            }
+        )
+    for shelf in shelves:
+        shelf['top'].sort(key=lambda entry: entry['rank'])
+    return tuple(shelves)
+
+
+def _enabled() -> bool:
+    settings = get_settings()
+    return settings.summary_cache_ttl_seconds > 0 and settings.summary_cache_size > 0
+
+
+def _shelves(db: Session, user: DbUser) -> Tuple[dict, ...]:
+    """The user's shelf numbers, from the cache when still valid."""
+    if not _enabled():
+        return _load_shelves(db, user.pk)
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(user.pk)
+        if entry is not None and entry[0] > now and entry[1] == user.id:
+            _entries.move_to_end(user.pk)
+            _counters['hits'] += 1
+            return entry[2]
+        _counters['misses'] += 1
+    shelves = _load_shelves(db, user.pk)
+    settings = get_settings()
+    with _lock:
+        _entries[user.pk] = (
+            now + settings.summary_cache_ttl_seconds,
+            user.id,
+            shelves,
+        )
+        _entries.move_to_end(user.pk)
+        while len(_entries) > settings.summary_cache_size:
+            _entries.popitem(last=False)
+    return shelves
+
+
+def invalidate(user_pk: int) -> None:
+    """Drop a user's cached summary (call after their tracker writes commit)."""
+    with _lock:
+        if _entries.pop(user_pk, None) is not None:
+            _counters['invalidations'] += 1
+
+
+def stats() -> dict:
+    """Hit/miss counters since start (or the last reset) plus current size."""
+    with _lock:
+        return {**_counters, 'size': len(_entries)}
+
+
+def reset() -> None:
+    """Clear all entries and counters (tests only)."""
+    with _lock:
+        _entries.clear()
+        for name in _counters:
+            _counters[name] = 0
 
 
 def build_summary(db: Session, user: DbUser, top_n: int = TOP_N) -> dict:
@@ -77,16 +182,15 @@ def build_summary(db: Session, user: DbUser, top_n: int = TOP_N) -> dict:
     """
     limit = max(1, min(top_n, TOP_N))
     shelves = []
-    for shelf in SHELVES:
-        counts = _counts(db, shelf, user.pk)
+    for shelf, numbers in zip(SHELVES, _shelves(db, user)):
         shelves.append(
             {
                 'category': shelf.category,
                 'label': shelf.label,
-                'ranked_count': counts.ranked,
-                'queued_count': counts.queued,
+                'ranked_count': numbers['ranked'],
+                'queued_count': numbers['queued'],
                 'public': bool(getattr(user, shelf.visibility_flag)),
-                'top': _top(db, shelf, user.pk, limit),
+                'top': [dict(entry) for entry in numbers['top'][:limit]],
             }
         )
 
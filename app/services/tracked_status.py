@@ -19,6 +19,7 @@ from app.db.models_sandbox import (
     DbUserVideoGame,
     DbVideoGame,
 )
+from app.services import rankings
 
 # domain -> (catalog model, catalog's external-id column, tracker model, tracker's FK column)
 _DOMAIN_CONFIG = {
@@ -74,6 +75,7 @@ def attach_tracked_status(
     tracker_by_pk = _tracker_by_catalog_pk(
         db, tracker_model, fk_column, user_pk, list(catalog_pk_by_id.values())
     )
+    rankings.attach_positions(db, tracker_by_pk.values())
 
     for r in results:
         catalog_pk = catalog_pk_by_id.get(r.get(external_key))
@@ -0,0 +1,175 @@
+"""
+Delta sync for the per-user tracker lists.
+
+The web and MCP clients refreshed state by re-downloading whole tracker
+lists (~1,400 movie rows, ~400 KB). ``GET /v1/users/me/<list>/changes``
+instead answers "what changed since token N?" from a change log
+(``tracker_changes``):
+
+- every tracker write is logged with an increasing ``seq``. ORM writes are
+  picked up by a flush hook here, so no write path can forget; the bulk
+  ranking save logs its rows explicitly (``record``). A tracker keeps a
+  single row, moved to a new ``seq`` on each write, so the log grows with
+  the library, not with its history.
+- a deleted tracker's row stays behind as its tombstone.
+- marking episodes watched logs the show's tracker, whose watched count
+  changed. (Episodes merely airing don't: that's time, not a write.)
+
+A client starts with ``since=0`` (the whole list plus a token), then passes
+the last token back to get only upserted rows and tombstones
+(``tracker_query.changes`` shapes the response).
+
+Every logged write takes the user's ``ranking_versions`` row lock before
+its log rows are inserted (ranking writes already hold it from
+``ranking_guard.claim``; the rest, episode marks included, take it here,
+creating the row at version 0 if needed). One user's log rows therefore
+commit in ``seq`` order, and a token never skips a change.
+"""
+
+from typing import Iterable
+
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.models import DbRankingVersion, DbTrackerChange
+from app.db.models_sandbox import (
+    DbTVEpisode,
+    DbUserBook,
+    DbUserCountry,
+    DbUserMovie,
+    DbUserTVEpisode,
+    DbUserTVShow,
+    DbUserVideoGame,
+)
+from app.services import bulk_upsert
+from app.services.tracker_rules import utc_now
+
+# Tracker model -> list slug stored in the log.
+DOMAINS = {
+    DbUserMovie: 'movies',
+    DbUserTVShow: 'tv',
+    DbUserBook: 'books',
+    DbUserVideoGame: 'games',
+    DbUserCountry: 'countries',
+}
+
+
+def _lock_users(connection, user_pks: set) -> None:
+    """
+    Hold the users' ``ranking_versions`` rows until commit (in user order,
+    so two writers can't deadlock). A row created here starts at version 0,
+    which leaves the user's ranking ``ETag`` as it was.
+    """
+    table = DbRankingVersion.__table__
+    locked = set(
+        connection.execute(
+            select(table.c.user_id)
+            .where(table.c.user_id.in_(user_pks))
+            .order_by(table.c.user_id)
+            .with_for_update()
+        ).scalars()
+    )
+    missing = [
+        {'user_id': user_pk, 'version': 0} for user_pk in sorted(user_pks - locked)
+    ]
+    if missing:
+        bulk_upsert.insert_missing(connection, table, missing, 'user_id')
+
+
+def _write(connection, entries: list) -> None:
+    """Log ``(user_pk, domain, tracker_id, deleted)`` entries, one row each."""
+    _lock_users(connection, {entry[0] for entry in entries})
+    table = DbTrackerChange.__table__
+    connection.execute(
+        delete(table).where(table.c.tracker_id.in_([e[2] for e in entries]))
+    )
+    now = utc_now()
+    connection.execute(
+        insert(table),
+        [
+            {
+                'user_id': user_pk,
+                'domain': domain,
+                'tracker_id': tracker_id,
+                'deleted': deleted,
+                'changed_at': now,
+            }
+            for user_pk, domain, tracker_id, deleted in entries
+        ],
+    )
+
+
+def record(
+    db: Session, tracker_model, user_pk: int, tracker_ids: Iterable[str]
+) -> None:
+    """Log trackers changed outside the ORM (bulk UPDATEs)."""
+    domain = DOMAINS[tracker_model]
+    entries = [(user_pk, domain, tracker_id, False) for tracker_id in tracker_ids]
+    if entries:
+        _write(db.connection(), entries)
+
+
+def _watched_shows(connection, marks: set) -> list:
+    """Show-tracker log entries for episode watch writes: a show's watched
+    count is part of its tracker row."""
+    entries = []
+    for user_pk in {user_pk for user_pk, _ in marks}:
+        episode_pks = [episode_pk for owner, episode_pk in marks if owner == user_pk]
+        rows = connection.execute(
+            select(DbUserTVShow.id)
+            .join(DbTVEpisode, DbTVEpisode.tv_show_id == DbUserTVShow.tv_show_id)
+            .where(
+                DbUserTVShow.user_id == user_pk,
+                DbTVEpisode.pk.in_(episode_pks),
+            )
+            .distinct()
+        )
+        entries.extend((user_pk, 'tv', tracker_id, False) for (tracker_id,) in rows)
+    return entries
+
+
+@event.listens_for(Session, 'after_flush')
+def _log_flushed_trackers(session: Session, _flush_context) -> None:
+    # new/dirty/deleted still describe what this flush wrote.
+    entries, marks = {}, set()
+    for deleted, objects in (
+        (False, session.new),
+        (False, session.dirty),
+        (True, session.deleted),
+    ):
+        for obj in objects:
+            if obj in session.dirty and not session.is_modified(obj):
+                continue
+            if isinstance(obj, DbUserTVEpisode):
+                marks.add((obj.user_id, obj.episode_id))
+                continue
+            domain = DOMAINS.get(type(obj))
+            if domain is not None:
+                entries[obj.id] = (obj.user_id, domain, obj.id, deleted)
+    if marks:
+        for entry in _watched_shows(session.connection(), marks):
+            entries.setdefault(entry[2], entry)
+    if entries:
+        _write(session.connection(), list(entries.values()))
+
+
+def logged_since(db: Session, tracker_model, user_pk: int, since: int):
+    """
+    ``(token, live tracker ids, tombstoned tracker ids)`` logged for one of
+    the user's lists after token ``since``. ``since=0`` only reads the token.
+    """
+    table = DbTrackerChange.__table__
+    mine = (table.c.user_id == user_pk, table.c.domain == DOMAINS[tracker_model])
+    if since == 0:
+        token = db.execute(select(func.max(table.c.seq)).where(*mine)).scalar()
+        return token or 0, [], []
+    logged = db.execute(
+        select(table.c.seq, table.c.tracker_id, table.c.deleted).where(
+            *mine, table.c.seq > since
+        )
+    ).all()
+    return (
+        max((row.seq for row in logged), default=since),
+        [row.tracker_id for row in logged if not row.deleted],
+        [row.tracker_id for row in logged if row.deleted],
+    )
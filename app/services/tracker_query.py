@@ -4,18 +4,56 @@ Shared list-shaping for the per-user tracker collections.
 ``/v1/users/me/{movies,tv-shows,books,games}`` returned every tracker a user
 owns with no ceiling — ~1,400 rows (≈400KB) for movies alone. Callers that
 only want one list ("what's ranked?") had to fetch everything and filter
-client-side. These helpers give all four endpoints the same filters, the same
-paging, and a real upper bound.
+client-side. These helpers give all five endpoints the same filters, the same
+paging, and a real upper bound on each page.
+
+Pages are keyset (cursor) paginated in rank order — ranked entries by
+``rank_key``, then everything unranked, ties and the unranked tail by pk.
+A page that isn't the last sets a ``Next-Cursor`` response header; passing
+it back as ``cursor`` continues right after the last row served, so page
+cost doesn't grow with depth the way ``OFFSET`` does (every skipped row used
+to be read and thrown away), and a library of any size can be walked. The
+old ``offset`` still works for existing callers.
+
+``changes`` shapes the delta-sync responses (``/v1/users/me/<list>/changes``,
+see ``tracker_changes``): only rows written since the client's token, plus
+tombstones. Ranks are positions derived from every placed entry, so one move
+can shift many entries; whenever anything changed the response carries the
+list's ranked order (tracker ids) instead of every shifted row.
 """
 
-from typing import Optional
+import base64
+import binascii
+from typing import Optional, Tuple
 
-from fastapi import HTTPException, Query, status
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
 
-# Hard ceiling on any single tracker page. Set well above today's largest
-# library so nothing breaks, but low enough that the endpoint can no longer
-# return an unbounded result set.
+from app.services import rankings, tracker_changes
+
+# Largest single page. Libraries bigger than this are walked with the cursor.
 MAX_PAGE = 5000
+NEXT_CURSOR_HEADER = 'Next-Cursor'
+
+
+def encode_cursor(rank_key: Optional[int], pk: int) -> str:
+    """Opaque cursor pointing just past a row with this sort key."""
+    raw = f'{"" if rank_key is None else rank_key}:{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[int], int]:
+    """``(rank_key, pk)`` from ``encode_cursor``; 422 for anything else."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        rank_key, pk = raw.split(':')
+        return (int(rank_key) if rank_key else None), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail='Invalid cursor',
+        ) from exc
 
 
 def list_params(
@@ -28,41 +66,89 @@ def list_params(
     limit: int = Query(
         MAX_PAGE, ge=1, le=MAX_PAGE, description='Maximum entries to return'
     ),
-    offset: int = Query(0, ge=0, description='Entries to skip'),
+    cursor: Optional[str] = Query(
+        None, description='Next-Cursor header of the previous page'
+    ),
+    offset: int = Query(
+        0, ge=0, description='Entries to skip (deprecated: use cursor)'
+    ),
 ) -> dict:
     """FastAPI dependency supplying the shared tracker list query params."""
+    if cursor is not None and offset:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail='Page with cursor or offset, not both',
+        )
     return {
         'on_rankings': on_rankings,
         'on_watchlist': on_watchlist,
         'limit': limit,
+        'after': decode_cursor(cursor) if cursor is not None else None,
         'offset': offset,
     }
 
 
+def _after(tracker, rank_key: Optional[int], pk: int):
+    """Rows sorting after ``(rank_key, pk)`` (NULL keys last)."""
+    if rank_key is None:
+        return and_(tracker.rank_key.is_(None), tracker.pk > pk)
+    return or_(
+        tracker.rank_key > rank_key,
+        and_(tracker.rank_key == rank_key, tracker.pk > pk),
+        tracker.rank_key.is_(None),
+    )
+
+
 def apply_list_params(query, tracker, params: dict):
-    """Apply the shared filters and paging to a tracker query."""
+    """
+    Apply the shared filters, rank ordering and paging to a tracker query.
+    Fetches one row past the page so ``paginate`` knows whether more follow.
+    """
     if params['on_rankings'] is not None:
         query = query.filter(tracker.on_rankings.is_(params['on_rankings']))
     if params['on_watchlist'] is not None:
         query = query.filter(tracker.on_watchlist.is_(params['on_watchlist']))
-    return query.offset(params['offset']).limit(params['limit'])
+    if params['after'] is not None:
+        query = query.filter(_after(tracker, *params['after']))
+    query = query.order_by(tracker.rank_key.asc().nulls_last(), tracker.pk)
+    return query.offset(params['offset']).limit(params['limit'] + 1)
 
 
-def guard_truncation(rows, params: dict, label: str):
+def paginate(rows, params: dict, response: Response):
     """
-    Refuse to silently truncate.
-
-    A caller that asked for the default page and got exactly ``MAX_PAGE`` rows
-    has outgrown the endpoint; returning a silently-clipped list would corrupt
-    a rankings board. Fail loudly instead so it surfaces as an error rather
-    than as missing entries.
+    Trim the look-ahead row and, when there was one, point ``Next-Cursor``
+    at the last row served.
     """
-    if len(rows) == params['limit'] == MAX_PAGE:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=(
-                f'{label} library exceeds {MAX_PAGE} entries — '
-                'page it with limit/offset'
-            ),
-        )
+    if len(rows) <= params['limit']:
+        return rows
+    rows = rows[: params['limit']]
+    last = rows[-1]
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.rank_key, last.pk)
     return rows
+
+
+def changes(db: Session, query, tracker_model, user_pk: int, since: int) -> dict:
+    """
+    The delta for a client holding token ``since`` (0: a full snapshot):
+    trackers from ``query`` (the list endpoint's, already scoped to the user)
+    written since then, tombstoned tracker ids, the ranked order when
+    anything changed, and the token to send next time.
+    """
+    token, live, deleted = tracker_changes.logged_since(
+        db, tracker_model, user_pk, since
+    )
+    if since == 0:
+        upserted = query.all()
+    else:
+        upserted = query.filter(tracker_model.id.in_(live)).all() if live else []
+    rankings.attach_positions(db, upserted)
+    return {
+        'token': token,
+        'upserted': upserted,
+        'deleted': deleted,
+        'ranking': (
+            rankings.ranked_ids(db, tracker_model, user_pk)
+            if upserted or deleted
+            else None
+        ),
+    }
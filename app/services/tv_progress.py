@@ -0,0 +1,325 @@
+"""
+Materialized per-(user, show) watch progress for the TV list.
+
+``GET /v1/users/me/tv-shows`` badged every show (not_started / behind /
+up_to_date / complete) from two GROUP BY aggregations over ``tv_episodes``
+and ``user_tv_episodes`` across the user's whole library, on every call.
+The counts now live in ``tv_progress``, one row per tracked show:
+
+- writes keep them current. A flush hook here recounts the (user, show)
+  pairs a flush touched: watch marks (``mark_episode_watched``,
+  ``mark_all_episodes_watched``, ``unmark_episode_watched``), episodes
+  created or re-dated (for every user tracking the show) and newly tracked
+  shows. Like the tracker change log, no ORM write path can forget; the one
+  Core writer, ``sync_episodes``' bulk upsert, calls ``refresh_shows``. The
+  same hook maintains the precomputed schedule (``tv_schedule``).
+- the list reads them by primary key (``counts``).
+- airing is time, not a write: each row also keeps the show's next known
+  airdate. Past it the row is stale, and the read recounts just those
+  shows live until ``app.jobs.reconcile_tv_progress`` stores fresh counts.
+  The job also fills rows the hook never saw (bulk imports, raw SQL) and
+  drops rows for shows no longer tracked.
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import (
+    and_,
+    case,
+    delete,
+    event,
+    func,
+    inspect,
+    select,
+    tuple_,
+)
+from sqlalchemy.orm import Session
+
+from app.db.models import DbTVProgress
+from app.db.models_sandbox import (
+    DbTVEpisode,
+    DbTVShow,
+    DbUserTVEpisode,
+    DbUserTVShow,
+)
+from app.services import bulk_upsert, tv_schedule
+
+# (user pk, show pk)
+Pair = Tuple[int, int]
+# (aired_count, watched_count, next_airdate)
+Progress = Tuple[int, int, Optional[datetime]]
+
+
+def _now() -> datetime:
+    # airdate is stored tz-naive (see tv_search._to_date), so compare naive.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def compute(connection, pairs: Set[Pair], now: datetime) -> Dict[Pair, Progress]:
+    """Count aired and watched episodes for ``pairs`` from the episode tables."""
+    if not pairs:
+        return {}
+    show_pks = {show_pk for _, show_pk in pairs}
+    aired = DbTVEpisode.airdate <= now
+    shows = {
+        row.tv_show_id: row
+        for row in connection.execute(
+            select(
+                DbTVEpisode.tv_show_id,
+                func.count(case((aired, 1))).label(  # pylint: disable=not-callable
+                    'aired'
+                ),
+                func.min(case((DbTVEpisode.airdate > now, DbTVEpisode.airdate))).label(
+                    'next_airdate'
+                ),
+            )
+            .where(DbTVEpisode.tv_show_id.in_(show_pks))
+            .group_by(DbTVEpisode.tv_show_id)
+        )
+    }
+    watched = {
+        (row.user_id, row.tv_show_id): row.watched
+        for row in connection.execute(
+            select(
+                DbUserTVEpisode.user_id,
+                DbTVEpisode.tv_show_id,
+                func.count().label('watched'),  # pylint: disable=not-callable
+            )
+            .join(DbTVEpisode, DbUserTVEpisode.episode_id == DbTVEpisode.pk)
+            .where(
+                DbTVEpisode.tv_show_id.in_(show_pks),
+                DbUserTVEpisode.user_id.in_({user_pk for user_pk, _ in pairs}),
+                DbUserTVEpisode.watched == 1,
+                aired,
+            )
+            .group_by(DbUserTVEpisode.user_id, DbTVEpisode.tv_show_id)
+        )
+    }
+    result = {}
+    for pair in pairs:
+        show = shows.get(pair[1])
+        result[pair] = (
+            show.aired if show is not None else 0,
+            watched.get(pair, 0),
+            show.next_airdate if show is not None else None,
+        )
+    return result
+
+
+def _pair_filter(pairs: Iterable[Pair]):
+    table = DbTVProgress.__table__
+    return tuple_(table.c.user_id, table.c.tv_show_id).in_(list(pairs))
+
+
+def store(connection, progress: Dict[Pair, Progress]) -> None:
+    """
+    Write ``progress``'s counts over its pairs' rows. An upsert rather than
+    delete-and-insert: two flushes recounting the same pair at once (two
+    quick watch marks, a mark during a sync) must not collide on the key.
+    """
+    if not progress:
+        return
+    bulk_upsert.update_rows(
+        connection,
+        DbTVProgress.__table__,
+        [
+            {
+                'user_id': user_pk,
+                'tv_show_id': show_pk,
+                'aired_count': aired,
+                'watched_count': watched,
+                'next_airdate': next_airdate,
+            }
+            for (user_pk, show_pk), (aired, watched, next_airdate) in progress.items()
+        ],
+        ('aired_count', 'watched_count', 'next_airdate'),
+        key=('user_id', 'tv_show_id'),
+    )
+
+
+def refresh(connection, pairs: Set[Pair]) -> None:
+    """Recount and store ``pairs``."""
+    store(connection, compute(connection, pairs, _now()))
+
+
+def drop(connection, pairs: Set[Pair]) -> None:
+    """Forget ``pairs`` (the show is no longer tracked)."""
+    if pairs:
+        connection.execute(delete(DbTVProgress.__table__).where(_pair_filter(pairs)))
+
+
+def refresh_shows(connection, show_pks: Set[int]) -> None:
+    """
+    Recount progress and rebuild schedules for every tracker of ``show_pks``,
+    after episode writes the flush hook cannot see (``sync_episodes``' bulk
+    upsert).
+    """
+    pairs = _trackers_of(connection, show_pks)
+    refresh(connection, pairs)
+    tv_schedule.rebuild(connection, pairs)
+
+
+def counts(db: Session, user_pk: int, show_pks: Iterable[int]) -> Dict[int, Progress]:
+    """
+    Progress per show for one user: stored rows where still current, live
+    counts for shows with no row or an episode aired since it was counted.
+    """
+    show_pks = set(show_pks)
+    if not show_pks:
+        return {}
+    now = _now()
+    table = DbTVProgress.__table__
+    result = {}
+    for row in db.execute(
+        select(table).where(
+            table.c.user_id == user_pk, table.c.tv_show_id.in_(show_pks)
+        )
+    ):
+        if row.next_airdate is None or row.next_airdate > now:
+            result[row.tv_show_id] = (
+                row.aired_count,
+                row.watched_count,
+                row.next_airdate,
+            )
+    stale = {(user_pk, show_pk) for show_pk in show_pks - set(result)}
+    for (_, show_pk), progress in compute(db.connection(), stale, now).items():
+        result[show_pk] = progress
+    return result
+
+
+def _episode_shows(connection, episode_pks: Set[int]) -> Dict[int, int]:
+    """episode pk -> show pk."""
+    if not episode_pks:
+        return {}
+    return dict(
+        connection.execute(
+            select(DbTVEpisode.pk, DbTVEpisode.tv_show_id).where(
+                DbTVEpisode.pk.in_(episode_pks)
+            )
+        ).all()
+    )
+
+
+def _trackers_of(connection, show_pks: Set[int]) -> Set[Pair]:
+    if not show_pks:
+        return set()
+    return set(
+        connection.execute(
+            select(DbUserTVShow.user_id, DbUserTVShow.tv_show_id).where(
+                DbUserTVShow.tv_show_id.in_(show_pks)
+            )
+        ).all()
+    )
+
+
+def _tracked(connection, pairs: Set[Pair]) -> Set[Pair]:
+    """The subset of ``pairs`` whose show the user tracks."""
+    if not pairs:
+        return set()
+    rows = connection.execute(
+        select(DbUserTVShow.user_id, DbUserTVShow.tv_show_id).where(
+            tuple_(DbUserTVShow.user_id, DbUserTVShow.tv_show_id).in_(list(pairs))
+        )
+    )
+    return set(rows.all())
+
+
+def _changed(session: Session, obj, *names: str) -> bool:
+    """Whether a flushed object is new, deleted, or changed any of ``names``."""
+    if obj in session.new or obj in session.deleted:
+        return True
+    attrs = inspect(obj).attrs
+    return any(attrs[name].history.has_changes() for name in names)
+
+
+# Tracker columns deciding whether a show is on the user's schedule.
+_FOLLOWING = ('on_watchlist', 'on_rankings', 'freeze')
+# Episode columns the counts or the schedule read.
+_EPISODE_DETAILS = ('airdate', 'tv_show_id', 'title', 'season', 'season_number')
+
+
+@event.listens_for(Session, 'after_flush')
+def _refresh_flushed_tv_state(  # pylint: disable=too-many-branches, too-many-locals
+    session: Session, _flush_context
+) -> None:
+    """Recount progress and rebuild schedule entries for what a flush wrote."""
+    marks: Dict[int, Set[int]] = {}  # episode pk -> users whose mark changed
+    watched: Set[Pair] = set()  # (user, episode) now watched
+    episode_shows: Set[int] = set()  # shows whose episodes changed
+    renamed: Set[int] = set()  # shows whose schedule details changed
+    trackers: Set[Pair] = set()  # tracked, or following state changed
+    gone: Set[Pair] = set()  # untracked
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, DbUserTVEpisode):
+            marks.setdefault(obj.episode_id, set()).add(obj.user_id)
+            if obj not in session.deleted and obj.watched == 1:
+                watched.add((obj.user_id, obj.episode_id))
+        elif isinstance(obj, DbTVEpisode):
+            if _changed(session, obj, *_EPISODE_DETAILS):
+                episode_shows.add(obj.tv_show_id)
+        elif isinstance(obj, DbTVShow):
+            if obj not in session.new and _changed(session, obj, 'title'):
+                renamed.add(obj.pk)
+        elif isinstance(obj, DbUserTVShow):
+            pair = (obj.user_id, obj.tv_show_id)
+            if obj in session.deleted:
+                gone.add(pair)
+            elif _changed(session, obj, *_FOLLOWING):
+                trackers.add(pair)
+    if not (marks or episode_shows or renamed or trackers or gone):
+        return
+    connection = session.connection()
+    marked: Set[Pair] = set()
+    unmarked: Set[Pair] = set()
+    for episode_pk, show_pk in _episode_shows(connection, set(marks)).items():
+        for user_pk in marks[episode_pk]:
+            marked.add((user_pk, show_pk))
+            if (user_pk, episode_pk) not in watched:
+                unmarked.add((user_pk, show_pk))
+    marked = _tracked(connection, marked)
+    shows = _trackers_of(connection, episode_shows)
+
+    drop(connection, gone)
+    refresh(connection, (marked | shows | trackers) - gone)
+    # A watched mark only removes its entry; anything else rebuilds the show.
+    tv_schedule.forget(connection, watched)
+    renamed_pairs = _trackers_of(connection, renamed)
+    tv_schedule.rebuild(
+        connection, (unmarked & marked) | shows | renamed_pairs | trackers | gone
+    )
+
+
+def stale_pairs(db: Session, full: bool = False) -> Set[Pair]:
+    """
+    Tracked (user, show) pairs with no row or a stale one (every pair with
+    ``full``).
+    """
+    table = DbTVProgress.__table__
+    query = select(DbUserTVShow.user_id, DbUserTVShow.tv_show_id)
+    if not full:
+        query = query.outerjoin(
+            table,
+            and_(
+                table.c.user_id == DbUserTVShow.user_id,
+                table.c.tv_show_id == DbUserTVShow.tv_show_id,
+            ),
+        ).where(table.c.user_id.is_(None) | (table.c.next_airdate <= _now()))
+    return set(db.execute(query).all())
+
+
+def orphan_pairs(db: Session) -> Set[Pair]:
+    """Stored pairs whose show is no longer tracked."""
+    table = DbTVProgress.__table__
+    query = (
+        select(table.c.user_id, table.c.tv_show_id)
+        .outerjoin(
+            DbUserTVShow,
+            and_(
+                DbUserTVShow.user_id == table.c.user_id,
+                DbUserTVShow.tv_show_id == table.c.tv_show_id,
+            ),
+        )
+        .where(DbUserTVShow.pk.is_(None))
+    )
+    return set(db.execute(query).all())
@@ -0,0 +1,232 @@
+"""
+Precomputed per-user Schedule page (``GET /v1/users/me/schedule``).
+
+The schedule used to be recomputed on every call: an anti-join over every
+dated episode of every active show up to the window's end, so a user
+following 150 long-running shows pulled thousands of catch-up rows per
+request. ``schedule_entries`` now holds each user's unwatched, dated episodes
+of the shows they actively follow (on a list, not frozen), with the show and
+episode details the page prints:
+
+- writes keep it current, from the same flush hook as ``tv_progress``:
+  marking an episode watched deletes its entry; unmarking, tracking,
+  freezing/unfreezing or untracking a show, episodes created or changed
+  (``sync_episodes`` via ``tv_progress.refresh_shows``) and a show renamed
+  rebuild that (user, show)'s
+  entries with one INSERT ... SELECT;
+- reads are two indexed, paged range scans. ``upcoming`` (the +/- window,
+  by airdate) and ``catch_up`` (everything aired, by show and episode) each
+  take a keyset cursor and return the next one.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import List, Optional, Set, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import (
+    and_,
+    delete,
+    exists,
+    func,
+    literal,
+    or_,
+    select,
+    tuple_,
+)
+from sqlalchemy.orm import Session
+
+from app.db.models import DbScheduleEntry
+from app.db.models_sandbox import DbTVEpisode, DbTVShow, DbUserTVEpisode, DbUserTVShow
+from app.services import bulk_upsert
+
+# (user pk, show pk)
+Pair = Tuple[int, int]
+
+DEFAULT_PAGE = 100
+MAX_PAGE = 500
+
+_COLUMNS = (
+    'user_id',
+    'episode_pk',
+    'tv_show_id',
+    'show_id',
+    'show_title',
+    'episode_id',
+    'episode_title',
+    'season',
+    'season_number',
+    'airdate',
+)
+
+
+def _entries_of(pairs: Set[Pair]):
+    """SELECT of the entries ``pairs`` should have, in ``_COLUMNS`` order."""
+    watched = exists().where(
+        DbUserTVEpisode.episode_id == DbTVEpisode.pk,
+        DbUserTVEpisode.user_id == DbUserTVShow.user_id,
+        DbUserTVEpisode.watched == 1,
+    )
+    return (
+        select(
+            DbUserTVShow.user_id,
+            DbTVEpisode.pk,
+            DbTVEpisode.tv_show_id,
+            DbTVShow.id,
+            DbTVShow.title,
+            DbTVEpisode.id,
+            DbTVEpisode.title,
+            DbTVEpisode.season,
+            DbTVEpisode.season_number,
+            DbTVEpisode.airdate,
+        )
+        .join(DbTVEpisode, DbTVEpisode.tv_show_id == DbUserTVShow.tv_show_id)
+        .join(DbTVShow, DbTVShow.pk == DbUserTVShow.tv_show_id)
+        .where(
+            tuple_(DbUserTVShow.user_id, DbUserTVShow.tv_show_id).in_(list(pairs)),
+            or_(
+                DbUserTVShow.on_watchlist.is_(True), DbUserTVShow.on_rankings.is_(True)
+            ),
+            func.coalesce(DbUserTVShow.freeze, 0) == 0,
+            DbTVEpisode.airdate.isnot(None),
+            ~watched,
+        )
+    )
+
+
+def rebuild(connection, pairs: Set[Pair]) -> None:
+    """
+    Replace the entries of ``pairs`` with what they should be now. The
+    insert upserts: two flushes rebuilding the same pair at once (an unmark
+    during a ``sync_episodes``) must not collide on the key.
+    """
+    if not pairs:
+        return
+    table = DbScheduleEntry.__table__
+    connection.execute(
+        delete(table).where(
+            tuple_(table.c.user_id, table.c.tv_show_id).in_(list(pairs))
+        )
+    )
+    bulk_upsert.insert_from_select(
+        connection,
+        table,
+        _COLUMNS,
+        _entries_of(pairs),
+        key=('user_id', 'episode_pk'),
+        update=_COLUMNS[2:],
+    )
+
+
+def forget(connection, watched: Set[Tuple[int, int]]) -> None:
+    """Drop the entries of ``(user pk, episode pk)`` marks just watched."""
+    if watched:
+        table = DbScheduleEntry.__table__
+        connection.execute(
+            delete(table).where(
+                tuple_(table.c.user_id, table.c.episode_pk).in_(list(watched))
+            )
+        )
+
+
+# --- Reads ---
+def _sort_keys(name: str) -> list:
+    table = DbScheduleEntry.__table__
+    if name == 'upcoming':
+        leading = [table.c.airdate, table.c.show_title]
+    else:
+        leading = [table.c.show_title, func.coalesce(table.c.season, 0)]
+    return [*leading, func.coalesce(table.c.season_number, 0), table.c.episode_pk]
+
+
+def _cursor_values(row, name: str) -> list:
+    number = row['season_number'] or 0
+    if name == 'upcoming':
+        return [
+            row['airdate'].isoformat(),
+            row['show_title'],
+            number,
+            row['episode_pk'],
+        ]
+    return [row['show_title'], row['season'] or 0, number, row['episode_pk']]
+
+
+def encode_cursor(values: list) -> str:
+    """Opaque cursor for the row after which the next page starts."""
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, name: str) -> list:
+    """Inverse of ``encode_cursor``; 422 on anything malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != 4:
+            raise ValueError(cursor)
+        if name == 'upcoming':
+            values[0] = datetime.fromisoformat(values[0])
+        return values
+    except (binascii.Error, TypeError, ValueError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f'Invalid {name}_cursor',
+        ) from exc
+
+
+def page(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+    db: Session,
+    user_pk: int,
+    name: str,
+    bounds: tuple,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List, Optional[str]]:
+    """
+    One page of ``upcoming`` or ``catch_up``: entries with ``bounds[0] <=
+    airdate <= bounds[1]`` (either end may be None) after ``cursor``, and the
+    cursor of the next page (None on the last).
+    """
+    table = DbScheduleEntry.__table__
+    keys = _sort_keys(name)
+    query = select(table).where(table.c.user_id == user_pk)
+    low, high = bounds
+    if low is not None:
+        query = query.where(table.c.airdate >= low)
+    if high is not None:
+        query = query.where(table.c.airdate <= high)
+    if cursor is not None:
+        after = decode_cursor(cursor, name)
+        query = query.where(
+            tuple_(*keys)
+            > tuple_(*(literal(value, key.type) for key, value in zip(keys, after)))
+        )
+    rows = db.execute(query.order_by(*keys).limit(limit + 1)).mappings().all()
+    if len(rows) <= limit:
+        return rows, None
+    return rows[:limit], encode_cursor(_cursor_values(rows[limit - 1], name))
+
+
+def tracked_pairs(db: Session) -> Set[Pair]:
+    """Every tracked (user, show) pair, for a full rebuild."""
+    return set(db.execute(select(DbUserTVShow.user_id, DbUserTVShow.tv_show_id)).all())
+
+
+def orphan_pairs(db: Session) -> Set[Pair]:
+    """Pairs with entries whose show is no longer tracked."""
+    table = DbScheduleEntry.__table__
+    query = (
+        select(table.c.user_id, table.c.tv_show_id)
+        .outerjoin(
+            DbUserTVShow,
+            and_(
+                DbUserTVShow.user_id == table.c.user_id,
+                DbUserTVShow.tv_show_id == table.c.tv_show_id,
+            ),
+        )
+        .where(DbUserTVShow.pk.is_(None))
+        .distinct()
+    )
+    return set(db.execute(query).all())
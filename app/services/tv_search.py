@@ -10,16 +10,23 @@ and the full episode list.
 """
 
 import re
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
 
 import requests
 from fastapi import HTTPException, status
+from sqlalchemy import select
 
 from app.log.logging_config import logger
+from app.services import (
+    provider_cache,
+    provider_http,
+    provider_validators,
+    single_flight,
+)
 
 TVMAZE_URL = 'https://api.tvmaze.com'
-REQUEST_TIMEOUT = 10
+REQUEST_TIMEOUT = provider_http.REQUEST_TIMEOUT
 
 
 def _strip_html(value: Optional[str]) -> Optional[str]:
@@ -82,7 +89,7 @@ def _lookup_show(params: dict) -> List[dict]:
     failures.
     """
     try:
-        response = requests.get(
+        response = provider_http.get(
             f'{TVMAZE_URL}/lookup/shows',
             params=params,
             timeout=REQUEST_TIMEOUT,
@@ -103,6 +110,8 @@ def _lookup_show(params: dict) -> List[dict]:
     return [_normalize_show(payload)]
 
 
+@provider_cache.cached('tvmaze.search', key=provider_cache.normalized_query)
+@single_flight.coalesced('tvmaze.search', key=provider_cache.normalized_query)
 def search_tv_shows(query: str) -> List[dict]:
     """
     Search TVMaze for shows matching ``query``.
@@ -131,7 +140,7 @@ def search_tv_shows(query: str) -> List[dict]:
         return _lookup_show({'thetvdb': query})
 
     try:
-        response = requests.get(
+        response = provider_http.get(
             f'{TVMAZE_URL}/search/shows',
             params={'q': query},
             timeout=REQUEST_TIMEOUT,
@@ -167,8 +176,11 @@ _FIELD_LIMITS = {
 def apply_detail_to_show(show, detail: dict) -> None:
     """
     Copy TVMaze detail onto a DbTVShow, truncating to column limits and
-    skipping None values (never clobber a good value with None).
+    skipping None values (never clobber a good value with None). A no-op for
+    ``provider_validators.UNCHANGED``.
     """
+    if detail is provider_validators.UNCHANGED:
+        return
     for key, value in detail.items():
         if value is None:
             continue
@@ -177,28 +189,35 @@ def apply_detail_to_show(show, detail: dict) -> None:
         setattr(show, key, value)
 
 
+@provider_cache.cached('tvmaze.show')
+@single_flight.coalesced('tvmaze.show')
 def get_tv_show_detail(tvmaze_id: Optional[int]) -> Optional[dict]:
     """
     Fetch full detail for a show by TVMaze id and map it to the fields the
     catalog stores. Returns None when unavailable so callers can skip
-    enrichment gracefully.
+    enrichment gracefully, and ``UNCHANGED`` from a conditional fetch
+    (``provider_validators``) with nothing new.
     """
     if not tvmaze_id:
         return None
     try:
-        response = requests.get(
+        response = provider_validators.get(
+            'tvmaze.show',
+            str(tvmaze_id),
             f'{TVMAZE_URL}/shows/{int(tvmaze_id)}',
             timeout=REQUEST_TIMEOUT,
         )
+        if response is provider_validators.UNCHANGED:
+            return response
         response.raise_for_status()
         payload = response.json()
     except (requests.RequestException, ValueError) as exc:
         logger.warning('TVMaze detail failed for %s: %s', tvmaze_id, exc)
-        return None
+        raise provider_cache.Unavailable(None) from exc
 
     premiered = _to_date(payload.get('premiered'))
     genres = payload.get('genres') or []
-    return {
+    detail = {
         'title': payload.get('name'),
         'tvmaze': payload.get('id'),
         'imdb': (payload.get('externals') or {}).get('imdb'),
@@ -213,26 +232,34 @@ def get_tv_show_detail(tvmaze_id: Optional[int]) -> Optional[dict]:
         'summary': _strip_html(payload.get('summary')),
         'poster_url': _poster(payload),
     }
+    return provider_validators.settle('tvmaze.show', str(tvmaze_id), detail)
 
 
+@provider_cache.cached('tvmaze.episodes')
+@single_flight.coalesced('tvmaze.episodes')
 def get_show_episodes(tvmaze_id: Optional[int]) -> List[dict]:
     """
     Fetch the full episode list for a show and normalize each episode to the
     catalog's fields (``tvmaze``, ``title``, ``season``, ``season_number``,
-    ``airdate``). Returns [] when unavailable.
+    ``airdate``). Returns [] when unavailable, and ``UNCHANGED`` from a
+    conditional fetch with nothing new.
     """
     if not tvmaze_id:
         return []
     try:
-        response = requests.get(
+        response = provider_validators.get(
+            'tvmaze.episodes',
+            str(tvmaze_id),
             f'{TVMAZE_URL}/shows/{int(tvmaze_id)}/episodes',
             timeout=REQUEST_TIMEOUT,
         )
+        if response is provider_validators.UNCHANGED:
+            return response
         response.raise_for_status()
         payload = response.json()
     except (requests.RequestException, ValueError) as exc:
         logger.warning('TVMaze episodes failed for %s: %s', tvmaze_id, exc)
-        return []
+        raise provider_cache.Unavailable([]) from exc
 
     episodes = []
     for item in payload or []:
@@ -245,14 +272,65 @@ def get_show_episodes(tvmaze_id: Optional[int]) -> List[dict]:
                 'airdate': _to_date(item.get('airdate')),
             }
         )
-    return episodes
+    return provider_validators.settle('tvmaze.episodes', str(tvmaze_id), episodes)
 
 
-def sync_episodes(db, show) -> int:
+def get_show_updates() -> Optional[Dict[int, int]]:
+    """
+    TVMaze's ``/updates/shows`` feed: show id -> epoch of the show's last
+    change (episodes included). One call covers the whole catalog. Not
+    cached; returns None when unavailable.
+    """
+    try:
+        response = provider_http.get(
+            f'{TVMAZE_URL}/updates/shows',
+            timeout=REQUEST_TIMEOUT,
+        )
+        response.raise_for_status()
+        payload = response.json()
+        return {int(show_id): int(updated) for show_id, updated in payload.items()}
+    except (requests.RequestException, ValueError, TypeError, AttributeError) as exc:
+        logger.warning('TVMaze updates feed failed: %s', exc)
+        return None
+
+
+# Episode columns a sync writes (and diffs against what is stored).
+_SYNCED_COLUMNS = ('tvmaze', 'title', 'season', 'season_number', 'airdate')
+
+
+def _match(stored: dict, episodes: List[dict]):
+    """
+    ``(pk -> stored row with the incoming values merged, unmatched episodes)``
+    for a sync of ``episodes`` over ``stored`` (pk -> stored row).
+    """
+    by_tvmaze = {row['tvmaze']: row for row in stored.values() if row['tvmaze']}
+    # Ambiguous slots (an existing duplicate pair) are left out: reconciling
+    # those is audit_watch_gaps' job, and guessing here could pick the orphan.
+    by_slot = {}
+    for row in stored.values():
+        slot = (row['season'], row['season_number'])
+        by_slot[slot] = None if slot in by_slot else row
+
+    merged, new = {}, []
+    for data in episodes:
+        current = by_tvmaze.get(data['tvmaze'])
+        if current is None:
+            current = by_slot.get((data.get('season'), data.get('season_number')))
+        if current is not None:
+            values = {key: value for key, value in data.items() if value is not None}
+            merged[current['pk']] = {**merged.get(current['pk'], current), **values}
+        else:
+            new.append(data)
+    return merged, new
+
+
+def sync_episodes(db, show, episodes: Optional[List[dict]] = None) -> int:
     """
     Upsert the TVMaze episode list for ``show`` into the catalog. Returns the
     number of episodes created; existing episodes get their title/season/
-    airdate refreshed.
+    airdate refreshed. ``episodes`` is a list already fetched with
+    ``get_show_episodes`` (refresh_tv fetches off-thread); fetched here when
+    None. ``UNCHANGED`` (a conditional fetch with nothing new) writes nothing.
 
     Episodes are matched on their TVMaze id first, then on their slot in the
     show — ``(season, season_number)``. The slot fallback matters because
@@ -261,39 +339,55 @@ def sync_episodes(db, show) -> int:
     slot. Watch history lives on the original row's ``episode_id``, so the
     episode silently reverted to unwatched. Matching the slot updates the id
     on the row that already exists, and the history stays attached.
+
+    The write is set-based (``bulk_upsert``): incoming episodes are diffed
+    against the stored columns, and only new rows and rows that actually
+    changed are written, a chunk per statement. A re-sync of an unchanged
+    1,000-episode show reads one query and writes nothing. Because the rows
+    bypass the ORM, watch progress and schedules are refreshed here rather
+    than by the flush hook.
     """
     # Imported locally to avoid a service->models import at module load in
     # callers that only need search.
-    from app.db.models_sandbox import (  # pylint: disable=import-outside-toplevel
-        DbTVEpisode,
-    )
+    # pylint: disable=import-outside-toplevel
+    from app.db.models_sandbox import DbTVEpisode
+    from app.services import bulk_upsert, tv_progress
 
-    episodes = get_show_episodes(show.tvmaze)
-    if not episodes:
+    if episodes is None:
+        episodes = get_show_episodes(show.tvmaze)
+    if not episodes or episodes is provider_validators.UNCHANGED:
         return 0
 
-    rows = db.query(DbTVEpisode).filter(DbTVEpisode.tv_show_id == show.pk).all()
-    by_tvmaze = {ep.tvmaze: ep for ep in rows if ep.tvmaze}
-    # Ambiguous slots (an existing duplicate pair) are left out: reconciling
-    # those is audit_watch_gaps' job, and guessing here could pick the orphan.
-    by_slot = {}
-    for ep in rows:
-        slot = (ep.season, ep.season_number)
-        if slot in by_slot:
-            by_slot[slot] = None
-        else:
-            by_slot[slot] = ep
-
-    created = 0
-    for data in episodes:
-        current = by_tvmaze.get(data['tvmaze'])
-        if current is None:
-            current = by_slot.get((data.get('season'), data.get('season_number')))
-        if current is not None:
-            for key, value in data.items():
-                if value is not None:
-                    setattr(current, key, value)
-        else:
-            db.add(DbTVEpisode(tv_show_id=show.pk, **data))
-            created += 1
+    stored = {
+        row['pk']: dict(row)
+        for row in db.execute(
+            select(
+                DbTVEpisode.pk,
+                *(getattr(DbTVEpisode, name) for name in _SYNCED_COLUMNS),
+            ).where(DbTVEpisode.tv_show_id == show.pk)
+        ).mappings()
+    }
+    merged, new = _match(stored, episodes)
+
+    now = datetime.now(timezone.utc)
+    changed = [
+        {**row, 'tv_show_id': show.pk, 'updated_at': now}
+        for pk, row in merged.items()
+        if row != stored[pk]
+    ]
+    table = DbTVEpisode.__table__
+    connection = db.connection()
+    bulk_upsert.update_rows(
+        connection, table, changed, (*_SYNCED_COLUMNS, 'updated_at')
+    )
+    created = bulk_upsert.insert_missing(
+        connection, table, [{'tv_show_id': show.pk, **data} for data in new], 'tvmaze'
+    )
+    if changed or created:
+        tv_progress.refresh_shows(connection, {show.pk})
+        # Episodes already loaded in the session are now stale.
+        db.expire(show, ['episodes'])
+        for obj in list(db.identity_map.values()):
+            if isinstance(obj, DbTVEpisode) and obj.tv_show_id == show.pk:
+                db.expire(obj)
     return created
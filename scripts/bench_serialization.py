@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-row cost of serializing tracker lists to JSON.
+
+Compares the paths list endpoints used to take with the ones in
+``app/services/fast_json.py``, on in-memory ORM rows (no database):
+
+- tv list: each tracker built twice (``UserTVShowResponse`` dumped into
+  ``UserTVShowWithStatus``) and then re-validated by ``response_model``,
+  versus status fields set on the rows and validated once;
+- export: ``model_validate(...).model_dump(mode='json')`` per row, then
+  ``jsonable_encoder`` + ``json.dumps`` on the whole payload, versus
+  validating and dumping the rows once in Pydantic's core.
+
+Usage:
+    python scripts/bench_serialization.py [--rows 1000] [--repeat 20]
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from datetime import date, datetime
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# pylint: disable=wrong-import-position
+from fastapi.encoders import jsonable_encoder
+
+from app.db.models_sandbox import DbTVShow, DbUserTVShow
+from app.schemas.schemas_sandbox import UserTVShowResponse, UserTVShowWithStatus
+from app.services import fast_json
+
+
+def make_rows(count: int) -> list:
+    """Transient show trackers shaped like a real library."""
+    now = datetime(2026, 1, 1, 12, 0)
+    rows = []
+    for i in range(count):
+        show = DbTVShow(
+            pk=i,
+            id=f'show-{i:08d}',
+            title=f'Show {i}',
+            imdb=f'tt{i:07d}',
+            tvmaze=i,
+            status='Running',
+            poster_url=f'https://static.example/posters/{i}.jpg',
+            premiered=now,
+            year=2020,
+            genre='Drama, Thriller',
+            network='HBO',
+            runtime=60,
+            summary='A long synopsis. ' * 20,
+        )
+        rows.append(
+            DbUserTVShow(
+                pk=i,
+                id=f'tracker-{i:08d}',
+                tv_show_id=i,
+                tv_show=show,
+                on_watchlist=bool(i % 2),
+                on_rankings=not i % 2,
+                notes='Some notes',
+                completed_at=date(2025, 6, 1),
+                created_at=now,
+                updated_at=now,
+            )
+        )
+    return rows
+
+
+def tv_before(rows: list) -> bytes:
+    """Old tv list: two models per row, then re-validated for the response."""
+    built = [
+        UserTVShowWithStatus(
+            **UserTVShowResponse.model_validate(row).model_dump(),
+            watch_status='behind',
+            aired_count=10,
+            watched_count=4,
+        )
+        for row in rows
+    ]
+    return fast_json.dump(List[UserTVShowWithStatus], built)
+
+
+def tv_after(rows: list) -> bytes:
+    """Status set on the rows, validated and dumped once."""
+    for row in rows:
+        row.watch_status, row.aired_count, row.watched_count = 'behind', 10, 4
+    return fast_json.dump(List[UserTVShowWithStatus], rows)
+
+
+def export_before(rows: list) -> bytes:
+    """Old export: a dict per row, then jsonable_encoder + json.dumps."""
+    payload = [
+        UserTVShowResponse.model_validate(r).model_dump(mode='json') for r in rows
+    ]
+    return json.dumps(jsonable_encoder({'tv_shows': payload})).encode()
+
+
+def export_after(rows: list) -> bytes:
+    """Rows validated and dumped once."""
+    return fast_json.dump(List[UserTVShowResponse], rows)
+
+
+def main() -> None:
+    """Time both paths for each scenario and print the per-row cost."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    print(f'{args.rows} rows, best of {args.repeat} runs (microseconds per row)')
+    for name, before, after in (
+        ('tv list', tv_before, tv_after),
+        ('export', export_before, export_after),
+    ):
+        costs = [
+            min(timeit.repeat(lambda f=f: f(rows), number=1, repeat=args.repeat))
+            * 1e6
+            / args.rows
+            for f in (before, after)
+        ]
+        print(
+            f'{name:8}  before {costs[0]:7.2f}  after {costs[1]:7.2f}  '
+            f'({costs[0] / costs[1]:.1f}x)'
+        )
+
+
+if __name__ == '__main__':
+    main()
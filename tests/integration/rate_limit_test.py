@@ -6,8 +6,11 @@ auth limits, per-user search limits, and the daily catalog-add cap.
 from unittest.mock import patch
 
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.pool import StaticPool
 
 from app.config import Settings
+from app.db.models import DbRateLimit
 from app.services import rate_limit
 
 ENABLED = {'env': 'github', 'rate_limits_enabled': True}
@@ -34,7 +37,8 @@ def test_password_login_kill_switch(mock_settings, test_client: TestClient):
 @patch('app.services.rate_limit.get_settings')
 def test_auth_attempts_are_rate_limited_per_ip(mock_settings, test_client: TestClient):
     """
-    The 4th sign-in attempt inside the window gets a 429 with Retry-After.
+    The 4th sign-in attempt inside the window gets a 429 with Retry-After:
+    3 per 300s refills one attempt every 100s.
     """
     rate_limit.reset()
     mock_settings.return_value = Settings(**ENABLED, rate_limit_auth=3)
@@ -47,10 +51,44 @@ def test_auth_attempts_are_rate_limited_per_ip(mock_settings, test_client: TestC
         '/v1/auth/token', data={'username': 'x@y.z', 'password': 'wrong'}
     )
     assert response.status_code == 429
-    assert response.headers['retry-after'] == '300'
+    assert response.headers['retry-after'] == '100'
     rate_limit.reset()
 
 
+@patch('app.services.rate_limit.get_settings')
+def test_long_forwarded_for_is_limited_not_an_error(
+    mock_settings, test_client: TestClient
+):
+    """
+    An oversized X-Forwarded-For hop still fits the ``rate_limits`` key
+    column, and is limited like any other address.
+    """
+    mock_settings.return_value = Settings(**ENABLED, rate_limit_auth=3)
+    # Its own database: the SQL backend commits as it goes.
+    engine = create_engine(
+        'sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool
+    )
+    DbRateLimit.__table__.create(bind=engine)
+    headers = {'X-Forwarded-For': '1' * 5000}
+    with patch(
+        'app.services.rate_limit.backend', return_value=rate_limit.SQLBackend(engine)
+    ):
+        statuses = [
+            test_client.post(
+                '/v1/auth/token',
+                data={'username': 'x@y.z', 'password': 'wrong'},
+                headers=headers,
+            ).status_code
+            for _ in range(4)
+        ]
+    with engine.connect() as conn:
+        keys = conn.execute(select(DbRateLimit.__table__.c.key)).scalars().all()
+    engine.dispose()
+    assert statuses == [404, 404, 404, 429]
+    assert len(keys) == 1
+    assert len(keys[0]) <= rate_limit.MAX_KEY_LENGTH
+
+
 @patch('app.router.v1.router_movies.omdb_search_movies')
 @patch('app.services.rate_limit.get_settings')
 def test_search_is_rate_limited_per_user(
@@ -142,6 +142,54 @@ def test_activity_untracked_items_excluded(test_client: TestClient):
     assert resp.json() == []
 
 
+def test_activity_pages_with_before_cursor(test_client: TestClient):
+    headers = {'Authorization': f"Bearer {test_client.first_user.token}"}
+    done = {'on_rankings': True, 'completed_at': '2019-06-01'}
+    test_client.post(
+        f"/v1/users/me/movies/{_make_movie(test_client)}", headers=headers, json=done
+    )
+    test_client.post(
+        f"/v1/users/me/books/{_make_book(test_client)}", headers=headers, json=done
+    )
+    test_client.post(
+        f"/v1/users/me/games/{_make_game(test_client)}",
+        headers=headers,
+        json={'on_watchlist': True},
+    )
+    show_id = _make_show(test_client)
+    for number in (1, 2):
+        episode_id = _make_episode(
+            test_client, show_id, title=f'E{number}', season_number=number
+        )
+        test_client.post(f"/v1/users/me/episodes/{episode_id}", headers=headers)
+
+    everything = test_client.get('/v1/users/me/activity', headers=headers)
+    assert 'Next-Cursor' not in everything.headers
+    feed = everything.json()
+    assert len(feed) == 5
+    assert feed == sorted(feed, key=lambda i: i['occurred_at'], reverse=True)
+
+    paged, before = [], None
+    for _ in range(len(feed)):
+        params = {'limit': 2, **({'before': before} if before else {})}
+        resp = test_client.get('/v1/users/me/activity', headers=headers, params=params)
+        assert resp.status_code == 200
+        paged += resp.json()
+        before = resp.headers.get('Next-Cursor')
+        if before is None:
+            break
+    assert paged == feed
+
+
+def test_activity_rejects_bad_before_cursor(test_client: TestClient):
+    headers = {'Authorization': f"Bearer {test_client.first_user.token}"}
+    resp = test_client.get(
+        '/v1/users/me/activity', headers=headers, params={'before': 'not-a-cursor'}
+    )
+    assert resp.status_code == 422
+    assert resp.json()['message'] == 'Invalid before cursor'
+
+
 def test_activity_requires_auth(test_client: TestClient):
     resp = test_client.get('/v1/users/me/activity')
     assert resp.status_code == 401
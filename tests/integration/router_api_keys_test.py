@@ -2,7 +2,14 @@
 Test API-key management and key-based authentication.
 """
 
+from unittest.mock import patch
+
 from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+from app.auth import api_key_usage
+from app.config import Settings
+from app.db.models import DbApiKey
 
 
 def _create_key(test_client: TestClient, token: str, name: str = 'laptop mcp'):
@@ -38,16 +45,60 @@ def test_api_key_authenticates_as_owner(test_client: TestClient):
     '''
     A drk_ bearer token resolves to its owner and stamps last_used_at.
     '''
+    api_key_usage.reset()
     key = _create_key(test_client, test_client.first_user.token).json()['key']
     response = test_client.get(
         '/v1/users/me/api-keys', headers={'Authorization': f'Bearer {key}'}
     )
     assert response.status_code == 200
     assert response.json()[0]['name'] == 'laptop mcp'
-    # last_used_at is stamped by the auth path
+    # last_used_at is stamped by the auth path, via the write-behind buffer
+    assert api_key_usage.flush(test_client.test_db_session) == 1
+    response = test_client.get(
+        '/v1/users/me/api-keys',
+        headers={'Authorization': f'Bearer {test_client.first_user.token}'},
+    )
     assert response.json()[0]['last_used_at'] is not None
 
 
+@patch('app.auth.api_key_usage.get_settings')
+def test_api_key_usage_is_batched(mock_settings, test_client: TestClient):
+    '''
+    Repeated key use inside the flush period writes nothing; the next call
+    after the period flushes every buffered key in one go.
+    '''
+    api_key_usage.reset()
+    mock_settings.return_value = Settings(api_key_usage_flush_seconds=3600)
+    first = _create_key(test_client, test_client.first_user.token).json()['key']
+    second = _create_key(test_client, test_client.first_user.token, 'cron').json()[
+        'key'
+    ]
+    for key in (first, second, first):
+        assert (
+            test_client.get(
+                '/v1/users/me/api-keys', headers={'Authorization': f'Bearer {key}'}
+            ).status_code
+            == 200
+        )
+    listing = test_client.get(
+        '/v1/users/me/api-keys',
+        headers={'Authorization': f'Bearer {test_client.first_user.token}'},
+    ).json()
+    assert all(k['last_used_at'] is None for k in listing)
+    assert api_key_usage.pending() == 2
+
+    mock_settings.return_value = Settings(api_key_usage_flush_seconds=0)
+    test_client.get(
+        '/v1/users/me/api-keys', headers={'Authorization': f'Bearer {first}'}
+    )
+    assert api_key_usage.pending() == 0
+    listing = test_client.get(
+        '/v1/users/me/api-keys',
+        headers={'Authorization': f'Bearer {test_client.first_user.token}'},
+    ).json()
+    assert all(k['last_used_at'] is not None for k in listing)
+
+
 def test_bogus_api_key_rejected(test_client: TestClient):
     '''
     Unknown keys get a 401.
@@ -77,6 +128,23 @@ def test_revoked_key_stops_working(test_client: TestClient):
     assert response.status_code == 401
 
 
+def test_key_revoked_elsewhere_stops_working_while_cached(test_client: TestClient):
+    '''
+    A revocation on another instance (no local invalidation) still kills the
+    cached principal.
+    '''
+    created = _create_key(test_client, test_client.first_user.token).json()
+    headers = {'Authorization': f"Bearer {created['key']}"}
+    assert test_client.get('/v1/users/me/api-keys', headers=headers).status_code == 200
+    test_client.test_db_session.execute(
+        delete(DbApiKey).where(DbApiKey.id == created['id'])
+    )
+    test_client.test_db_session.commit()
+
+    response = test_client.get('/v1/users/me/api-keys', headers=headers)
+    assert response.status_code == 401
+
+
 def test_cannot_revoke_another_users_key(test_client: TestClient):
     '''
     Users can't see or revoke each other's keys.
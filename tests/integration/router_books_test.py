@@ -81,7 +81,7 @@ def test_search_books_requires_auth(test_client: TestClient):
     assert response.status_code == 401
 
 
-@patch('app.services.book_search.requests.get')
+@patch('app.services.book_search.provider_http.get')
 def test_search_books_returns_results(mock_get, test_client: TestClient):
     mock_response = MagicMock()
     mock_response.raise_for_status.return_value = None
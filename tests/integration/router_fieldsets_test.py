@@ -0,0 +1,106 @@
+# pylint: disable=missing-module-docstring, missing-function-docstring
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+
+def _auth(token: str) -> dict:
+    return {'Authorization': f'Bearer {token}'}
+
+
+def _track_movies(test_client: TestClient, count: int) -> None:
+    for i in range(count):
+        movie_id = test_client.post(
+            '/v1/movies',
+            headers=_auth(test_client.admin_user.token),
+            json={'title': f'M{i}', 'imdb': f'tt70{i}', 'plot': 'A long plot.'},
+        ).json()['id']
+        test_client.post(
+            f'/v1/users/me/movies/{movie_id}',
+            headers=_auth(test_client.first_user.token),
+            json={'on_rankings': True},
+        )
+        test_client.put(
+            f'/v1/users/me/movies/{movie_id}/rank',
+            headers=_auth(test_client.first_user.token),
+            json={'position': 1},
+        )
+
+
+def test_fields_trim_the_tracker_list_and_its_query(
+    test_client: TestClient, test_db_engine
+):
+    _track_movies(test_client, 2)
+    statements = []
+
+    def count(_conn, _cursor, statement, *_args):
+        statements.append(statement)
+
+    event.listen(test_db_engine, 'before_cursor_execute', count)
+    try:
+        resp = test_client.get(
+            '/v1/users/me/movies?fields=id,rank,movie.title',
+            headers=_auth(test_client.first_user.token),
+        )
+    finally:
+        event.remove(test_db_engine, 'before_cursor_execute', count)
+
+    assert resp.status_code == 200
+    assert 'ETag' in resp.headers
+    rows = resp.json()
+    assert [set(row) for row in rows] == [{'id', 'rank', 'movie'}] * 2
+    assert sorted(row['movie']['title'] for row in rows) == ['M0', 'M1']
+    assert sorted(row['rank'] for row in rows) == [1, 2]
+    listing = next(s for s in statements if 'FROM user_movies' in s)
+    assert 'plot' not in listing
+    assert 'notes' not in listing
+
+
+def test_fields_keep_the_cursor_header(test_client: TestClient):
+    _track_movies(test_client, 3)
+    resp = test_client.get(
+        '/v1/users/me/movies?limit=2&fields=id',
+        headers=_auth(test_client.first_user.token),
+    )
+    assert len(resp.json()) == 2
+    assert 'Next-Cursor' in resp.headers
+
+
+def test_unknown_fields_are_rejected(test_client: TestClient):
+    token = test_client.first_user.token
+    for fields in ('nope', 'movie.nope', 'notes.title', ''):
+        resp = test_client.get(
+            f'/v1/users/me/movies?fields={fields}', headers=_auth(token)
+        )
+        assert resp.status_code == 422, fields
+
+
+def test_tv_list_serves_status_fields_on_their_own(test_client: TestClient):
+    token = test_client.first_user.token
+    show_id = test_client.post(
+        '/v1/tv-shows',
+        headers=_auth(test_client.admin_user.token),
+        json={'title': 'Show', 'status': 'Ended'},
+    ).json()['id']
+    test_client.post(
+        f'/v1/users/me/tv-shows/{show_id}',
+        headers=_auth(token),
+        json={'on_watchlist': True},
+    )
+
+    full = test_client.get('/v1/users/me/tv-shows', headers=_auth(token)).json()
+    sparse = test_client.get(
+        '/v1/users/me/tv-shows?fields=watch_status,aired_count,tv_show.title',
+        headers=_auth(token),
+    ).json()
+
+    assert full[0]['watch_status'] == 'not_started'
+    assert full[0]['tv_show']['status'] == 'Ended'
+    assert sparse == [
+        {'watch_status': 'not_started', 'aired_count': 0, 'tv_show': {'title': 'Show'}}
+    ]
+
+
+def test_catalog_lists_take_fields(test_client: TestClient):
+    _track_movies(test_client, 1)
+    rows = test_client.get('/v1/movies?fields=title,year').json()
+    assert rows == [{'title': 'M0', 'year': None}]
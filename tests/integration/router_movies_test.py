@@ -268,7 +268,7 @@ def test_search_movies_not_configured(mock_settings, test_client: TestClient):
 
 
 @patch('app.services.movie_search.get_settings')
-@patch('app.services.movie_search.requests.get')
+@patch('app.services.movie_search.provider_http.get')
 def test_search_movies_returns_results(
     mock_get, mock_settings, test_client: TestClient
 ):
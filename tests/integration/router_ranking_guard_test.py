@@ -0,0 +1,147 @@
+# pylint: disable=missing-module-docstring, missing-function-docstring
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.services import ranking_guard
+
+
+def _auth(test_client: TestClient, **headers) -> dict:
+    return {'Authorization': f'Bearer {test_client.first_user.token}', **headers}
+
+
+def _tracked_movie(test_client: TestClient, title='Heat', imdb='tt0113277') -> str:
+    admin = {'Authorization': f'Bearer {test_client.admin_user.token}'}
+    movie_id = test_client.post(
+        '/v1/movies', headers=admin, json={'title': title, 'imdb': imdb}
+    ).json()['id']
+    test_client.post(
+        f'/v1/users/me/movies/{movie_id}',
+        headers=_auth(test_client),
+        json={'on_rankings': True},
+    )
+    return movie_id
+
+
+def _etag(test_client: TestClient) -> str:
+    return test_client.get('/v1/users/me/movies', headers=_auth(test_client)).headers[
+        'ETag'
+    ]
+
+
+def test_writes_bump_the_ranking_etag(test_client: TestClient):
+    assert _etag(test_client) == '"0"'
+    movie_id = _tracked_movie(test_client)
+    assert _etag(test_client) == '"1"'
+
+    resp = test_client.put(
+        f'/v1/users/me/movies/{movie_id}/rank',
+        headers=_auth(test_client, **{'If-Match': '"1"'}),
+        json={'position': 1},
+    )
+    assert resp.status_code == 200
+    assert resp.headers['ETag'] == '"2"'
+    assert resp.json()['rank'] == 1
+
+
+def test_stale_if_match_fails_fast_without_writing(test_client: TestClient):
+    heat = _tracked_movie(test_client)
+    ronin = _tracked_movie(test_client, title='Ronin', imdb='tt0122690')
+    stale = _etag(test_client)
+    # Another tab ranks Heat first...
+    test_client.put(
+        f'/v1/users/me/movies/{heat}/rank',
+        headers=_auth(test_client),
+        json={'position': 1},
+    )
+    # ...so this tab's save, based on the older view, is refused.
+    resp = test_client.put(
+        '/v1/users/me/movies/rankings/order',
+        headers=_auth(test_client, **{'If-Match': stale}),
+        json={'movie_ids': [ronin, heat]},
+    )
+    assert resp.status_code == 412
+    assert resp.headers['ETag'] == _etag(test_client)
+
+    listing = test_client.get('/v1/users/me/movies', headers=_auth(test_client))
+    ranks = {t['movie']['id']: t['rank'] for t in listing.json()}
+    assert ranks == {heat: 1, ronin: None}
+
+
+def test_idempotency_key_replays_the_first_response(test_client: TestClient):
+    heat = _tracked_movie(test_client)
+    ronin = _tracked_movie(test_client, title='Ronin', imdb='tt0122690')
+    headers = _auth(test_client, **{'Idempotency-Key': 'save-1'})
+    body = {'movie_ids': [ronin, heat]}
+
+    first = test_client.put(
+        '/v1/users/me/movies/rankings/order', headers=headers, json=body
+    )
+    version = _etag(test_client)
+    retry = test_client.put(
+        '/v1/users/me/movies/rankings/order', headers=headers, json=body
+    )
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.json() == first.json()
+    assert retry.headers['ETag'] == first.headers['ETag'] == version
+    # The retry wrote nothing.
+    assert _etag(test_client) == version
+
+    reused = test_client.put(
+        '/v1/users/me/movies/rankings/order',
+        headers=headers,
+        json={'movie_ids': [heat, ronin]},
+    )
+    assert reused.status_code == 422
+
+
+def test_failed_write_releases_its_idempotency_key(test_client: TestClient):
+    headers = _auth(test_client, **{'Idempotency-Key': 'unmark-1'})
+    heat = _tracked_movie(test_client)
+    test_client.delete(f'/v1/users/me/movies/{heat}', headers=_auth(test_client))
+
+    missing = test_client.delete(f'/v1/users/me/movies/{heat}', headers=headers)
+    assert missing.status_code == 404
+
+    test_client.post(
+        f'/v1/users/me/movies/{heat}',
+        headers=_auth(test_client),
+        json={'on_watchlist': True},
+    )
+    retried = test_client.delete(f'/v1/users/me/movies/{heat}', headers=headers)
+    assert retried.status_code == 204
+    assert 'Idempotent-Replayed' not in retried.headers
+
+
+def test_losing_a_first_write_race_is_a_412_that_releases_the_key(
+    test_client: TestClient,
+):
+    movie_id = _tracked_movie(test_client)
+    real = ranking_guard.current_version
+    reads = []
+
+    def stale_first_read(db, user_pk):
+        # The first read misses the version row a concurrent first write
+        # has just committed.
+        reads.append(user_pk)
+        return 0 if len(reads) == 1 else real(db, user_pk)
+
+    headers = _auth(test_client, **{'If-Match': '"0"', 'Idempotency-Key': 'race'})
+    with patch('app.services.ranking_guard.current_version', stale_first_read):
+        resp = test_client.put(
+            f'/v1/users/me/movies/{movie_id}/rank',
+            headers=headers,
+            json={'position': 1},
+        )
+    assert resp.status_code == 412
+    assert resp.headers['ETag'] == '"1"'
+
+    # The transaction survived the lost insert, so the key was released.
+    headers['If-Match'] = resp.headers['ETag']
+    retry = test_client.put(
+        f'/v1/users/me/movies/{movie_id}/rank', headers=headers, json={'position': 1}
+    )
+    assert retry.status_code == 200
+    assert retry.headers['ETag'] == '"2"'
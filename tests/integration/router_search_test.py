@@ -1,9 +1,19 @@
 # pylint: disable=missing-module-docstring, missing-function-docstring
+# pylint: disable=protected-access
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch
 
 from fastapi import HTTPException
 from fastapi.testclient import TestClient
 
+from app.config import Settings
+from app.router.v1 import router_search
+from app.services import local_search
+
 MOVIE_HIT = [{'imdb': 'tt0107290', 'title': 'Jurassic Park', 'year': '1993'}]
 SHOW_HIT = [{'tvmaze': 22, 'title': 'Jurassic Show', 'year': '2021'}]
 
@@ -62,6 +72,87 @@ def test_failing_provider_does_not_break_search(
     assert resp.json()['books'] == []
 
 
+@patch('app.router.v1.router_search.get_settings')
+@patch('app.router.v1.router_search.search_games', return_value=[])
+@patch('app.router.v1.router_search.search_tv_shows', return_value=[])
+@patch('app.router.v1.router_search.search_movies', return_value=MOVIE_HIT)
+def test_slow_provider_is_cut_off_at_the_deadline(
+    _movies, _tv, _games, mock_settings, test_client: TestClient
+):
+    mock_settings.return_value = Settings(search_provider_deadline_seconds=0.05)
+    release = threading.Event()
+
+    def slow_books(_q):
+        release.wait(5)
+        return [{'title': 'Too late'}]
+
+    headers = {'Authorization': f"Bearer {test_client.first_user.token}"}
+    with patch('app.router.v1.router_search.search_books', side_effect=slow_books):
+        with patch('app.router.v1.router_search.correct_query', return_value=None):
+            resp = test_client.get('/v1/search?q=jurassic', headers=headers)
+    release.set()
+    assert resp.status_code == 200
+    assert resp.json()['movies'][0]['title'] == 'Jurassic Park'
+    assert resp.json()['books'] == []
+
+
+def test_queue_wait_and_call_share_one_deadline():
+    release = threading.Event()
+
+    def hung(_q):
+        release.wait(5)
+        return []
+
+    def quick(q):
+        time.sleep(0.2)
+        return [{'title': q}]
+
+    async def searches():
+        deadline = asyncio.get_running_loop().time() + 0.3
+        return await asyncio.gather(
+            router_search._search_domain('books', hung, 'a', deadline),
+            router_search._search_domain('movies', quick, 'b', deadline),
+            router_search._search_domain('movies', quick, 'c', deadline),
+        )
+
+    pools = {
+        'books': ThreadPoolExecutor(max_workers=1),
+        'movies': ThreadPoolExecutor(max_workers=1),
+    }
+    with patch.dict(router_search._executors, pools):
+        try:
+            books, first, second = asyncio.run(searches())
+        finally:
+            release.set()
+    # The hung books call held only its own pool; the second movie search
+    # queued 0.2s behind the first and would have finished past the shared
+    # deadline, so it was cut off rather than given a fresh budget.
+    assert books == []
+    assert (first, second) == ([{'title': 'b'}], [])
+
+
+@patch('app.router.v1.router_search.get_settings')
+@patch('app.router.v1.router_search.search_games', return_value=[])
+@patch('app.router.v1.router_search.search_tv_shows', return_value=[])
+@patch('app.router.v1.router_search.search_books', return_value=[])
+def test_spelling_retry_spends_what_is_left_of_the_deadline(
+    _books, _tv, _games, mock_settings, test_client: TestClient
+):
+    mock_settings.return_value = Settings(search_provider_deadline_seconds=0.3)
+
+    def slow_movies(q):
+        # Each round alone fits a 0.3s budget; both together don't.
+        time.sleep(0.2)
+        return [] if q == 'jurrasic' else MOVIE_HIT
+
+    headers = {'Authorization': f"Bearer {test_client.first_user.token}"}
+    with patch('app.router.v1.router_search.search_movies', side_effect=slow_movies):
+        resp = test_client.get('/v1/search?q=jurrasic', headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()['corrected'] is None
+    assert resp.json()['movies'] == []
+
+
 TITANIC_HITS = [
     {'imdb': 'tt0000001', 'title': 'Raise the Titanic', 'year': '1980'},
     {'imdb': 'tt0000002', 'title': 'Titanic II', 'year': '2010'},
@@ -87,3 +178,77 @@ def test_global_search_ranks_best_match_first_and_caps_to_five(
     assert len(movies) == 5
     # The exact title match ("Titanic") outranks every partial match.
     assert movies[0]['title'] == 'Titanic'
+
+
+def _events(body: str) -> list:
+    events = []
+    for block in body.strip().split('\n\n'):
+        name, data = block.split('\n')
+        events.append((name.removeprefix('event: '), json.loads(data[6:])))
+    return events
+
+
+@patch('app.router.v1.router_search.search_books', return_value=[])
+@patch('app.router.v1.router_search.search_games', return_value=[])
+@patch('app.router.v1.router_search.search_tv_shows', return_value=SHOW_HIT)
+@patch('app.router.v1.router_search.search_movies')
+def test_stream_search_emits_each_domain_then_done(
+    mock_movies, _tv, _games, _books, test_client: TestClient
+):
+    mock_movies.side_effect = [[], MOVIE_HIT]
+    headers = {'Authorization': f"Bearer {test_client.first_user.token}"}
+    with patch('app.router.v1.router_search.correct_query', return_value='jurassic'):
+        resp = test_client.get('/v1/search/stream?q=jurrasic', headers=headers)
+    assert resp.status_code == 200
+    assert resp.headers['content-type'].startswith('text/event-stream')
+    events = _events(resp.text)
+    # The domain with hits goes first; retried domains follow; done is last.
+    assert events[0][0] == 'domain'
+    assert events[0][1]['domain'] == 'tv_shows'
+    assert events[0][1]['query'] == 'jurrasic'
+    assert events[0][1]['hits'][0]['title'] == 'Jurassic Show'
+    domains = {data['domain']: data for name, data in events if name == 'domain'}
+    assert set(domains) == {'movies', 'tv_shows', 'games', 'books'}
+    assert domains['movies']['query'] == 'jurassic'
+    assert domains['movies']['hits'][0]['title'] == 'Jurassic Park'
+    assert domains['books']['hits'] == []
+    assert events[-1] == ('done', {'query': 'jurrasic', 'corrected': 'jurassic'})
+
+
+def test_stream_search_requires_auth(test_client: TestClient):
+    assert test_client.get('/v1/search/stream?q=matrix').status_code == 401
+
+
+def test_local_typeahead_tracks_catalog_writes(test_client: TestClient):
+    local_search.reset()
+    admin = {'Authorization': f"Bearer {test_client.admin_user.token}"}
+    headers = {'Authorization': f"Bearer {test_client.first_user.token}"}
+    assert test_client.get('/v1/search/local?q=incep', headers=headers).json() == {
+        'query': 'incep',
+        'hits': [],
+    }
+
+    movie_id = test_client.post(
+        '/v1/movies', headers=admin, json={'title': 'Inception', 'imdb': 'tt1375666'}
+    ).json()['id']
+    hits = test_client.get('/v1/search/local?q=incep', headers=headers).json()['hits']
+    assert [(hit['domain'], hit['id']) for hit in hits] == [('movies', movie_id)]
+
+    test_client.put(f'/v1/movies/{movie_id}', headers=admin, json={'title': 'Tenet'})
+    assert (
+        test_client.get('/v1/search/local?q=incep', headers=headers).json()['hits']
+        == []
+    )
+
+    test_client.delete(f'/v1/movies/{movie_id}', headers=admin)
+    assert (
+        test_client.get('/v1/search/local?q=tenet', headers=headers).json()['hits']
+        == []
+    )
+    local_search.reset()
+
+
+def test_local_typeahead_rejects_unknown_domains(test_client: TestClient):
+    headers = {'Authorization': f"Bearer {test_client.first_user.token}"}
+    resp = test_client.get('/v1/search/local?q=x&domain=podcasts', headers=headers)
+    assert resp.status_code == 422
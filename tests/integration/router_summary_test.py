@@ -136,3 +136,19 @@ def test_profile_public_tracks_handle_and_flags(test_client: TestClient):
     assert _shelf(body, 'tv')['public'] is False
     # profile_public is the same rule the public endpoint enforces.
     assert test_client.get('/v1/public/avery').status_code == 200
+
+
+def test_tracker_writes_refresh_the_cached_summary(test_client: TestClient):
+    token = test_client.first_user.token
+    heat = _add_movie(test_client, 'Heat', 'tt0113277')
+    _rank(test_client, token, heat, 1)
+    body = test_client.get('/v1/users/me/summary', headers=_auth(token)).json()
+    assert [e['title'] for e in _shelf(body, 'movies')['top']] == ['Heat']
+
+    _rank(test_client, token, _add_movie(test_client, 'Ronin', 'tt0122690'), 1)
+    body = test_client.get('/v1/users/me/summary', headers=_auth(token)).json()
+    assert [e['title'] for e in _shelf(body, 'movies')['top']] == ['Ronin', 'Heat']
+
+    test_client.delete(f'/v1/users/me/movies/{heat}', headers=_auth(token))
+    body = test_client.get('/v1/users/me/summary', headers=_auth(token)).json()
+    assert _shelf(body, 'movies')['ranked_count'] == 1
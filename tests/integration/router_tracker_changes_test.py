@@ -0,0 +1,153 @@
+# pylint: disable=missing-module-docstring, missing-function-docstring
+from fastapi.testclient import TestClient
+
+from app.db.models import DbRankingVersion
+
+
+def _auth(token: str) -> dict:
+    return {'Authorization': f'Bearer {token}'}
+
+
+def _movie(test_client: TestClient, title: str, imdb: str) -> str:
+    return test_client.post(
+        '/v1/movies',
+        headers=_auth(test_client.admin_user.token),
+        json={'title': title, 'imdb': imdb},
+    ).json()['id']
+
+
+def _changes(test_client: TestClient, since: int, path='movies') -> dict:
+    resp = test_client.get(
+        f'/v1/users/me/{path}/changes?since={since}',
+        headers=_auth(test_client.first_user.token),
+    )
+    assert resp.status_code == 200
+    return resp.json()
+
+
+def test_full_sync_then_nothing_new(test_client: TestClient):
+    token = test_client.first_user.token
+    heat = _movie(test_client, 'Heat', 'tt0113277')
+    test_client.post(
+        f'/v1/users/me/movies/{heat}', headers=_auth(token), json={'on_watchlist': True}
+    )
+
+    full = _changes(test_client, 0)
+    assert [t['movie']['id'] for t in full['upserted']] == [heat]
+    assert full['token'] > 0
+
+    again = _changes(test_client, full['token'])
+    assert again == {
+        'token': full['token'],
+        'upserted': [],
+        'deleted': [],
+        'ranking': None,
+    }
+
+
+def test_delta_carries_writes_and_tombstones(test_client: TestClient):
+    token = test_client.first_user.token
+    heat = _movie(test_client, 'Heat', 'tt0113277')
+    ronin = _movie(test_client, 'Ronin', 'tt0122690')
+    for movie_id in (heat, ronin):
+        test_client.post(
+            f'/v1/users/me/movies/{movie_id}',
+            headers=_auth(token),
+            json={'on_watchlist': True},
+        )
+    start = _changes(test_client, 0)
+    heat_tracker = next(t['id'] for t in start['upserted'] if t['movie']['id'] == heat)
+
+    test_client.put(
+        f'/v1/users/me/movies/{ronin}', headers=_auth(token), json={'notes': 'again'}
+    )
+    test_client.delete(f'/v1/users/me/movies/{heat}', headers=_auth(token))
+
+    delta = _changes(test_client, start['token'])
+    assert [(t['movie']['id'], t['notes']) for t in delta['upserted']] == [
+        (ronin, 'again')
+    ]
+    assert delta['deleted'] == [heat_tracker]
+    assert delta['token'] > start['token']
+    assert _changes(test_client, delta['token'])['upserted'] == []
+
+
+def test_reorder_reports_moved_rows_and_the_ranked_order(test_client: TestClient):
+    token = test_client.first_user.token
+    ids = [_movie(test_client, f'M{i}', f'tt900{i}') for i in range(3)]
+    for movie_id in ids:
+        test_client.post(
+            f'/v1/users/me/movies/{movie_id}',
+            headers=_auth(token),
+            json={'on_rankings': True},
+        )
+    test_client.put(
+        '/v1/users/me/movies/rankings/order',
+        headers=_auth(token),
+        json={'movie_ids': ids},
+    )
+    start = _changes(test_client, 0)
+    tracker_of = {t['movie']['id']: t['id'] for t in start['upserted']}
+
+    # Move the last entry to the top: only it is rewritten...
+    test_client.put(
+        '/v1/users/me/movies/rankings/order',
+        headers=_auth(token),
+        json={'movie_ids': [ids[2], ids[0], ids[1]]},
+    )
+    delta = _changes(test_client, start['token'])
+    assert [t['movie']['id'] for t in delta['upserted']] == [ids[2]]
+    assert delta['upserted'][0]['rank'] == 1
+    # ...and the ranked order says where everything else landed.
+    assert delta['ranking'] == [tracker_of[i] for i in (ids[2], ids[0], ids[1])]
+
+
+def test_watching_an_episode_resyncs_the_show(test_client: TestClient):
+    token = test_client.first_user.token
+    admin = _auth(test_client.admin_user.token)
+    show = test_client.post(
+        '/v1/tv-shows', headers=admin, json={'title': 'Show'}
+    ).json()['id']
+    episode = test_client.post(
+        f'/v1/tv-shows/{show}/episodes',
+        headers=admin,
+        json={'title': 'Pilot', 'season': 1, 'airdate': '2020-01-01T00:00:00'},
+    ).json()['id']
+    test_client.post(
+        f'/v1/users/me/tv-shows/{show}',
+        headers=_auth(token),
+        json={'on_watchlist': True},
+    )
+    start = _changes(test_client, 0, 'tv-shows')
+
+    test_client.post(f'/v1/users/me/episodes/{episode}', headers=_auth(token))
+    delta = _changes(test_client, start['token'], 'tv-shows')
+    assert [t['watched_count'] for t in delta['upserted']] == [1]
+
+
+def test_episode_marks_take_the_version_lock_without_bumping_it(
+    test_client: TestClient,
+):
+    token = test_client.first_user.token
+    admin = _auth(test_client.admin_user.token)
+    show = test_client.post(
+        '/v1/tv-shows', headers=admin, json={'title': 'Show'}
+    ).json()['id']
+    episode = test_client.post(
+        f'/v1/tv-shows/{show}/episodes', headers=admin, json={'title': 'Pilot'}
+    ).json()['id']
+    test_client.post(
+        f'/v1/users/me/tv-shows/{show}',
+        headers=_auth(token),
+        json={'on_watchlist': True},
+    )
+    table = DbRankingVersion.__table__
+    mine = table.select().where(table.c.user_id == test_client.first_user.pk)
+    before = test_client.test_db_session.execute(mine).one().version
+
+    test_client.post(f'/v1/users/me/episodes/{episode}', headers=_auth(token))
+
+    # The mark was logged under the user's version row, which didn't move.
+    assert test_client.test_db_session.execute(mine).one().version == before
+    tv_list = test_client.get('/v1/users/me/tv-shows', headers=_auth(token))
+    assert tv_list.headers['ETag'] == f'"{before}"'
@@ -1,4 +1,6 @@
 # pylint: disable=missing-module-docstring, missing-function-docstring
+from unittest.mock import patch
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -10,6 +12,8 @@ DOMAINS = (
     ('books', '/v1/books', lambda i: {'title': f'B{i}', 'googleid': f'gid50{i}'}),
     ('games', '/v1/games', lambda i: {'title': f'G{i}', 'igdb': 5000 + i}),
 )
+# Tracker field holding the catalog item, per list path.
+DOMAIN_KEYS = {'movies': 'movie', 'books': 'book', 'games': 'game'}
 
 
 def _auth(token: str) -> dict:
@@ -95,3 +99,84 @@ def test_tv_list_takes_the_same_params(test_client: TestClient):
         ).json()
         == []
     )
+
+
+def _walk(test_client: TestClient, token: str, path: str, limit: int) -> list:
+    """Every page of ``path``, following Next-Cursor."""
+    pages, url = [], f'{path}?limit={limit}'
+    while url:
+        resp = test_client.get(url, headers=_auth(token))
+        pages.append(resp.json())
+        cursor = resp.headers.get('Next-Cursor')
+        url = f'{path}?limit={limit}&cursor={cursor}' if cursor else None
+    return pages
+
+
+@pytest.mark.parametrize('domain,catalog_path,payload', DOMAINS)
+def test_cursor_walks_the_list_in_rank_order(
+    test_client: TestClient, domain, catalog_path, payload
+):
+    token = test_client.first_user.token
+    _seed(test_client, domain, catalog_path, payload, 7)
+    path = f'/v1/users/me/{domain}'
+    key = DOMAIN_KEYS[domain]
+    ranked = test_client.get(f'{path}?on_rankings=true', headers=_auth(token)).json()
+    for row in ranked:
+        test_client.put(
+            f'{path}/{row[key]["id"]}/rank', headers=_auth(token), json={'position': 1}
+        )
+    everything = test_client.get(path, headers=_auth(token))
+    assert 'Next-Cursor' not in everything.headers
+
+    pages = _walk(test_client, token, path, 2)
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+    walked = [row['id'] for page in pages for row in page]
+    assert walked == [row['id'] for row in everything.json()]
+    # Ranked entries first, best first; the unranked tail after them.
+    ranks = [row['rank'] for page in pages for row in page]
+    assert ranks == [1, 2, 3, None, None, None, None]
+
+
+def test_countries_list_takes_the_same_params(test_client: TestClient):
+    token = test_client.first_user.token
+    for title, code in (('Japan', 'jp'), ('Peru', 'pe'), ('Chile', 'cl')):
+        with patch(
+            'app.router.v1.router_countries.get_country_detail', return_value=None
+        ):
+            country_id = test_client.post(
+                '/v1/countries',
+                headers=_auth(test_client.admin_user.token),
+                json={'title': title, 'country_code': code},
+            ).json()['id']
+        test_client.post(
+            f'/v1/users/me/countries/{country_id}',
+            headers=_auth(token),
+            json={'on_rankings': True},
+        )
+        test_client.put(
+            f'/v1/users/me/countries/{country_id}/rank',
+            headers=_auth(token),
+            json={'position': 1},
+        )
+
+    first = test_client.get('/v1/users/me/countries?limit=2', headers=_auth(token))
+    rest = test_client.get(
+        f'/v1/users/me/countries?cursor={first.headers["Next-Cursor"]}',
+        headers=_auth(token),
+    )
+    assert [c['rank'] for c in first.json() + rest.json()] == [1, 2, 3]
+    assert 'Next-Cursor' not in rest.headers
+
+
+def test_bad_cursors_are_rejected(test_client: TestClient):
+    headers = _auth(test_client.first_user.token)
+    assert (
+        test_client.get('/v1/users/me/movies?cursor=nope', headers=headers).status_code
+        == 422
+    )
+    assert (
+        test_client.get(
+            '/v1/users/me/movies?cursor=MTox&offset=2', headers=headers
+        ).status_code
+        == 422
+    )
@@ -123,7 +123,7 @@ def test_search_tv_shows_requires_auth(test_client: TestClient):
     assert response.status_code == 401
 
 
-@patch('app.services.tv_search.requests.get')
+@patch('app.services.tv_search.provider_http.get')
 def test_search_tv_shows_returns_results(mock_get, test_client: TestClient):
     mock_response = MagicMock()
     mock_response.raise_for_status.return_value = None
@@ -526,6 +526,71 @@ def test_schedule_ignores_untracked_shows(test_client: TestClient):
     assert body['frozen_shows'] == []
 
 
+def test_schedule_pages_with_cursors(test_client: TestClient):
+    show_id = _make_show(test_client, title='Long Runner')
+    headers = {'Authorization': f"Bearer {test_client.first_user.token}"}
+    test_client.post(
+        f"/v1/users/me/tv-shows/{show_id}", headers=headers, json={'on_watchlist': True}
+    )
+    episodes = [
+        _make_episode(
+            test_client, show_id, title=f'E{n}', number=n, airdate=_iso(-3 * n)
+        )
+        for n in range(1, 6)
+    ]
+
+    def walk(name):
+        seen, params = [], {'limit': 2}
+        while True:
+            body = test_client.get(
+                '/v1/users/me/schedule', headers=headers, params=params
+            ).json()
+            assert len(body[name]) <= 2
+            seen += [e['episode_id'] for e in body[name]]
+            if body[f'next_{name}_cursor'] is None:
+                return seen
+            params[f'{name}_cursor'] = body[f'next_{name}_cursor']
+
+    # All aired, so all catch-up; only E1 (3 days ago) is inside the window.
+    assert walk('catch_up') == episodes
+    assert walk('upcoming') == episodes[:1]
+
+
+def test_schedule_follows_marks_and_renames(test_client: TestClient):
+    show_id = _make_show(test_client, title='Old Title')
+    headers = {'Authorization': f"Bearer {test_client.first_user.token}"}
+    admin = {'Authorization': f"Bearer {test_client.admin_user.token}"}
+    test_client.post(
+        f"/v1/users/me/tv-shows/{show_id}", headers=headers, json={'on_watchlist': True}
+    )
+    episode_id = _make_episode(test_client, show_id, airdate=_iso(-3))
+
+    def catch_up():
+        body = test_client.get('/v1/users/me/schedule', headers=headers).json()
+        return [(e['episode_id'], e['show_title']) for e in body['catch_up']]
+
+    test_client.post(f"/v1/users/me/episodes/{episode_id}", headers=headers)
+    assert catch_up() == []
+    test_client.delete(f"/v1/users/me/episodes/{episode_id}", headers=headers)
+    assert catch_up() == [(episode_id, 'Old Title')]
+
+    test_client.put(
+        f"/v1/tv-shows/{show_id}", headers=admin, json={'title': 'New Title'}
+    )
+    assert catch_up() == [(episode_id, 'New Title')]
+
+
+def test_schedule_rejects_a_bad_cursor(test_client: TestClient):
+    headers = {'Authorization': f"Bearer {test_client.first_user.token}"}
+    resp = test_client.get(
+        '/v1/users/me/schedule',
+        headers=headers,
+        params={'upcoming_cursor': 'not-a-cursor'},
+    )
+    assert resp.status_code == 422
+    assert resp.json()['message'] == 'Invalid upcoming_cursor'
+
+
 def test_user_episode_marks_are_per_user(test_client: TestClient):
     show_id = _make_show(test_client)
     episode_id = _make_episode(test_client, show_id)
@@ -1,5 +1,6 @@
 # pylint: disable=missing-module-docstring, missing-function-docstring
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 
 
 def _auth(token: str) -> dict:
@@ -126,3 +127,69 @@ def test_toggling_a_category_off_removes_it(test_client: TestClient):
         '/v1/users/me/visibility', headers=_auth(token), json={'public_movies': False}
     )
     assert test_client.get('/v1/public/avery').status_code == 404
+
+
+def _publish(test_client: TestClient, token: str):
+    _rank_a_movie(test_client, token)
+    test_client.put(
+        '/v1/users/me/visibility',
+        headers=_auth(token),
+        json={'handle': 'avery', 'public_movies': True},
+    )
+
+
+def test_public_profile_carries_cache_validators(test_client: TestClient):
+    _publish(test_client, test_client.first_user.token)
+
+    resp = test_client.get('/v1/public/avery')
+    assert resp.status_code == 200
+    assert resp.headers['ETag'].startswith('"')
+    assert 'Last-Modified' in resp.headers
+    assert 'stale-while-revalidate=' in resp.headers['Cache-Control']
+    assert resp.headers['Cache-Control'].startswith('public, max-age=')
+
+
+def test_matching_if_none_match_is_304_without_a_query(
+    test_client: TestClient, test_db_engine
+):
+    _publish(test_client, test_client.first_user.token)
+    first = test_client.get('/v1/public/avery')
+    statements = []
+
+    def count(_conn, _cursor, statement, *_args):
+        statements.append(statement)
+
+    event.listen(test_db_engine, 'before_cursor_execute', count)
+    try:
+        revalidated = test_client.get(
+            '/v1/public/avery', headers={'If-None-Match': first.headers['ETag']}
+        )
+        by_date = test_client.get(
+            '/v1/public/avery',
+            headers={'If-Modified-Since': first.headers['Last-Modified']},
+        )
+    finally:
+        event.remove(test_db_engine, 'before_cursor_execute', count)
+
+    assert revalidated.status_code == by_date.status_code == 304
+    assert revalidated.content == b''
+    assert revalidated.headers['ETag'] == first.headers['ETag']
+    assert not statements
+
+
+def test_ranking_writes_invalidate_the_cached_profile(test_client: TestClient):
+    token = test_client.first_user.token
+    _publish(test_client, token)
+    first = test_client.get('/v1/public/avery')
+
+    _rank_a_movie(test_client, token, title='Ronin', imdb='tt0122690')
+    second = test_client.get(
+        '/v1/public/avery', headers={'If-None-Match': first.headers['ETag']}
+    )
+
+    assert second.status_code == 200
+    assert second.headers['ETag'] != first.headers['ETag']
+    assert [i['title'] for i in second.json()['shelves'][0]['items']] == [
+        'Ronin',
+        'Heat',
+    ]
@@ -14,7 +14,7 @@ def _rank_movies(session, user_pk, ranks):
             DbUserMovie(
                 user_id=user_pk,
                 movie_id=movie.pk,
-                rank=rank,
+                rank_key=rank,
                 on_rankings=True,
                 on_watchlist=False,
             )
@@ -24,7 +24,7 @@ def _rank_movies(session, user_pk, ranks):
 
 def _ranks(session, user_pk):
     return sorted(
-        r.rank
+        r.rank_key
         for r in session.query(DbUserMovie).filter(DbUserMovie.user_id == user_pk).all()
     )
 
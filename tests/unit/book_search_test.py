@@ -40,7 +40,7 @@ def test_apply_detail_truncates_and_skips_none():
 
 
 @patch('app.services.book_search._work_description', return_value='A desert planet.')
-@patch('app.services.book_search.requests.get')
+@patch('app.services.book_search.provider_http.get')
 def test_get_book_detail_maps_fields(mock_get, mock_desc):
     resp = MagicMock()
     resp.raise_for_status.return_value = None
@@ -81,7 +81,7 @@ def test_get_book_detail_without_isbn_returns_none():
 
 
 def test_work_description_unwraps_dict():
-    with patch('app.services.book_search.requests.get') as mock_get:
+    with patch('app.services.book_search.provider_http.get') as mock_get:
         resp = MagicMock()
         resp.raise_for_status.return_value = None
         resp.json.return_value = {'description': {'value': 'Nested text.'}}
@@ -108,7 +108,7 @@ _BIBKEYS_PAYLOAD = {
 }
 
 
-@patch('app.services.book_search.requests.get')
+@patch('app.services.book_search.provider_http.get')
 def test_search_books_hyphenated_isbn_resolves_via_bibkeys(mock_get):
     resp = MagicMock()
     resp.raise_for_status.return_value = None
@@ -131,7 +131,7 @@ def test_search_books_hyphenated_isbn_resolves_via_bibkeys(mock_get):
     assert kwargs['params']['bibkeys'] == 'ISBN:9780441172719'
 
 
-@patch('app.services.book_search.requests.get')
+@patch('app.services.book_search.provider_http.get')
 def test_search_books_bare_isbn_resolves_via_bibkeys(mock_get):
     resp = MagicMock()
     resp.raise_for_status.return_value = None
@@ -145,7 +145,7 @@ def test_search_books_bare_isbn_resolves_via_bibkeys(mock_get):
     assert results[0]['title'] == 'Dune'
 
 
-@patch('app.services.book_search.requests.get')
+@patch('app.services.book_search.provider_http.get')
 def test_search_books_unknown_isbn_returns_empty_list(mock_get):
     resp = MagicMock()
     resp.raise_for_status.return_value = None
@@ -155,7 +155,7 @@ def test_search_books_unknown_isbn_returns_empty_list(mock_get):
     assert not book_search.search_books('0000000000')
 
 
-@patch('app.services.book_search.requests.get')
+@patch('app.services.book_search.provider_http.get')
 def test_search_books_title_query_unaffected(mock_get):
     resp = MagicMock()
     resp.raise_for_status.return_value = None
@@ -50,7 +50,7 @@ def test_apply_detail_never_renames_existing():
     assert c.region == 'Americas'
 
 
-@patch('app.services.country_data.requests.get')
+@patch('app.services.country_data.provider_http.get')
 def test_fetch_all_countries_caches_and_filters(mock_get):
     country_data._world_cache = None
     resp = MagicMock()
@@ -76,7 +76,7 @@ def test_fetch_all_countries_caches_and_filters(mock_get):
     country_data._world_cache = None
 
 
-@patch('app.services.country_data.requests.get')
+@patch('app.services.country_data.provider_http.get')
 def test_fetch_all_countries_failure_not_cached(mock_get):
     country_data._world_cache = None
     mock_get.side_effect = ValueError('boom')
@@ -0,0 +1,48 @@
+# pylint: disable=missing-module-docstring, missing-function-docstring
+import json
+from datetime import date, datetime
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+
+from app.db.models_sandbox import DbMovie, DbUserMovie
+from app.schemas.schemas_sandbox import UserMovieResponse
+from app.services import fast_json
+
+
+def _tracker() -> DbUserMovie:
+    now = datetime(2026, 1, 1, 12, 30)
+    return DbUserMovie(
+        id='tracker-1',
+        on_rankings=True,
+        completed_at=date(2025, 6, 1),
+        notes='Still great',
+        created_at=now,
+        updated_at=now,
+        movie=DbMovie(id='movie-1', title='Heat', imdb='tt0113277', plot='Long.'),
+    )
+
+
+def test_dump_matches_the_validate_then_encode_path():
+    tracker = _tracker()
+    old = jsonable_encoder([UserMovieResponse.model_validate(tracker).model_dump()])
+
+    assert json.loads(fast_json.dump(List[UserMovieResponse], [tracker])) == old
+
+
+def test_adapters_are_built_once_per_schema():
+    assert fast_json.adapter(List[UserMovieResponse]) is fast_json.adapter(
+        List[UserMovieResponse]
+    )
+
+
+def test_encode_handles_dates_and_responses_carry_headers():
+    body = fast_json.encode({'at': datetime(2026, 1, 1), 'on': date(2026, 1, 2)})
+    response = fast_json.response(body, headers={'ETag': '"1"'})
+
+    assert json.loads(response.body) == {
+        'at': '2026-01-01T00:00:00',
+        'on': '2026-01-02',
+    }
+    assert response.media_type == 'application/json'
+    assert response.headers['ETag'] == '"1"'
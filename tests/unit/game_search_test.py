@@ -68,7 +68,7 @@ def test_get_game_detail_unconfigured_returns_none(mock_settings):
 
 
 @patch('app.services.game_search.get_settings')
-@patch('app.services.game_search.requests.post')
+@patch('app.services.game_search.provider_http.post')
 def test_search_games_returns_results(mock_post, mock_settings):
     _reset_token_cache()
     mock_settings.return_value = Settings(
@@ -101,7 +101,7 @@ def test_search_games_returns_results(mock_post, mock_settings):
 
 
 @patch('app.services.game_search.get_settings')
-@patch('app.services.game_search.requests.post')
+@patch('app.services.game_search.provider_http.post')
 def test_search_games_numeric_query_resolves_by_id(mock_post, mock_settings):
     _reset_token_cache()
     mock_settings.return_value = Settings(
@@ -142,7 +142,7 @@ def test_search_games_numeric_query_resolves_by_id(mock_post, mock_settings):
 
 
 @patch('app.services.game_search.get_settings')
-@patch('app.services.game_search.requests.post')
+@patch('app.services.game_search.provider_http.post')
 def test_search_games_numeric_query_unknown_id_returns_empty(mock_post, mock_settings):
     _reset_token_cache()
     mock_settings.return_value = Settings(
@@ -161,7 +161,7 @@ def test_search_games_numeric_query_unknown_id_returns_empty(mock_post, mock_set
 
 
 @patch('app.services.game_search.get_settings')
-@patch('app.services.game_search.requests.post')
+@patch('app.services.game_search.provider_http.post')
 def test_search_games_title_query_still_uses_fuzzy_search(mock_post, mock_settings):
     _reset_token_cache()
     mock_settings.return_value = Settings(
@@ -184,7 +184,7 @@ def test_search_games_title_query_still_uses_fuzzy_search(mock_post, mock_settin
 
 
 @patch('app.services.game_search.get_settings')
-@patch('app.services.game_search.requests.post')
+@patch('app.services.game_search.provider_http.post')
 def test_get_game_detail_maps_fields_and_caches_token(mock_post, mock_settings):
     _reset_token_cache()
     mock_settings.return_value = Settings(
@@ -0,0 +1,111 @@
+# pylint: disable=missing-module-docstring, missing-function-docstring
+# pylint: disable=protected-access
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from app.config import Settings
+
+from app.db.models_sandbox import DbMovie, DbVideoGame
+from app.services import local_search
+
+
+@pytest.fixture(autouse=True)
+def _empty_index():
+    local_search.reset()
+    yield
+    local_search.reset()
+
+
+@pytest.fixture(name='db')
+def _db(test_client):
+    session = test_client.test_db_session
+    session.add_all(
+        [
+            DbMovie(id='m-jp', title='Jurassic Park', imdb='tt0107290', year=1993),
+            DbMovie(id='m-jw', title='Jurassic World', imdb='tt0369610', year=2015),
+            DbMovie(id='m-sm', title='Spider-Man', imdb='tt0145487', year=2002),
+            DbVideoGame(id='g-z', title='The Legend of Zelda', igdb=1022),
+        ]
+    )
+    session.flush()
+    return session
+
+
+def _titles(hits):
+    return [hit['title'] for hit in hits]
+
+
+def test_exact_match_outranks_prefix(db):
+    hits = local_search.search(db, 'spider man')
+    assert hits[0]['title'] == 'Spider-Man'
+    assert hits[0]['score'] == 3.0
+
+
+def test_title_and_word_prefixes_match(db):
+    assert _titles(local_search.search(db, 'jurassic')) == [
+        'Jurassic Park',
+        'Jurassic World',
+    ]
+    assert _titles(local_search.search(db, 'zel')) == ['The Legend of Zelda']
+
+
+def test_typos_fall_back_to_trigram_similarity(db):
+    hits = local_search.search(db, 'jurasic park')
+    assert hits[0]['title'] == 'Jurassic Park'
+    assert hits[0]['score'] < 1.0
+
+
+def test_domains_filter_and_limit(db):
+    assert local_search.search(db, 'zelda', domains=['movies']) == []
+    assert len(local_search.search(db, 'jurassic', limit=1)) == 1
+
+
+def test_upsert_and_remove_update_the_index_in_place(db):
+    local_search.search(db, 'x')  # builds the index
+    movie = SimpleNamespace(id='m-new', title='Jumanji', year=1995, poster_url=None)
+    local_search.upsert('movies', movie)
+    assert _titles(local_search.search(db, 'juman')) == ['Jumanji']
+
+    movie.title = 'Jumanji: Welcome to the Jungle'
+    local_search.upsert('movies', movie)
+    assert _titles(local_search.search(db, 'jungle')) == [movie.title]
+    assert local_search.search(db, 'jumanji')[0]['score'] == 2.0
+
+    local_search.remove('movies', 'm-new')
+    assert local_search.search(db, 'juman') == []
+
+
+def test_writes_during_a_rebuild_survive_the_swap(db):
+    build = local_search._index
+    movie = SimpleNamespace(id='m-new', title='Jumanji', year=1995, poster_url=None)
+
+    def index_then_write(docs):
+        # Lands after the catalog was read, before the new index is swapped in.
+        local_search.upsert('movies', movie)
+        local_search.remove('movies', 'm-sm')
+        return build(docs)
+
+    with patch('app.services.local_search._index', side_effect=index_then_write):
+        local_search.rebuild(db)
+    assert _titles(local_search.search(db, 'juman')) == ['Jumanji']
+    assert local_search.search(db, 'spider') == []
+
+
+@patch('app.services.local_search.get_settings')
+def test_stale_index_is_served_while_another_rebuild_runs(mock_settings, db):
+    local_search.rebuild(db)
+    mock_settings.return_value = Settings(local_search_rebuild_seconds=0)
+    with patch('app.services.local_search._rebuild') as mock_rebuild:
+        with local_search._rebuild_lock:
+            assert _titles(local_search.search(db, 'zelda')) == ['The Legend of Zelda']
+        mock_rebuild.assert_not_called()
+        local_search.search(db, 'zelda')
+    mock_rebuild.assert_called_once()
+
+
+def test_vocabulary_lists_alphabetic_title_words(db):
+    local_search.rebuild(db)
+    words = local_search.vocabulary()
+    assert {'jurassic', 'park', 'spider', 'zelda'} <= words
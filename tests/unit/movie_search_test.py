@@ -33,7 +33,7 @@ def test_apply_detail_truncates_and_skips_none():
 
 
 @patch('app.services.movie_search.get_settings')
-@patch('app.services.movie_search.requests.get')
+@patch('app.services.movie_search.provider_http.get')
 def test_get_movie_detail_maps_fields(mock_get, mock_settings):
     mock_settings.return_value = Settings(omdb_api_key='k', env='github')
     resp = MagicMock()
@@ -67,7 +67,7 @@ def test_get_movie_detail_unconfigured_returns_none(mock_settings):
 
 
 @patch('app.services.movie_search.get_settings')
-@patch('app.services.movie_search.requests.get')
+@patch('app.services.movie_search.provider_http.get')
 def test_search_movies_by_imdb_id_returns_search_hit_shape(mock_get, mock_settings):
     mock_settings.return_value = Settings(omdb_api_key='k', env='github')
     resp = MagicMock()
@@ -100,7 +100,7 @@ def test_search_movies_by_imdb_id_returns_search_hit_shape(mock_get, mock_settin
 
 
 @patch('app.services.movie_search.get_settings')
-@patch('app.services.movie_search.requests.get')
+@patch('app.services.movie_search.provider_http.get')
 def test_search_movies_by_imdb_id_case_insensitive(mock_get, mock_settings):
     mock_settings.return_value = Settings(omdb_api_key='k', env='github')
     resp = MagicMock()
@@ -122,7 +122,7 @@ def test_search_movies_by_imdb_id_case_insensitive(mock_get, mock_settings):
 
 
 @patch('app.services.movie_search.get_settings')
-@patch('app.services.movie_search.requests.get')
+@patch('app.services.movie_search.provider_http.get')
 def test_search_movies_by_unknown_imdb_id_returns_empty(mock_get, mock_settings):
     mock_settings.return_value = Settings(omdb_api_key='k', env='github')
     resp = MagicMock()
@@ -134,7 +134,7 @@ def test_search_movies_by_unknown_imdb_id_returns_empty(mock_get, mock_settings)
 
 
 @patch('app.services.movie_search.get_settings')
-@patch('app.services.movie_search.requests.get')
+@patch('app.services.movie_search.provider_http.get')
 def test_search_movies_title_query_still_uses_title_search(mock_get, mock_settings):
     mock_settings.return_value = Settings(omdb_api_key='k', env='github')
     resp = MagicMock()
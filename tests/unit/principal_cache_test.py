@@ -0,0 +1,121 @@
+# pylint: disable=missing-module-docstring, missing-function-docstring
+from unittest.mock import patch
+
+import pytest
+
+from app.auth import principal_cache
+from app.config import Settings
+from app.db.models import DbUser
+
+
+@pytest.fixture(autouse=True)
+def _clean_cache():
+    principal_cache.reset()
+    yield
+    principal_cache.reset()
+
+
+def _user(pk=7, user_id='u-7', handle=None) -> DbUser:
+    return DbUser(
+        pk=pk,
+        id=user_id,
+        email=f'{user_id}@example.com',
+        display_name='Someone',
+        user_group='user',
+        password='x',
+        handle=handle,
+    )
+
+
+def test_store_then_lookup_counts_hits_and_misses():
+    key = principal_cache.jwt_key('u-7')
+    assert principal_cache.lookup(key) is None
+    principal_cache.store(key, _user())
+    snapshot = principal_cache.lookup(key)
+    assert snapshot['pk'] == 7
+    assert snapshot['email'] == 'u-7@example.com'
+    stats = principal_cache.stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (1, 1, 1)
+
+
+@patch('app.auth.principal_cache.get_settings')
+def test_entries_expire_after_ttl(mock_settings):
+    mock_settings.return_value = Settings(principal_cache_ttl_seconds=30)
+    key = principal_cache.jwt_key('u-7')
+    with patch('app.auth.principal_cache.time.monotonic', return_value=100.0):
+        principal_cache.store(key, _user())
+    with patch('app.auth.principal_cache.time.monotonic', return_value=129.0):
+        assert principal_cache.lookup(key) is not None
+    with patch('app.auth.principal_cache.time.monotonic', return_value=131.0):
+        assert principal_cache.lookup(key) is None
+    assert principal_cache.stats()['size'] == 0
+
+
+@patch('app.auth.principal_cache.get_settings')
+def test_least_recently_used_entry_is_evicted(mock_settings):
+    mock_settings.return_value = Settings(principal_cache_size=2)
+    principal_cache.store('jwt:a', _user(1, 'a'))
+    principal_cache.store('jwt:b', _user(2, 'b'))
+    principal_cache.lookup('jwt:a')  # a is now the most recent
+    principal_cache.store('jwt:c', _user(3, 'c'))
+    assert principal_cache.lookup('jwt:b') is None
+    assert principal_cache.lookup('jwt:a') is not None
+    assert principal_cache.lookup('jwt:c') is not None
+
+
+@patch('app.auth.principal_cache.get_settings')
+def test_zero_ttl_disables_the_cache(mock_settings):
+    mock_settings.return_value = Settings(principal_cache_ttl_seconds=0)
+    principal_cache.store('jwt:a', _user(1, 'a'))
+    assert principal_cache.lookup('jwt:a') is None
+    assert principal_cache.stats()['size'] == 0
+
+
+def test_invalidate_user_drops_jwt_and_api_key_entries():
+    principal_cache.store(principal_cache.jwt_key('u-7'), _user())
+    principal_cache.store(principal_cache.api_key_key('abc'), _user())
+    principal_cache.store(principal_cache.jwt_key('u-8'), _user(8, 'u-8'))
+    principal_cache.invalidate_user('u-7')
+    assert principal_cache.lookup(principal_cache.jwt_key('u-7')) is None
+    assert principal_cache.lookup(principal_cache.api_key_key('abc')) is None
+    assert principal_cache.lookup(principal_cache.jwt_key('u-8')) is not None
+    assert principal_cache.stats()['invalidations'] == 2
+
+
+def test_attach_merges_into_session_without_loading(test_client):
+    user = test_client.first_user
+    principal_cache.store('jwt:x', user)
+    snapshot = principal_cache.lookup('jwt:x')
+    session = test_client.test_db_session
+    session.expunge_all()
+    attached = principal_cache.attach(session, snapshot)
+    assert attached in session
+    assert attached.pk == user.pk
+    assert attached.email == user.email
+
+
+def test_repeat_requests_are_served_from_cache(test_client):
+    headers = {'Authorization': f'Bearer {test_client.first_user.token}'}
+    assert (
+        test_client.get('/v1/users/me/visibility', headers=headers).status_code == 200
+    )
+    misses = principal_cache.stats()['misses']
+    for _ in range(3):
+        assert (
+            test_client.get('/v1/users/me/visibility', headers=headers).status_code
+            == 200
+        )
+    stats = principal_cache.stats()
+    assert stats['misses'] == misses
+    assert stats['hits'] >= 3
+
+
+def test_visibility_change_invalidates_cached_principal(test_client):
+    headers = {'Authorization': f'Bearer {test_client.first_user.token}'}
+    test_client.get('/v1/users/me/visibility', headers=headers)
+    response = test_client.put(
+        '/v1/users/me/visibility', headers=headers, json={'handle': 'cached-handle'}
+    )
+    assert response.status_code == 200
+    body = test_client.get('/v1/users/me/visibility', headers=headers).json()
+    assert body['handle'] == 'cached-handle'
@@ -0,0 +1,125 @@
+# pylint: disable=missing-module-docstring, missing-function-docstring
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.config import Settings
+from app.services import provider_cache
+
+
+@pytest.fixture(autouse=True)
+def _enabled_cache():
+    provider_cache.reset()
+    with patch('app.services.provider_cache.get_settings') as mock_settings:
+        mock_settings.return_value = Settings(provider_cache_enabled=True)
+        yield
+    provider_cache.reset()
+
+
+def _provider(namespace='omdb.search', key=provider_cache.normalized_query):
+    upstream = MagicMock()
+    return upstream, provider_cache.cached(namespace, key=key)(upstream)
+
+
+def test_repeat_search_is_served_from_cache():
+    upstream, search = _provider()
+    upstream.return_value = [{'title': 'The Office'}]
+    assert search('The Office') == [{'title': 'The Office'}]
+    assert search('  the   office ') == [{'title': 'The Office'}]
+    assert upstream.call_count == 1
+    stats = provider_cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_ratio']) == (1, 1, 0.5)
+
+
+def test_cached_values_are_copies():
+    upstream, search = _provider()
+    upstream.return_value = [{'title': 'Zelda'}]
+    search('zelda')[0]['tracked'] = True
+    assert search('zelda') == [{'title': 'Zelda'}]
+
+
+def test_empty_results_use_the_negative_ttl():
+    upstream, search = _provider()
+    upstream.return_value = []
+    ttl = provider_cache.POLICIES['omdb.search'].negative_ttl
+    with patch('app.services.provider_cache.time.time', return_value=1000.0):
+        search('nothing')
+    with patch('app.services.provider_cache.time.time', return_value=999.0 + ttl):
+        search('nothing')
+    assert upstream.call_count == 1
+    assert provider_cache.stats()['negative_hits'] == 1
+    with patch('app.services.provider_cache.time.time', return_value=1001.0 + ttl):
+        search('nothing')
+    assert upstream.call_count == 2
+
+
+def test_errors_are_not_cached():
+    upstream, search = _provider()
+    upstream.side_effect = [HTTPException(502, 'down'), [{'title': 'Up'}]]
+    with pytest.raises(HTTPException):
+        search('up')
+    assert search('up') == [{'title': 'Up'}]
+
+
+def test_transient_failures_return_the_fallback_uncached():
+    upstream, detail = _provider('omdb.detail', key=None)
+    upstream.side_effect = [provider_cache.Unavailable(None), {'title': 'Up'}]
+    assert detail('tt1') is None
+    assert detail('tt1') == {'title': 'Up'}
+    assert upstream.call_count == 2
+
+
+def test_stale_entry_is_served_and_refreshed_in_background():
+    upstream, detail = _provider('omdb.detail', key=None)
+    upstream.return_value = {'title': 'Old'}
+    policy = provider_cache.POLICIES['omdb.detail']
+    with patch('app.services.provider_cache.time.time', return_value=0.0):
+        detail('tt1')
+    upstream.return_value = {'title': 'New'}
+    with patch('app.services.provider_cache.time.time', return_value=policy.ttl + 1):
+        with patch('app.services.provider_cache.threading.Thread') as thread:
+            assert detail('tt1') == {'title': 'Old'}
+    thread.call_args.kwargs['target']()
+    assert detail('tt1') == {'title': 'New'}
+    assert provider_cache.stats()['stale_hits'] == 1
+
+
+def test_bypass_skips_reads_but_writes_through():
+    upstream, detail = _provider('tvmaze.show', key=None)
+    upstream.return_value = {'name': 'v1'}
+    detail(1)
+    upstream.return_value = {'name': 'v2'}
+    with provider_cache.bypass():
+        assert detail(1) == {'name': 'v2'}
+    assert detail(1) == {'name': 'v2'}
+    assert upstream.call_count == 2
+
+
+def test_disabled_cache_always_calls_upstream():
+    upstream, search = _provider()
+    upstream.return_value = [{'title': 'x'}]
+    with patch('app.services.provider_cache.get_settings') as mock_settings:
+        mock_settings.return_value = Settings(provider_cache_enabled=False)
+        search('x')
+        search('x')
+    assert upstream.call_count == 2
+
+
+def test_sqlite_backend_round_trips_dates(tmp_path):
+    sqlite_backend = provider_cache.SQLiteBackend(str(tmp_path / 'cache.db'), 10)
+    with patch.object(provider_cache, '_backend', sqlite_backend):
+        upstream, detail = _provider('tvmaze.show', key=None)
+        upstream.return_value = {'premiered': datetime(2005, 3, 24)}
+        detail(526)
+        assert detail(526) == {'premiered': datetime(2005, 3, 24)}
+    assert upstream.call_count == 1
+
+
+def test_sqlite_backend_caps_entries(tmp_path):
+    sqlite_backend = provider_cache.SQLiteBackend(str(tmp_path / 'cache.db'), 2)
+    for i in range(3):
+        sqlite_backend.set(str(i), provider_cache.Entry(i, 10.0**10, 10.0**10 + i))
+    assert sqlite_backend.get('0') is None
+    assert sqlite_backend.get('2').value == 2
@@ -0,0 +1,37 @@
+# pylint: disable=missing-module-docstring, missing-function-docstring
+# pylint: disable=protected-access
+from unittest.mock import patch
+
+from app.services import provider_http
+
+
+def test_session_is_shared_and_pooled():
+    provider_http.close()
+    first = provider_http.session()
+    assert provider_http.session() is first
+    adapter = first.get_adapter('https://api.tvmaze.com/shows/1')
+    assert adapter._pool_maxsize == provider_http.settings.provider_pool_maxsize
+    assert adapter.max_retries.total == provider_http.settings.provider_retries
+    assert 502 in adapter.max_retries.status_forcelist
+    # Final responses are handed back so providers keep their own handling.
+    assert adapter.max_retries.raise_on_status is False
+    provider_http.close()
+
+
+def test_close_drops_the_session():
+    first = provider_http.session()
+    provider_http.close()
+    assert provider_http.session() is not first
+    provider_http.close()
+
+
+def test_get_and_post_apply_default_timeout():
+    with patch.object(provider_http.session(), 'get') as mock_get:
+        provider_http.get('https://x', params={'q': 'a'})
+        mock_get.assert_called_once_with(
+            'https://x', params={'q': 'a'}, timeout=provider_http.REQUEST_TIMEOUT
+        )
+    with patch.object(provider_http.session(), 'post') as mock_post:
+        provider_http.post('https://x', data='body', timeout=3)
+        mock_post.assert_called_once_with('https://x', data='body', timeout=3)
+    provider_http.close()
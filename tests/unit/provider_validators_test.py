@@ -0,0 +1,133 @@
+# pylint: disable=missing-module-docstring, missing-function-docstring
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy import event
+
+from app.db.models_sandbox import DbTVShow
+from app.services import provider_validators, tv_search
+
+SHOW = {'id': 82, 'name': 'Game of Thrones', 'status': 'Ended', 'weight': 98}
+
+
+def _response(status_code=200, payload=None, headers=None):
+    response = MagicMock(status_code=status_code, ok=status_code < 400)
+    response.headers = headers or {}
+    response.json.return_value = payload
+    response.raise_for_status.return_value = None
+    return response
+
+
+@patch('app.services.tv_search.provider_http.get')
+def test_first_fetch_returns_the_detail_and_its_validators(mock_get):
+    mock_get.return_value = _response(payload=SHOW, headers={'ETag': '"v1"'})
+
+    detail, pending = provider_validators.fetch({}, tv_search.get_tv_show_detail, 82)
+
+    assert detail['title'] == 'Game of Thrones'
+    entry = pending[('tvmaze.show', '82')]
+    assert entry['etag'] == '"v1"'
+    assert entry['payload_hash'] == provider_validators.payload_hash(detail)
+    assert 'If-None-Match' not in mock_get.call_args.kwargs['headers']
+
+
+@patch('app.services.tv_search.provider_http.get')
+def test_not_modified_short_circuits_before_the_payload(mock_get):
+    known = {('tvmaze.show', '82'): {'etag': '"v1"', 'payload_hash': 'abc'}}
+    mock_get.return_value = _response(status_code=304)
+
+    detail, pending = provider_validators.fetch(known, tv_search.get_tv_show_detail, 82)
+
+    assert detail is provider_validators.UNCHANGED
+    assert not pending
+    assert mock_get.call_args.kwargs['headers'] == {'If-None-Match': '"v1"'}
+
+
+@patch('app.services.tv_search.provider_http.get')
+def test_unchanged_mapped_payload_is_unchanged(mock_get):
+    mock_get.return_value = _response(payload=SHOW)
+    first, pending = provider_validators.fetch({}, tv_search.get_tv_show_detail, 82)
+
+    # Only a field the catalog doesn't store moved upstream.
+    mock_get.return_value = _response(payload={**SHOW, 'weight': 99})
+    again, _ = provider_validators.fetch(pending, tv_search.get_tv_show_detail, 82)
+    assert again is provider_validators.UNCHANGED
+
+    mock_get.return_value = _response(payload={**SHOW, 'status': 'Running'})
+    changed, _ = provider_validators.fetch(pending, tv_search.get_tv_show_detail, 82)
+    assert changed == {**first, 'status': 'Running'}
+
+
+@patch('app.services.tv_search.provider_http.get')
+def test_failed_payload_returns_nothing_to_store(mock_get):
+    mock_get.return_value = _response(headers={'ETag': '"v2"'})
+    mock_get.return_value.json.side_effect = ValueError('truncated')
+
+    episodes, pending = provider_validators.fetch({}, tv_search.get_show_episodes, 82)
+
+    assert episodes == []
+    assert not pending
+
+
+@patch('app.services.tv_search.provider_http.get')
+def test_plain_calls_are_unconditional(mock_get):
+    mock_get.return_value = _response(payload=SHOW, headers={'ETag': '"v1"'})
+
+    assert tv_search.get_tv_show_detail(82)['title'] == 'Game of Thrones'
+    assert 'headers' not in mock_get.call_args.kwargs
+
+
+def test_store_and_load_round_trip(test_db_session):
+    key = ('tvmaze.episodes', '82')
+    entry = {
+        'source': key[0],
+        'key': key[1],
+        'etag': None,
+        'last_modified': 'Wed, 01 Oct 2026 00:00:00 GMT',
+        'payload_hash': 'abc',
+    }
+    provider_validators.store(test_db_session, {key: entry})
+    provider_validators.store(test_db_session, {key: {**entry, 'payload_hash': 'd'}})
+
+    assert provider_validators.load(test_db_session, [key, ('tvmaze.show', '1')]) == {
+        key: {**entry, 'payload_hash': 'd'}
+    }
+
+
+def test_store_upserts_over_a_concurrent_refreshs_row(test_db_session, test_db_engine):
+    key = ('tvmaze.show', '82')
+    entry = {
+        'source': key[0],
+        'key': key[1],
+        'etag': '"v2"',
+        'last_modified': None,
+        'payload_hash': 'new',
+    }
+    # As if an overlapping refresh stored the same show and committed first.
+    provider_validators.store(test_db_session, {key: {**entry, 'etag': '"v1"'}})
+    statements = []
+
+    def count(_conn, _cursor, statement, *_args):
+        statements.append(statement.split()[0])
+
+    event.listen(test_db_engine, 'before_cursor_execute', count)
+    try:
+        provider_validators.store(test_db_session, {key: entry})
+    finally:
+        event.remove(test_db_engine, 'before_cursor_execute', count)
+
+    assert statements == ['INSERT']
+    assert provider_validators.load(test_db_session, [key]) == {key: entry}
+
+
+def test_apply_and_sync_skip_unchanged(test_db_session):
+    show = DbTVShow(title='Kept', status='Running')
+    test_db_session.add(show)
+    test_db_session.flush()
+
+    tv_search.apply_detail_to_show(show, provider_validators.UNCHANGED)
+    created = tv_search.sync_episodes(
+        test_db_session, show, provider_validators.UNCHANGED
+    )
+
+    assert created == 0
+    assert not test_db_session.dirty
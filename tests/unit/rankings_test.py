@@ -0,0 +1,154 @@
+# pylint: disable=missing-module-docstring, missing-function-docstring
+from sqlalchemy import event
+
+from app.db.models_sandbox import DbMovie, DbUserMovie
+from app.services import rankings
+
+
+def _ranked_movies(session, user_pk, count):
+    movies = [DbMovie(title=f'M{i}', imdb=f'tt7{i:05d}') for i in range(count)]
+    session.add_all(movies)
+    session.flush()
+    session.add_all(
+        DbUserMovie(
+            user_id=user_pk,
+            movie_id=m.pk,
+            on_rankings=True,
+            rank_key=(i + 1) * rankings.GAP,
+        )
+        for i, m in enumerate(movies)
+    )
+    session.commit()
+    return [m.id for m in movies]
+
+
+def _reorder(session, user_pk, ids):
+    return rankings.reorder(
+        session,
+        user_pk,
+        ids,
+        tracker_model=DbUserMovie,
+        catalog_model=DbMovie,
+        join_col='movie_id',
+        relation='movie',
+    )
+
+
+def test_large_reorder_is_one_select_and_one_update(
+    test_client, test_db_session, test_db_engine
+):
+    user_pk = test_client.first_user.pk
+    ids = _ranked_movies(test_db_session, user_pk, 300)
+    statements = []
+
+    def count(_conn, _cursor, statement, *_args):
+        statements.append(statement.split()[0])
+
+    event.listen(test_db_engine, 'before_cursor_execute', count)
+    try:
+        result = _reorder(test_db_session, user_pk, list(reversed(ids)))
+        # Serializing the result must not lazy-load anything.
+        order = [(item.movie.id, item.rank) for item in result]
+    finally:
+        event.remove(test_db_engine, 'before_cursor_execute', count)
+
+    # One UPDATE re-ranks; the change log locks the user's version row, then
+    # DELETE + INSERT move the rows in it.
+    assert statements == ['SELECT', 'UPDATE', 'SELECT', 'DELETE', 'INSERT']
+    assert order == list(zip(reversed(ids), range(1, 301)))
+
+
+def test_only_moved_rows_are_re_dated(test_client, test_db_session):
+    user_pk = test_client.first_user.pk
+    ids = _ranked_movies(test_db_session, user_pk, 3)
+    before = {t.pk: t.ranked_at for t in test_db_session.query(DbUserMovie)}
+    # Swap the first two: moving the second above the first is one write.
+    result = _reorder(test_db_session, user_pk, [ids[1], ids[0], ids[2]])
+    assert [item.movie.id for item in result] == [ids[1], ids[0], ids[2]]
+    stored = {t.movie.id: t for t in test_db_session.query(DbUserMovie)}
+    assert stored[ids[1]].ranked_at is not None
+    assert stored[ids[0]].ranked_at == before[stored[ids[0]].pk]
+    assert stored[ids[2]].ranked_at == before[stored[ids[2]].pk]
+    assert stored[ids[0]].rank_key == rankings.GAP
+    assert [stored[i].rank for i in ids] == [2, 1, 3]
+
+
+def _trackers(session, user_pk, ids):
+    by_id = {
+        t.movie.id: t
+        for t in session.query(DbUserMovie).filter(DbUserMovie.user_id == user_pk)
+    }
+    return [by_id[i] for i in ids]
+
+
+def test_moving_to_the_top_writes_only_the_moved_row(
+    test_client, test_db_session, test_db_engine
+):
+    user_pk = test_client.first_user.pk
+    ids = _ranked_movies(test_db_session, user_pk, 50)
+    tracker = _trackers(test_db_session, user_pk, [ids[30]])[0]
+    updates = []
+
+    def count(_conn, _cursor, statement, parameters, *_args):
+        if statement.startswith('UPDATE'):
+            updates.append(parameters)
+
+    event.listen(test_db_engine, 'before_cursor_execute', count)
+    try:
+        assert rankings.place(test_db_session, tracker, 1) == 1
+        test_db_session.commit()
+    finally:
+        event.remove(test_db_engine, 'before_cursor_execute', count)
+
+    assert len(updates) == 1
+    test_db_session.expire_all()
+    ranks = [t.rank for t in _trackers(test_db_session, user_pk, ids)]
+    assert ranks == [*range(2, 32), 1, *range(32, 51)]
+
+
+def test_unplacing_leaves_no_gap_in_derived_ranks(test_client, test_db_session):
+    user_pk = test_client.first_user.pk
+    ids = _ranked_movies(test_db_session, user_pk, 4)
+    rankings.unplace(_trackers(test_db_session, user_pk, [ids[1]])[0])
+    test_db_session.commit()
+    trackers = _trackers(test_db_session, user_pk, ids)
+    rankings.attach_positions(test_db_session, trackers)
+    assert [t.rank for t in trackers] == [1, None, 2, 3]
+
+
+def test_exhausted_gap_renumbers_the_list(test_client, test_db_session):
+    user_pk = test_client.first_user.pk
+    ids = _ranked_movies(test_db_session, user_pk, 3)
+    first, second, third = _trackers(test_db_session, user_pk, ids)
+    # Adjacent keys leave no room between the first two entries.
+    second.rank_key = first.rank_key + 1
+    test_db_session.commit()
+
+    rankings.place(test_db_session, third, 2)
+    test_db_session.commit()
+    test_db_session.expire_all()
+    trackers = _trackers(test_db_session, user_pk, ids)
+    assert [t.rank_key for t in trackers] == [
+        rankings.GAP,
+        3 * rankings.GAP,
+        2 * rankings.GAP,
+    ]
+    assert [t.rank for t in trackers] == [1, 3, 2]
+
+
+def test_moving_down_into_an_exhausted_gap_lands_at_the_target(
+    test_client, test_db_session
+):
+    user_pk = test_client.first_user.pk
+    ids = _ranked_movies(test_db_session, user_pk, 4)
+    first, _, third, fourth = _trackers(test_db_session, user_pk, ids)
+    # No room between the entries the first one moves in between.
+    fourth.rank_key = third.rank_key + 1
+    test_db_session.commit()
+
+    assert rankings.place(test_db_session, first, 3) == 3
+    test_db_session.commit()
+    test_db_session.expire_all()
+    trackers = _trackers(test_db_session, user_pk, ids)
+    rankings.attach_positions(test_db_session, trackers)
+    assert [t.rank for t in trackers] == [3, 1, 2, 4]
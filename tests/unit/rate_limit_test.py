@@ -0,0 +1,61 @@
+# pylint: disable=missing-module-docstring, missing-function-docstring
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from app.db.models import DbRateLimit
+from app.services import rate_limit
+
+
+@pytest.fixture(name='sql_backend')
+def _sql_backend():
+    engine = create_engine(
+        'sqlite://',
+        connect_args={'check_same_thread': False},
+        poolclass=StaticPool,
+    )
+    DbRateLimit.__table__.create(bind=engine)
+    yield rate_limit.SQLBackend(engine)
+    engine.dispose()
+
+
+def _spend(backend, clock, when, key='k'):
+    # 3 per 30s: one request refills every 10s.
+    with patch(f'app.services.rate_limit.time.{clock}', return_value=when):
+        return backend.acquire(key, 10.0, 30.0)
+
+
+@pytest.mark.parametrize('clock', ['monotonic', 'time'])
+def test_burst_then_steady_refill(clock, sql_backend):
+    backend = rate_limit.MemoryBackend() if clock == 'monotonic' else sql_backend
+    # A full bucket allows 3 at once...
+    assert [_spend(backend, clock, 1000.0) for _ in range(3)] == [0.0] * 3
+    # ...then the 4th waits for one interval to refill.
+    assert _spend(backend, clock, 1000.0) == pytest.approx(10.0)
+    assert _spend(backend, clock, 1004.0) == pytest.approx(6.0)
+    assert _spend(backend, clock, 1010.0) == 0.0
+    assert _spend(backend, clock, 1010.0) == pytest.approx(10.0)
+    # Keys are independent.
+    assert _spend(backend, clock, 1010.0, key='other') == 0.0
+
+
+def test_idle_keys_are_swept_from_memory():
+    backend = rate_limit.MemoryBackend(shards=1)
+    for i in range(10):
+        _spend(backend, 'monotonic', 0.0, key=f'k{i}')
+    assert backend.size() == 10
+    with patch('app.services.rate_limit.SWEEP_EVERY', 1):
+        # Long after every TAT has passed, the next check evicts them all.
+        _spend(backend, 'monotonic', 1000.0, key='fresh')
+    assert backend.size() == 1
+
+
+def test_sql_backend_sweeps_expired_rows(sql_backend):
+    _spend(sql_backend, 'time', 0.0, key='old')
+    with patch('app.services.rate_limit.SWEEP_EVERY', 1):
+        _spend(sql_backend, 'time', 1000.0, key='new')
+    with sql_backend.engine.connect() as conn:
+        keys = conn.execute(DbRateLimit.__table__.select()).fetchall()
+    assert [row.key for row in keys] == ['new']
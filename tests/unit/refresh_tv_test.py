@@ -5,10 +5,11 @@ Test the recurring TV refresh job's show-selection rules.
 # The selection helper is the contract worth pinning here, private or not.
 # pylint: disable=protected-access
 
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 from app.db.models_sandbox import DbTVShow, DbUserTVShow
 from app.jobs import refresh_tv
+from app.services import provider_validators, rate_limit
 
 
 def _show(db, title, tvmaze, status):
@@ -62,9 +63,13 @@ def test_shows_without_a_tvmaze_id_are_skipped(test_db_session):
 
 
 @patch('app.jobs.refresh_tv.sync_episodes', return_value=3)
+@patch('app.jobs.refresh_tv.get_show_episodes', return_value=[])
 @patch('app.jobs.refresh_tv.get_tv_show_detail', return_value=None)
-@patch('app.jobs.refresh_tv.time.sleep')
-def test_stops_early_after_consecutive_misses(_sleep, _detail, _sync, test_db_session):
+@patch('app.jobs.refresh_tv.get_show_updates', return_value=None)
+@patch('app.jobs.refresh_tv._take_token')
+def test_stops_early_after_consecutive_misses(
+    _token, _updates, _detail, _episodes, _sync, test_db_session
+):
     """
     A run of misses means rate limiting — stop rather than hammer TVMaze.
     """
@@ -79,3 +84,116 @@ def test_stops_early_after_consecutive_misses(_sleep, _detail, _sync, test_db_se
     assert report['misses'] == refresh_tv.STOP_AFTER_CONSECUTIVE_MISSES
     # Stopped before touching every show
     assert report['shows'] < refresh_tv.STOP_AFTER_CONSECUTIVE_MISSES + 5
+
+
+@patch('app.jobs.refresh_tv.sync_episodes', return_value=0)
+@patch('app.jobs.refresh_tv.get_show_episodes', return_value=[{'tvmaze': 1}])
+@patch('app.jobs.refresh_tv.get_tv_show_detail', return_value={'status': 'Running'})
+@patch('app.jobs.refresh_tv._take_token')
+def test_only_shows_that_moved_upstream_are_fetched(
+    _token, detail, _episodes, _sync, test_db_session
+):
+    """
+    The updates feed skips shows unchanged since their watermark, and a
+    refreshed show stores the feed's value as its new watermark.
+    """
+    unchanged = _show(test_db_session, 'Unchanged', 401, 'Running')
+    moved = _show(test_db_session, 'Moved', 402, 'Running')
+    fresh = _show(test_db_session, 'Never Refreshed', 403, 'Running')
+    unchanged.tvmaze_updated = moved.tvmaze_updated = 1000
+    for show in (unchanged, moved, fresh):
+        test_db_session.add(DbUserTVShow(user_id=1, tv_show_id=show.pk))
+    test_db_session.flush()
+    updates = {401: 1000, 402: 2000, 403: 1500}
+
+    with patch('app.jobs.refresh_tv.get_show_updates', return_value=updates), patch(
+        'app.jobs.refresh_tv.SessionLocal', return_value=test_db_session
+    ):
+        report = refresh_tv.run()
+
+    assert report['unchanged'] == 1
+    assert report['shows'] == 2
+    assert sorted(call.args[0] for call in detail.call_args_list) == [402, 403]
+    watermarks = dict(
+        test_db_session.query(DbTVShow.tvmaze, DbTVShow.tvmaze_updated).filter(
+            DbTVShow.tvmaze.in_(updates)
+        )
+    )
+    assert watermarks == updates
+
+    # Nothing moved since: the next pass fetches nothing.
+    with patch('app.jobs.refresh_tv.get_show_updates', return_value=updates), patch(
+        'app.jobs.refresh_tv.SessionLocal', return_value=test_db_session
+    ):
+        assert refresh_tv.run()['shows'] == 0
+
+
+def test_token_bucket_holds_requests_to_the_tvmaze_limit():
+    """
+    Any 10s window sees at most 20 requests, however many workers ask.
+    """
+    clock = MagicMock()
+    clock.monotonic.return_value = 0.0
+
+    def sleep(seconds):
+        # Real sleeps have timer granularity; a float-rounding wait of 1e-16
+        # would never move a fake clock.
+        clock.monotonic.return_value += max(seconds, 0.001)
+
+    clock.sleep.side_effect = sleep
+    taken = []
+
+    with patch.object(refresh_tv, '_bucket', rate_limit.MemoryBackend(shards=1)), patch(
+        'app.services.rate_limit.time', clock
+    ), patch('app.jobs.refresh_tv.time', clock):
+        for _ in range(60):
+            refresh_tv._take_token()
+            taken.append(clock.monotonic.return_value)
+
+    for i, start in enumerate(taken):
+        assert sum(start <= t < start + 10 for t in taken[i:]) <= 20
+    # ...and it does not throttle harder than it has to.
+    assert taken[-1] < 60 * 10 / 18
+
+
+@patch('app.jobs.refresh_tv._take_token')
+def test_not_modified_shows_are_left_untouched(_token, test_db_session):
+    """
+    A 304 for a show fetched before applies nothing, so the row keeps its
+    updated_at, while the watermark still moves on.
+    """
+    show = _show(test_db_session, 'Stable', 501, 'Running')
+    show.tvmaze_updated = 1000
+    test_db_session.add(DbUserTVShow(user_id=1, tv_show_id=show.pk))
+    provider_validators.store(
+        test_db_session,
+        {
+            (source, '501'): {
+                'source': source,
+                'key': '501',
+                'etag': '"v1"',
+                'last_modified': None,
+                'payload_hash': 'abc',
+            }
+            for source in ('tvmaze.show', 'tvmaze.episodes')
+        },
+    )
+    test_db_session.flush()
+    row = test_db_session.query(DbTVShow.updated_at, DbTVShow.tvmaze_updated)
+    row = row.filter(DbTVShow.tvmaze == 501)
+    updated_at = row.one().updated_at
+    not_modified = MagicMock(status_code=304)
+
+    with patch(
+        'app.services.tv_search.provider_http.get', return_value=not_modified
+    ) as upstream, patch(
+        'app.jobs.refresh_tv.get_show_updates', return_value={501: 2000}
+    ), patch(
+        'app.jobs.refresh_tv.SessionLocal', return_value=test_db_session
+    ):
+        report = refresh_tv.run()
+
+    assert report['not_modified'] == 1
+    assert report['detail_updated'] == 0
+    assert upstream.call_count == 2
+    assert row.one() == (updated_at, 2000)
@@ -0,0 +1,18 @@
+# pylint: disable=missing-module-docstring, missing-function-docstring
+import asyncio
+import threading
+from unittest.mock import patch
+
+from app import run
+
+
+def test_lifespan_warms_search_on_startup():
+    warmed = threading.Event()
+
+    async def start_and_stop():
+        async with run.lifespan(run.app):
+            pass
+
+    with patch('app.run._warm_search', side_effect=warmed.set):
+        asyncio.run(start_and_stop())
+        assert warmed.wait(5)
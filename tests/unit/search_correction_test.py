@@ -1,4 +1,5 @@
 # pylint: disable=missing-module-docstring, missing-function-docstring
+from app.services import search_correction
 from app.services.search_correction import correct_query
 
 
@@ -24,3 +25,30 @@ def test_unknown_words_pass_through():
 def test_empty_query():
     assert correct_query('') is None
     assert correct_query('   ') is None
+
+
+def test_warm_adds_catalog_vocabulary():
+    # Without the catalog word, "witcher" is "fixed" into a dictionary word.
+    search_correction.warm()
+    assert correct_query('the witcher') == 'the witches'
+    search_correction.warm(['The Witcher', 'Skyrim'])
+    try:
+        assert correct_query('the witcher') is None
+        assert correct_query('skyrrim') == 'skyrim'
+    finally:
+        search_correction.warm()
+
+
+def test_corrections_are_memoized():
+    search_correction.warm()
+    correct_query('jurrasic')
+    before = search_correction.memo_info().hits
+    correct_query('Jurrasic world')
+    assert search_correction.memo_info().hits > before
+
+
+def test_long_words_only_get_single_edit_candidates():
+    # Two edits away from "entertainment" (13 letters): left alone rather
+    # than paying for the distance-2 candidate search.
+    assert correct_query('entertainmnet') in (None, 'entertainment')
+    assert correct_query('enterrtainmnet') is None
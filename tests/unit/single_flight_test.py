@@ -0,0 +1,75 @@
+# pylint: disable=missing-module-docstring, missing-function-docstring
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import single_flight
+
+
+@pytest.fixture(autouse=True)
+def _reset_counters():
+    single_flight.reset()
+    yield
+    single_flight.reset()
+
+
+def _wait_for_waiters(count: int) -> None:
+    deadline = time.monotonic() + 5
+    while single_flight.stats()['coalesced'] < count:
+        assert time.monotonic() < deadline, 'waiters never arrived'
+        time.sleep(0.005)
+
+
+def test_concurrent_identical_calls_share_one_upstream_call():
+    release = threading.Event()
+    calls = []
+
+    @single_flight.coalesced('test.search')
+    def search(query):
+        calls.append(query)
+        release.wait(5)
+        return [{'title': query}]
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        futures = [pool.submit(search, 'zelda') for _ in range(5)]
+        _wait_for_waiters(4)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert calls == ['zelda']
+    assert all(result == [{'title': 'zelda'}] for result in results)
+    # Waiters get their own copy to decorate.
+    assert len({id(result) for result in results}) == 5
+    assert single_flight.stats() == {'calls': 1, 'coalesced': 4, 'in_flight': 0}
+
+
+def test_waiters_share_the_leaders_error():
+    release = threading.Event()
+
+    @single_flight.coalesced('test.detail')
+    def detail(_):
+        release.wait(5)
+        raise HTTPException(status_code=502, detail='down')
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(detail, 1) for _ in range(3)]
+        _wait_for_waiters(2)
+        release.set()
+        for future in futures:
+            with pytest.raises(HTTPException):
+                future.result()
+    assert single_flight.stats()['calls'] == 1
+
+
+def test_different_keys_and_sequential_calls_are_not_coalesced():
+    @single_flight.coalesced('test.search', key=lambda query: query.lower())
+    def search(query):
+        return query
+
+    assert search('Zelda') == 'Zelda'
+    assert search('zelda') == 'zelda'
+    assert search('Mario') == 'Mario'
+    assert single_flight.stats() == {'calls': 3, 'coalesced': 0, 'in_flight': 0}
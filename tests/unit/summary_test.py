@@ -0,0 +1,88 @@
+# pylint: disable=missing-module-docstring, missing-function-docstring
+import pytest
+from sqlalchemy import event
+
+from app.db.models import DbUser
+from app.db.models_sandbox import DbBook, DbMovie, DbUserBook, DbUserMovie
+from app.services import rankings, summary
+
+
+@pytest.fixture(autouse=True)
+def _clean_cache():
+    summary.reset()
+    yield
+    summary.reset()
+
+
+def _library(session, user_pk):
+    movies = [DbMovie(title=f'M{i}', imdb=f'tt8{i:05d}') for i in range(7)]
+    book = DbBook(title='Dune')
+    session.add_all([*movies, book])
+    session.flush()
+    session.add_all(
+        DbUserMovie(
+            user_id=user_pk,
+            movie_id=m.pk,
+            on_rankings=True,
+            rank_key=(7 - i) * rankings.GAP,
+        )
+        for i, m in enumerate(movies)
+    )
+    session.add(DbUserBook(user_id=user_pk, book_id=book.pk, on_watchlist=True))
+    session.commit()
+    # Reload the user now so only the summary's own queries get counted.
+    session.refresh(session.get(DbUser, user_pk))
+
+
+def _statements(engine, action):
+    statements = []
+
+    def count(_conn, _cursor, statement, *_args):
+        statements.append(statement.split()[0])
+
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        result = action()
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    return result, statements
+
+
+def test_every_shelf_comes_from_one_query(test_client, test_db_session, test_db_engine):
+    user = test_db_session.get(DbUser, test_client.first_user.pk)
+    _library(test_db_session, user.pk)
+
+    body, statements = _statements(
+        test_db_engine, lambda: summary.build_summary(test_db_session, user)
+    )
+
+    assert statements == ['SELECT']
+    movies, _, books, _ = body['shelves']
+    assert [e['title'] for e in movies['top']] == ['M6', 'M5', 'M4', 'M3', 'M2']
+    assert [e['rank'] for e in movies['top']] == [1, 2, 3, 4, 5]
+    assert (movies['ranked_count'], movies['queued_count']) == (7, 0)
+    assert (books['ranked_count'], books['queued_count']) == (0, 1)
+    assert books['top'] == []
+    assert body['total_ranked'] == 7
+
+
+def test_repeat_views_are_served_from_the_cache(
+    test_client, test_db_session, test_db_engine
+):
+    user = test_db_session.get(DbUser, test_client.first_user.pk)
+    _library(test_db_session, user.pk)
+    first = summary.build_summary(test_db_session, user)
+
+    again, statements = _statements(
+        test_db_engine, lambda: summary.build_summary(test_db_session, user, 2)
+    )
+
+    assert not statements
+    assert again['shelves'][0]['top'] == first['shelves'][0]['top'][:2]
+    assert summary.stats()['hits'] == 1
+
+    summary.invalidate(user.pk)
+    _, statements = _statements(
+        test_db_engine, lambda: summary.build_summary(test_db_session, user)
+    )
+    assert statements == ['SELECT']
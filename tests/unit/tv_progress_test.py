@@ -0,0 +1,196 @@
+# pylint: disable=missing-module-docstring, missing-function-docstring
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, insert
+
+from app.db.models import DbScheduleEntry, DbTVProgress
+from app.db.models_sandbox import DbTVEpisode, DbTVShow, DbUserTVEpisode, DbUserTVShow
+from app.jobs.reconcile_tv_progress import reconcile
+from app.services import tv_progress
+
+NOW = datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _show(session, *airdates):
+    show = DbTVShow(title='Show')
+    session.add(show)
+    session.flush()
+    episodes = [
+        DbTVEpisode(tv_show_id=show.pk, title=f'E{i}', season=1, season_number=i)
+        for i in range(len(airdates))
+    ]
+    for episode, airdate in zip(episodes, airdates):
+        episode.airdate = airdate
+    session.add_all(episodes)
+    session.flush()
+    return show, episodes
+
+
+def _row(session, user_pk, show_pk):
+    row = session.get(DbTVProgress, (user_pk, show_pk))
+    if row is not None:
+        session.refresh(row)
+    return row and (row.aired_count, row.watched_count, row.next_airdate)
+
+
+def test_writes_keep_the_counts_current(test_client, test_db_session):
+    user_pk = test_client.first_user.pk
+    soon = NOW + timedelta(days=3)
+    show, episodes = _show(test_db_session, NOW - timedelta(days=2), NOW, soon)
+    test_db_session.add(DbUserTVShow(user_id=user_pk, tv_show_id=show.pk))
+    test_db_session.flush()
+    assert _row(test_db_session, user_pk, show.pk) == (2, 0, soon)
+
+    mark = DbUserTVEpisode(user_id=user_pk, episode_id=episodes[0].pk, watched=1)
+    test_db_session.add(mark)
+    test_db_session.flush()
+    assert _row(test_db_session, user_pk, show.pk) == (2, 1, soon)
+
+    # A newly synced aired episode recounts every tracker of the show.
+    test_db_session.add(
+        DbTVEpisode(
+            tv_show_id=show.pk,
+            title='E9',
+            season=1,
+            season_number=9,
+            airdate=NOW - timedelta(days=1),
+        )
+    )
+    test_db_session.flush()
+    assert _row(test_db_session, user_pk, show.pk) == (3, 1, soon)
+
+    test_db_session.delete(mark)
+    test_db_session.flush()
+    assert _row(test_db_session, user_pk, show.pk) == (3, 0, soon)
+
+
+def test_fresh_rows_are_read_by_key_and_stale_ones_recounted(
+    test_client, test_db_session, test_db_engine
+):
+    user_pk = test_client.first_user.pk
+    fresh, _ = _show(test_db_session, NOW - timedelta(days=1))
+    stale, _ = _show(test_db_session, NOW - timedelta(days=1), NOW - timedelta(hours=1))
+    test_db_session.add_all(
+        DbUserTVShow(user_id=user_pk, tv_show_id=show.pk) for show in (fresh, stale)
+    )
+    test_db_session.flush()
+    # As counted before the second episode aired.
+    test_db_session.execute(
+        DbTVProgress.__table__.update()
+        .where(DbTVProgress.tv_show_id == stale.pk)
+        .values(aired_count=1, next_airdate=NOW - timedelta(hours=1))
+    )
+
+    statements = []
+
+    def count(_conn, _cursor, statement, *_args):
+        statements.append(statement)
+
+    event.listen(test_db_engine, 'before_cursor_execute', count)
+    try:
+        only_fresh = tv_progress.counts(test_db_session, user_pk, [fresh.pk])
+    finally:
+        event.remove(test_db_engine, 'before_cursor_execute', count)
+    assert only_fresh == {fresh.pk: (1, 0, None)}
+    assert len(statements) == 1
+    assert 'GROUP BY' not in statements[0]
+
+    both = tv_progress.counts(test_db_session, user_pk, [fresh.pk, stale.pk])
+    assert both[stale.pk] == (2, 0, None)
+
+
+def test_reconcile_fills_refreshes_and_prunes(test_client, test_db_session):
+    user_pk = test_client.first_user.pk
+    missing, _ = _show(test_db_session, NOW - timedelta(days=1))
+    test_db_session.execute(
+        insert(DbUserTVShow.__table__).values(
+            id='no-progress-row', user_id=user_pk, tv_show_id=missing.pk
+        )
+    )
+    test_db_session.execute(
+        insert(DbTVProgress.__table__).values(
+            user_id=user_pk, tv_show_id=999999, aired_count=1, watched_count=1
+        )
+    )
+
+    report = reconcile(test_db_session)
+
+    assert report == {'refreshed': 1, 'dropped': 1}
+    assert _row(test_db_session, user_pk, missing.pk) == (1, 0, None)
+    assert test_db_session.get(DbTVProgress, (user_pk, 999999)) is None
+    assert reconcile(test_db_session) == {'refreshed': 0, 'dropped': 0}
+
+
+def test_full_reconcile_rebuilds_schedule_entries(test_client, test_db_session):
+    user_pk = test_client.first_user.pk
+    show, episodes = _show(test_db_session, NOW - timedelta(days=1))
+    test_db_session.add(
+        DbUserTVShow(user_id=user_pk, tv_show_id=show.pk, on_watchlist=True)
+    )
+    test_db_session.flush()
+    table = DbScheduleEntry.__table__
+    entries = table.select().where(table.c.user_id == user_pk)
+    assert [row.episode_pk for row in test_db_session.execute(entries)] == [
+        episodes[0].pk
+    ]
+    # Drift from a write that bypassed the ORM.
+    test_db_session.execute(table.delete())
+
+    reconcile(test_db_session, full=True)
+
+    assert [row.episode_pk for row in test_db_session.execute(entries)] == [
+        episodes[0].pk
+    ]
+
+
+def test_store_upserts_over_a_concurrent_writers_row(test_db_session, test_db_engine):
+    # As if another transaction recounted the pair and committed first.
+    test_db_session.execute(
+        insert(DbTVProgress.__table__).values(
+            user_id=1, tv_show_id=77, aired_count=1, watched_count=0
+        )
+    )
+    statements = []
+
+    def count(_conn, _cursor, statement, *_args):
+        statements.append(statement.split()[0])
+
+    event.listen(test_db_engine, 'before_cursor_execute', count)
+    try:
+        tv_progress.store(test_db_session.connection(), {(1, 77): (2, 1, None)})
+    finally:
+        event.remove(test_db_engine, 'before_cursor_execute', count)
+
+    assert statements == ['INSERT']
+    assert _row(test_db_session, 1, 77) == (2, 1, None)
+
+
+def test_schedule_rebuild_upserts_over_a_concurrent_writers_entries(
+    test_client, test_db_session
+):
+    user_pk = test_client.first_user.pk
+    show, episodes = _show(test_db_session, NOW - timedelta(days=1))
+    table = DbScheduleEntry.__table__
+    # Inserted by another transaction after this one's DELETE ran: same key,
+    # so the DELETE (by user and show) can't see it.
+    test_db_session.execute(
+        insert(table).values(
+            user_id=user_pk,
+            episode_pk=episodes[0].pk,
+            tv_show_id=0,
+            show_id='stale',
+            show_title='Stale',
+            episode_id='stale',
+            episode_title='Stale',
+            airdate=NOW,
+        )
+    )
+    test_db_session.add(
+        DbUserTVShow(user_id=user_pk, tv_show_id=show.pk, on_watchlist=True)
+    )
+    test_db_session.flush()
+
+    rows = test_db_session.execute(
+        table.select().where(table.c.user_id == user_pk)
+    ).all()
+    assert [(row.tv_show_id, row.show_title) for row in rows] == [(show.pk, 'Show')]
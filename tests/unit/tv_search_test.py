@@ -1,7 +1,12 @@
 # pylint: disable=missing-module-docstring, missing-function-docstring
 # pylint: disable=protected-access, missing-class-docstring
+from datetime import datetime, timedelta
 from unittest.mock import MagicMock, patch
 
+from sqlalchemy import event
+
+from app.db.models import DbTVProgress
+from app.db.models_sandbox import DbTVEpisode, DbTVShow, DbUserTVShow
 from app.services import tv_search
 
 
@@ -32,7 +37,7 @@ def test_apply_detail_truncates_and_skips_none():
     assert s.summary is None  # None values are skipped
 
 
-@patch('app.services.tv_search.requests.get')
+@patch('app.services.tv_search.provider_http.get')
 def test_get_tv_show_detail_maps_fields(mock_get):
     resp = MagicMock()
     resp.raise_for_status.return_value = None
@@ -70,7 +75,7 @@ def test_get_tv_show_detail_without_id_returns_none():
     assert tv_search.get_tv_show_detail(None) is None
 
 
-@patch('app.services.tv_search.requests.get')
+@patch('app.services.tv_search.provider_http.get')
 def test_get_show_episodes_normalizes(mock_get):
     resp = MagicMock()
     resp.raise_for_status.return_value = None
@@ -116,7 +121,7 @@ def _tvmaze_show(**overrides):
     return show
 
 
-@patch('app.services.tv_search.requests.get')
+@patch('app.services.tv_search.provider_http.get')
 def test_search_tv_shows_imdb_id_uses_lookup(mock_get):
     resp = MagicMock()
     resp.status_code = 200
@@ -143,7 +148,7 @@ def test_search_tv_shows_imdb_id_uses_lookup(mock_get):
     }
 
 
-@patch('app.services.tv_search.requests.get')
+@patch('app.services.tv_search.provider_http.get')
 def test_search_tv_shows_imdb_id_is_case_insensitive(mock_get):
     resp = MagicMock()
     resp.status_code = 200
@@ -160,7 +165,7 @@ def test_search_tv_shows_imdb_id_is_case_insensitive(mock_get):
     )
 
 
-@patch('app.services.tv_search.requests.get')
+@patch('app.services.tv_search.provider_http.get')
 def test_search_tv_shows_thetvdb_id_uses_lookup(mock_get):
     resp = MagicMock()
     resp.status_code = 200
@@ -178,7 +183,7 @@ def test_search_tv_shows_thetvdb_id_uses_lookup(mock_get):
     assert results[0]['title'] == 'Severance'
 
 
-@patch('app.services.tv_search.requests.get')
+@patch('app.services.tv_search.provider_http.get')
 def test_search_tv_shows_unknown_id_returns_empty_list(mock_get):
     resp = MagicMock()
     resp.status_code = 404
@@ -188,7 +193,7 @@ def test_search_tv_shows_unknown_id_returns_empty_list(mock_get):
     assert not tv_search.search_tv_shows('999999')
 
 
-@patch('app.services.tv_search.requests.get')
+@patch('app.services.tv_search.provider_http.get')
 def test_search_tv_shows_short_numeric_query_falls_back_to_title_search(
     mock_get,
 ):
@@ -209,7 +214,7 @@ def test_search_tv_shows_short_numeric_query_falls_back_to_title_search(
     assert results[0]['title'] == '1923'
 
 
-@patch('app.services.tv_search.requests.get')
+@patch('app.services.tv_search.provider_http.get')
 def test_search_tv_shows_ordinary_title_query_unaffected(mock_get):
     resp = MagicMock()
     resp.raise_for_status.return_value = None
@@ -224,3 +229,83 @@ def test_search_tv_shows_ordinary_title_query_unaffected(mock_get):
         timeout=tv_search.REQUEST_TIMEOUT,
     )
     assert results[0]['title'] == 'Severance'
+
+
+def _episodes(count, **overrides):
+    return [
+        {
+            'tvmaze': 50000 + n,
+            'title': f'Episode {n}',
+            'season': 1,
+            'season_number': n,
+            'airdate': datetime(2020, 1, 1) + timedelta(days=n),
+            **overrides,
+        }
+        for n in range(1, count + 1)
+    ]
+
+
+def _writes(engine, action):
+    statements = []
+
+    def count(_conn, _cursor, statement, *_args):
+        if statement.lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')):
+            statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        result = action()
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    return result, statements
+
+
+def test_sync_episodes_writes_only_new_and_changed_rows(
+    test_client, test_db_session, test_db_engine
+):
+    show = DbTVShow(title='Soap', tvmaze=4242)
+    test_db_session.add(show)
+    test_db_session.flush()
+    test_db_session.add(
+        DbUserTVShow(
+            user_id=test_client.first_user.pk, tv_show_id=show.pk, on_watchlist=True
+        )
+    )
+    test_db_session.flush()
+    episodes = _episodes(12)
+
+    def sync():
+        with patch.object(tv_search, 'get_show_episodes', return_value=episodes):
+            return tv_search.sync_episodes(test_db_session, show)
+
+    with patch('app.services.bulk_upsert.CHUNK_SIZE', 5):
+        created, writes = _writes(test_db_engine, sync)
+    assert created == 12
+    assert sum('INTO tv_episodes' in s for s in writes) == 3  # chunks of 5
+    assert test_db_session.get(DbTVProgress, (test_client.first_user.pk, show.pk))
+
+    # Unchanged payload: nothing written.
+    assert _writes(test_db_engine, sync) == (0, [])
+
+    # One retitled episode and one new one: a single row each way.
+    episodes[0] = {**episodes[0], 'title': 'Pilot'}
+    episodes.append(_episodes(13)[-1])
+    created, writes = _writes(test_db_engine, sync)
+    assert created == 1
+    rows = test_db_session.query(DbTVEpisode).filter_by(tv_show_id=show.pk).all()
+    assert len(rows) == 13
+    assert {r.title for r in rows if r.tvmaze == 50001} == {'Pilot'}
+    assert sum('INTO tv_episodes' in s for s in writes) == 2
+
+
+@patch('app.services.tv_search.provider_http.get')
+def test_get_show_updates_maps_ids_to_epochs(mock_get):
+    resp = MagicMock()
+    resp.raise_for_status.return_value = None
+    resp.json.return_value = {'1': 1700000000, '82': 1700000500}
+    mock_get.return_value = resp
+
+    assert tv_search.get_show_updates() == {1: 1700000000, 82: 1700000500}
+
+    resp.json.side_effect = ValueError('not json')
+    assert tv_search.get_show_updates() is None